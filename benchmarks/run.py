@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for calendar generation.
+
+Runs every case against a scratch output directory and a local Open-Meteo
+stub, writes the results as JSON, and fails (exit code 1) when a result
+exceeds its budget in benchmarks/budgets.json or regresses against a
+baseline run.
+
+Usage:
+    python3 benchmarks/run.py
+    python3 benchmarks/run.py --quick --only serialize
+    python3 benchmarks/run.py --baseline benchmarks/results/baseline.json --max-regression 0.2
+    python3 benchmarks/run.py --latency 0.5 --fail-rate 0.1
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import platform
+import statistics
+import subprocess
+import tempfile
+import contextlib
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tools.openmeteo_stub import start_stub_server
+
+BUDGETS_PATH = os.path.join(ROOT, 'benchmarks', 'budgets.json')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+SIZES = [100, 1000, 10000, 100000]
+QUICK_SIZES = [100, 1000]
+# icalendar needs ~20 s for 100000 events; that size only runs with --full
+ICALENDAR_MAX_EVENTS = 10000
+
+# Calendar sizes of the memory case; ten million events only run with
+# --full, and only streamed (buffered they need several GB)
+MEMORY_SIZES = [10000, 100000, 1000000]
+MEMORY_QUICK_SIZES = [1000, 10000]
+MEMORY_FULL_SIZES = MEMORY_SIZES + [10000000]
+MEMORY_BUFFERED_MAX_EVENTS = 1000000
+
+# Cities of the hourly weather case, each with a 7-day hourly forecast
+HOURLY_CITIES = 500
+HOURLY_QUICK_CITIES = 50
+
+# Run in a fresh interpreter by bench_memory: generates a calendar of
+# argv[1] yielded events, streamed if argv[2] == 'stream', and prints the
+# peak resident set size in bytes. Only the .gz variant is written: the
+# brotli binding buffers several times the file size whatever the mode.
+MEMORY_SCRIPT = """
+import sys, resource
+from datetime import date, timedelta
+import utils.compress
+from utils import BaseCalendarGenerator
+
+utils.compress.PRECOMPRESS = ('gz',)
+
+class Synthetic(BaseCalendarGenerator):
+    filename = 'memory.ics'
+
+    def build(self):
+        start = date(2026, 1, 1)
+        for i in range(int(sys.argv[1])):
+            yield dict(summary=f'事件 {i} 🎉', start_date=start + timedelta(days=i % 3650),
+                       description='基准测试事件，描述文字足够长以触发折行，用于衡量序列化的真实开销。')
+
+generator = Synthetic('基准测试', serializer='stream')
+generator.streaming = sys.argv[2] == 'stream'
+generator.generate()
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024))
+"""
+
+DTSTAMP = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def measure(func, repeat):
+    """
+    Time a callable.
+
+    Returns:
+        Dict with median/min seconds and the number of runs
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'median': statistics.median(timings), 'min': min(timings), 'runs': repeat}
+
+
+def make_generator(events, serializer='stream'):
+    """Build a generator holding a number of synthetic all-day events."""
+    from utils import BaseCalendarGenerator
+
+    generator = BaseCalendarGenerator('基准测试', serializer=serializer)
+    start = date(2026, 1, 1)
+    for i in range(events):
+        generator.add_event(
+            summary=f'事件 {i} 🎉',
+            start_date=start + timedelta(days=i % 3650),
+            description='基准测试事件，描述文字足够长以触发折行，用于衡量序列化的真实开销。',
+        )
+    return generator
+
+
+def bench_add_event(options):
+    """Per-event cost of BaseCalendarGenerator.add_event()."""
+    count = 2000 if options.quick else 20000
+    timing = measure(lambda: make_generator(count), options.repeat)
+    return {'add_event': dict(timing, value=timing['median'] / count, unit='s/event', events=count)}
+
+
+def bench_serialize(options):
+    """Full-calendar serialization for each backend and size."""
+    results = {}
+    for size in (QUICK_SIZES if options.quick else SIZES):
+        for backend in ('stream', 'icalendar'):
+            if backend == 'icalendar' and size > ICALENDAR_MAX_EVENTS and not options.full:
+                continue
+            generator = make_generator(size, serializer=backend)
+            repeat = options.repeat if size < 10000 else 1
+            timing = measure(lambda: generator.render(io.BytesIO(), DTSTAMP), repeat)
+            results[f'serialize_{backend}_{size}'] = dict(
+                timing, value=timing['median'], unit='s', events=size
+            )
+    return results
+
+
+def bench_window(options):
+    """Date-window queries on the event store: index build and a 30-day window."""
+    results = {}
+    for size in (QUICK_SIZES if options.quick else SIZES):
+        generator = make_generator(size)
+        first = date(2026, 6, 1)
+        last = first + timedelta(days=29)
+        build = measure(lambda: generator.events._build_index(), options.repeat)
+        query = measure(lambda: generator.events.between(first, last), options.repeat * 10)
+        results[f'window_index_{size}'] = dict(build, value=build['median'], unit='s', events=size)
+        results[f'window_query_{size}'] = dict(query, value=query['median'], unit='s', events=size)
+    return results
+
+
+def bench_composite(options):
+    """Merging three cached calendars into one composite feed."""
+    from utils.composite import make_fragment, compose
+
+    results = {}
+    for size in (QUICK_SIZES if options.quick else SIZES):
+        # The same events in each source: every event of the later two is a duplicate
+        generator = make_generator(size)
+        fragment = make_fragment(generator.name, generator.events, DTSTAMP)
+        timing = measure(lambda: compose([fragment, fragment, fragment]), options.repeat)
+        results[f'composite_{size}'] = dict(timing, value=timing['median'], unit='s', events=3 * size)
+    return results
+
+
+def bench_caldav(options):
+    """CalDAV collections: diffing a rebuild, and what a sync-collection after one changed event transfers."""
+    from utils.caldav import CalendarCollection, report
+
+    sync = (b'<d:sync-collection xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">'
+            b'<d:sync-token>%s</d:sync-token><d:sync-level>1</d:sync-level>'
+            b'<d:prop><d:getetag/><c:calendar-data/></d:prop></d:sync-collection>')
+    results = {}
+    for size in (QUICK_SIZES if options.quick else SIZES):
+        generator = make_generator(size)
+        collection = CalendarCollection('bench', 'bench')
+        collection.update(generator.name, generator.events, DTSTAMP)
+        token = collection.sync_token.encode('ascii')
+        timing = measure(lambda: collection.update(generator.name, generator.events, DTSTAMP), options.repeat)
+        results[f'caldav_update_{size}'] = dict(timing, value=timing['median'], unit='s', events=size)
+
+        # One event renamed: a new UID, so one added and one removed resource
+        changed = make_generator(size)
+        changed.events.summaries[0] += ' (changed)'
+        changed.events.uids[0] = 'changed@cal'
+        collection.update(changed.name, changed.events, DTSTAMP)
+        body = report('/caldav/bench/', collection, sync % token)
+        full = io.BytesIO()
+        generator.render(full, DTSTAMP)
+        results[f'caldav_sync_bytes_{size}'] = dict(
+            value=len(body), unit='bytes', events=size, full_bytes=len(full.getvalue()),
+        )
+    return results
+
+
+def bench_cities(options):
+    """City catalog: compiling, name lookups and nearest-city queries on synthetic catalogs."""
+    import random
+    from utils.cities import City, CityCatalog, compile_catalog
+
+    rng = random.Random(0)
+    results = {}
+    for size in (QUICK_SIZES if options.quick else SIZES):
+        cities = [
+            City(f'City{i}', f'城市{i}', '省', rng.uniform(18, 53), rng.uniform(73, 135), (f'别名{i}',))
+            for i in range(size)
+        ]
+        compiled = measure(lambda: compile_catalog(cities), options.repeat)
+        data = compile_catalog(cities)
+        names = [f'别名{rng.randrange(size)}' for _ in range(1000)]
+        points = [(rng.uniform(18, 53), rng.uniform(73, 135)) for _ in range(1000)]
+
+        catalogs = []
+
+        def first_lookup():
+            catalogs.append(CityCatalog(lambda: data))
+            catalogs[-1].find(names[0])
+
+        index = measure(first_lookup, options.repeat)
+        catalog = catalogs[-1]
+        catalog.nearest(*points[0])
+        find = measure(lambda: [catalog.find(name) for name in names], options.repeat)
+        nearest = measure(lambda: [catalog.nearest(lat, lon) for lat, lon in points], options.repeat)
+        results[f'cities_compile_{size}'] = dict(compiled, value=compiled['median'], unit='s', cities=size)
+        results[f'cities_index_{size}'] = dict(index, value=index['median'], unit='s', cities=size)
+        results[f'cities_find_{size}'] = dict(find, value=find['median'] / len(names), unit='s', cities=size)
+        results[f'cities_nearest_{size}'] = dict(nearest, value=nearest['median'] / len(points), unit='s',
+                                                 cities=size)
+    return results
+
+
+def bench_workdays(options):
+    """Workday engine: compiling the calendar and constant-time queries."""
+    from utils.workdays import WorkdayCalendar
+    from config.holidays import PUBLIC_HOLIDAYS
+    from config.settings import WORKDAY_YEARS
+
+    calendar = WorkdayCalendar(PUBLIC_HOLIDAYS, *WORKDAY_YEARS)
+    days = [date(2026, 1, 1) + timedelta(days=i % 365) for i in range(10000)]
+    queries = {
+        'is_workday': lambda: [calendar.is_workday(day) for day in days],
+        'between': lambda: [calendar.workdays_between(day, day + timedelta(days=90)) for day in days],
+        'add': lambda: [calendar.add_workdays(day, 15) for day in days],
+        'next_20': lambda: [calendar.next_workdays(day, 20) for day in days],
+    }
+    compiled = measure(lambda: WorkdayCalendar(PUBLIC_HOLIDAYS, *WORKDAY_YEARS), options.repeat)
+    results = {'workdays_compile': dict(compiled, value=compiled['median'], unit='s',
+                                        years=WORKDAY_YEARS[1] - WORKDAY_YEARS[0] + 1)}
+    for name, query in queries.items():
+        timing = measure(query, options.repeat)
+        results[f'workdays_{name}'] = dict(timing, value=timing['median'] / len(days), unit='s')
+    return results
+
+
+def bench_weather(options):
+    """Weather stage against the stub, per-city and batched requests."""
+    from generate import generate_weather_calendars
+    from generators.feeds import weather_cities
+
+    cities = len(weather_cities())
+    results = {}
+    for name, batch_size in (('weather_per_city', 1), ('weather_batched', cities)):
+        outcomes = []
+
+        def run():
+            outcomes.append(generate_weather_calendars(batch_size=batch_size, refresh=True))
+
+        with quiet():
+            timing = measure(run, options.repeat)
+        ok = sum(sum(result.values()) for result in outcomes)
+        results[name] = dict(
+            timing, value=timing['median'], unit='s',
+            cities=cities, ok_ratio=round(ok / (cities * len(outcomes)), 3),
+        )
+    return results
+
+
+def bench_hourly(options):
+    """Hourly weather feeds: column conversion per backend, and building and serializing each city's feed."""
+    from tools.openmeteo_stub import build_hourly
+    from utils import create_session
+    from utils import forecast
+    from generators.weather import WeatherGenerator, create_weather_cache
+    from config.settings import WEATHER_HOURLY_STEPS
+
+    count = HOURLY_QUICK_CITIES if options.quick else HOURLY_CITIES
+    forecasts = []
+    for i in range(count):
+        response = build_hourly(20 + i * 0.05, 100 + i * 0.05, 7, unixtime=True)
+        forecasts.append(dict(response['hourly'], utc_offset_seconds=response['utc_offset_seconds']))
+
+    results = {}
+    backends = ['python'] if forecast.get_numpy() is None else ['python', 'numpy']
+    for backend in backends:
+        for step in WEATHER_HOURLY_STEPS:
+            timing = measure(lambda: [forecast.hourly_periods(data, step, backend) for data in forecasts],
+                             options.repeat)
+            results[f'hourly_convert_{backend}_{step}h'] = dict(
+                timing, value=timing['median'] / count, unit='s/city', cities=count,
+            )
+
+    session, cache = create_session(), create_weather_cache()
+    for step in WEATHER_HOURLY_STEPS:
+        events = []
+
+        def build():
+            events.clear()
+            for data in forecasts:
+                generator = WeatherGenerator('Ningbo', session=session, cache=cache, step=step)
+                generator.generate(data)
+                generator.to_ical(DTSTAMP)
+                events.append(len(generator.events))
+
+        timing = measure(build, options.repeat)
+        results[f'hourly_feed_{step}h'] = dict(
+            timing, value=timing['median'] / count, unit='s/city', cities=count,
+            events_per_city=round(sum(events) / count, 1),
+        )
+    return results
+
+
+def bench_generate_all(options):
+    """End-to-end generate_all(), with fresh output and with nothing changed."""
+    from generate import generate_all
+    from config.settings import OUTPUT_DIR, GENERATE_JOBS
+
+    def cold():
+        for name in os.listdir(OUTPUT_DIR):
+            os.remove(os.path.join(OUTPUT_DIR, name))
+        generate_all(GENERATE_JOBS, refresh=True)
+
+    with quiet():
+        cold_timing = measure(cold, options.repeat)
+        # Output and weather cache are now current: measures the skip path
+        warm_timing = measure(lambda: generate_all(GENERATE_JOBS), options.repeat)
+    return {
+        'generate_all_cold': dict(cold_timing, value=cold_timing['median'], unit='s', jobs=GENERATE_JOBS),
+        'generate_all_warm': dict(warm_timing, value=warm_timing['median'], unit='s', jobs=GENERATE_JOBS),
+    }
+
+
+def bench_memory(options):
+    """Peak memory of generating one large calendar, streamed and buffered."""
+    sizes = MEMORY_QUICK_SIZES if options.quick else MEMORY_FULL_SIZES if options.full else MEMORY_SIZES
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    results = {}
+    for size in sizes:
+        for mode in ('stream', 'buffered') if size <= MEMORY_BUFFERED_MAX_EVENTS else ('stream',):
+            # Fresh interpreter and output directory, so peaks do not carry over
+            with tempfile.TemporaryDirectory() as cwd:
+                output = subprocess.check_output(
+                    [sys.executable, '-c', MEMORY_SCRIPT, str(size), mode], cwd=cwd, env=env, text=True
+                )
+            peak = int(output.split()[-1]) / 2 ** 20
+            results[f'memory_{mode}_{size}'] = {'value': peak, 'unit': 'MB', 'events': size}
+    return results
+
+
+def bench_startup(options):
+    """Fresh-interpreter startup: CLI --help and importing the CLI and server modules."""
+    commands = {
+        'startup_python': ['-c', 'pass'],
+        'startup_cli_help': [os.path.join(ROOT, 'generate.py'), '--help'],
+        'startup_import_generate': ['-c', 'import generate'],
+    }
+    if importlib.util.find_spec('fastapi'):
+        commands['startup_import_server'] = ['-c', 'import server']
+
+    results = {}
+    for name, args in commands.items():
+        def run():
+            subprocess.run([sys.executable, *args], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+        run()  # warm the OS file cache and __pycache__
+        timing = measure(run, max(options.repeat, 5))
+        results[name] = dict(timing, value=timing['median'], unit='s')
+    return results
+
+
+CASES = {
+    'startup': bench_startup,
+    'add_event': bench_add_event,
+    'serialize': bench_serialize,
+    'window': bench_window,
+    'composite': bench_composite,
+    'caldav': bench_caldav,
+    'memory': bench_memory,
+    'cities': bench_cities,
+    'workdays': bench_workdays,
+    'hourly': bench_hourly,
+    'weather': bench_weather,
+    'generate_all': bench_generate_all,
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence generator progress output while timing."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def git_revision():
+    """Return the current git commit, or None outside a checkout."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def check(results, budgets, baseline=None, max_regression=None):
+    """
+    Compare results with absolute budgets and an optional baseline.
+
+    Args:
+        results: Dict of case name to result
+        budgets: Dict of case name to maximum value
+        baseline: Results dict of a previous run (optional)
+        max_regression: Allowed relative slowdown against the baseline
+
+    Returns:
+        List of violation messages
+    """
+    violations = []
+    for name, result in sorted(results.items()):
+        limit = budgets.get(name)
+        if limit is not None and result['value'] > limit:
+            violations.append(f"{name}: {result['value']:.6g} {result['unit']} exceeds budget {limit:.6g}")
+        previous = (baseline or {}).get(name)
+        if previous and max_regression is not None:
+            allowed = previous['value'] * (1 + max_regression)
+            if result['value'] > allowed:
+                change = result['value'] / previous['value'] - 1
+                violations.append(
+                    f"{name}: {result['value']:.6g} {result['unit']} is {change:+.0%} "
+                    f"vs baseline {previous['value']:.6g}"
+                )
+    return violations
+
+
+def print_results(results, baseline=None):
+    """Print a results table, with the change against a baseline if given."""
+    print(f"\n{'case':<32}{'value':>14}  unit      {'vs baseline':>12}")
+    for name, result in sorted(results.items()):
+        previous = (baseline or {}).get(name)
+        change = f"{result['value'] / previous['value'] - 1:+.1%}" if previous else ''
+        print(f"{name:<32}{result['value']:>14.6g}  {result['unit']:<8}  {change:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run calendar generation benchmarks')
+    parser.add_argument('--only', nargs='+', choices=list(CASES), help='Cases to run (default: all)')
+    parser.add_argument('--quick', action='store_true', help='Smaller sizes for a fast smoke run')
+    parser.add_argument('--full', action='store_true',
+                        help=f'Also serialize more than {ICALENDAR_MAX_EVENTS} events with icalendar '
+                             f'and stream a calendar of {MEMORY_FULL_SIZES[-1]} events')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case (default: 3)')
+    parser.add_argument('--latency', type=float, default=0.2,
+                        help='Stub response latency in seconds (default: 0.2)')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='Fraction of stub requests answered with HTTP 500 (default: 0)')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', help='Previous results file to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed slowdown against --baseline (default: 0.25 = 25%%)')
+    parser.add_argument('--budgets', default=BUDGETS_PATH, help='Budgets file (default: benchmarks/budgets.json)')
+    args = parser.parse_args()
+
+    stub = start_stub_server(latency=args.latency, fail_rate=args.fail_rate)
+    workdir = tempfile.mkdtemp(prefix='cal-bench-')
+    # Must be set before project modules are imported: settings reads them once
+    os.environ['WEATHER_API_URL'] = f'http://127.0.0.1:{stub.server_port}/v1/forecast'
+    os.environ['WEATHER_CACHE_DIR'] = os.path.join(workdir, 'cache')
+    os.chdir(workdir)
+
+    results = {}
+    for name in args.only or list(CASES):
+        print(f"⏱️  Running {name}...")
+        results.update(CASES[name](args))
+    stub.shutdown()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    with open(args.budgets, encoding='utf-8') as f:
+        budgets = json.load(f)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now().strftime('%Y%m%dT%H%M%S') + '.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'git': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'options': {
+                    'quick': args.quick,
+                    'repeat': args.repeat,
+                    'latency': args.latency,
+                    'fail_rate': args.fail_rate,
+                },
+            },
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+
+    print_results(results, baseline)
+    print(f"\n📄 Results written to {output}")
+
+    violations = check(results, budgets, baseline, args.max_regression if baseline else None)
+    for violation in violations:
+        print(f"❌ {violation}")
+    if not violations:
+        print("✅ All benchmarks within budget")
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,44 +1,13 @@
-"""City configuration for weather calendars."""
+"""
+City catalog for weather calendars.
 
-CITIES = {
-    'Beijing': {
-        'lat': 39.9042,
-        'lon': 116.4074,
-        'name': '北京'
-    },
-    'Shanghai': {
-        'lat': 31.2304,
-        'lon': 121.4737,
-        'name': '上海'
-    },
-    'Guangzhou': {
-        'lat': 23.1291,
-        'lon': 113.2644,
-        'name': '广州'
-    },
-    'Shenzhen': {
-        'lat': 22.5431,
-        'lon': 114.0579,
-        'name': '深圳'
-    },
-    'Hangzhou': {
-        'lat': 30.2741,
-        'lon': 120.1551,
-        'name': '杭州'
-    },
-    'Ningbo': {
-        'lat': 29.8683,
-        'lon': 121.5440,
-        'name': '宁波'
-    },
-    'Chengdu': {
-        'lat': 30.5728,
-        'lon': 104.0668,
-        'name': '成都'
-    },
-    'Wuhan': {
-        'lat': 30.5928,
-        'lon': 114.3055,
-        'name': '武汉'
-    },
-}
+Cities are listed in config/cities.tsv and compiled into config/city_data.py
+by tools/build_city_catalog.py. CITIES maps city key to a dict with 'lat',
+'lon', 'name', 'province' and 'aliases'; the compiled module is imported on
+first access.
+"""
+
+import importlib
+from utils.cities import CityCatalog, parse_columns
+
+CITIES = CityCatalog(lambda: parse_columns(importlib.import_module('config.city_data')))
@@ -0,0 +1,251 @@
+"""
+City catalog for weather calendars, 45 cities.
+
+Generated by tools/build_city_catalog.py from config/cities.tsv; do not
+edit by hand.
+
+One line per city in catalog order; load with utils.cities.parse_columns().
+ALIASES are tab-separated, COORDS holds latitude and longitude in 1e-4
+degrees, KDTREE the catalog positions in k-d tree order (see
+utils.cities.kdtree_order).
+"""
+
+KEYS = """\
+Beijing
+Shanghai
+Guangzhou
+Shenzhen
+Hangzhou
+Ningbo
+Chengdu
+Wuhan
+Tianjin
+Chongqing
+Nanjing
+Suzhou
+Wuxi
+Xian
+Changsha
+Zhengzhou
+Jinan
+Qingdao
+Shenyang
+Dalian
+Harbin
+Changchun
+Shijiazhuang
+Taiyuan
+Hohhot
+Hefei
+Fuzhou
+Xiamen
+Nanchang
+Wenzhou
+Dongguan
+Foshan
+Nanning
+Haikou
+Sanya
+Guiyang
+Kunming
+Lhasa
+Lanzhou
+Xining
+Yinchuan
+Urumqi
+HongKong
+Macau
+Taipei"""
+
+NAMES = """\
+北京
+上海
+广州
+深圳
+杭州
+宁波
+成都
+武汉
+天津
+重庆
+南京
+苏州
+无锡
+西安
+长沙
+郑州
+济南
+青岛
+沈阳
+大连
+哈尔滨
+长春
+石家庄
+太原
+呼和浩特
+合肥
+福州
+厦门
+南昌
+温州
+东莞
+佛山
+南宁
+海口
+三亚
+贵阳
+昆明
+拉萨
+兰州
+西宁
+银川
+乌鲁木齐
+香港
+澳门
+台北"""
+
+PROVINCES = """\
+北京
+上海
+广东
+广东
+浙江
+浙江
+四川
+湖北
+天津
+重庆
+江苏
+江苏
+江苏
+陕西
+湖南
+河南
+山东
+山东
+辽宁
+辽宁
+黑龙江
+吉林
+河北
+山西
+内蒙古
+安徽
+福建
+福建
+江西
+浙江
+广东
+广东
+广西
+海南
+海南
+贵州
+云南
+西藏
+甘肃
+青海
+宁夏
+新疆
+香港
+澳门
+台湾"""
+
+ALIASES = """\
+Peking
+
+Canton
+
+
+
+
+
+
+Chungking
+Nanking
+
+
+Xi'an
+
+
+
+Tsingtao
+
+
+
+
+
+
+
+
+
+Amoy
+
+
+
+
+
+
+
+
+
+
+
+
+
+Ürümqi
+Hong Kong
+Macao
+臺北"""
+
+COORDS = """\
+399042 1164074
+312304 1214737
+231291 1132644
+225431 1140579
+302741 1201551
+298683 1215440
+305728 1040668
+305928 1143055
+393434 1173616
+295630 1065516
+320603 1187969
+312989 1205853
+314912 1203119
+343416 1089398
+282282 1129388
+347466 1136254
+366512 1171201
+360671 1203826
+418057 1234315
+389140 1216147
+458038 1265349
+438171 1253235
+380428 1145149
+378706 1125489
+408426 1117492
+318206 1172272
+260745 1192965
+244798 1180894
+286820 1158579
+279943 1206994
+230207 1137518
+230215 1131214
+228170 1083665
+200440 1101999
+182528 1095119
+266470 1066302
+250389 1027183
+296525 911721
+360611 1038343
+366171 1017782
+384872 1062309
+438256 876168
+223193 1141694
+221987 1135439
+250330 1215654"""
+
+KDTREE = """\
+1 5 11 12 10 17 20 21 18 19 16 4 27 42 3 30 43 44 29 26
+25 28 2 15 7 23 13 38 22 8 0 24 41 40 39 31 33 34 32 36
+35 14 9 6 37"""
@@ -1,57 +1,75 @@
 """Holiday and event data."""
 
-# 2026 Chinese Public Holidays
-HOLIDAYS_2026 = [
-    ('元旦', '2026-01-01', '2026-01-01'),
-    ('春节假期', '2026-02-17', '2026-02-23'),
-    ('清明节', '2026-04-05', '2026-04-07'),
-    ('劳动节', '2026-05-01', '2026-05-03'),
-    ('端午节', '2026-06-25', '2026-06-27'),
-    ('中秋节', '2026-10-01', '2026-10-03'),
-    ('国庆节', '2026-10-01', '2026-10-08'),
-]
+# Chinese public holidays by year, from the State Council's annual notice:
+# (name, first day off, last day off, adjusted workdays). Adjusted
+# workdays (调休上班) are weekend days worked to make up for the holiday.
+# Years not listed follow the plain Monday-Friday week.
+PUBLIC_HOLIDAYS = {
+    2025: [
+        ('元旦', '2025-01-01', '2025-01-01', []),
+        ('春节假期', '2025-01-28', '2025-02-04', ['2025-01-26', '2025-02-08']),
+        ('清明节', '2025-04-04', '2025-04-06', []),
+        ('劳动节', '2025-05-01', '2025-05-05', ['2025-04-27']),
+        ('端午节', '2025-05-31', '2025-06-02', []),
+        ('国庆节、中秋节', '2025-10-01', '2025-10-08', ['2025-09-28', '2025-10-11']),
+    ],
+    2026: [
+        ('元旦', '2026-01-01', '2026-01-03', ['2026-01-04']),
+        ('春节假期', '2026-02-15', '2026-02-23', ['2026-02-14', '2026-02-28']),
+        ('清明节', '2026-04-04', '2026-04-06', []),
+        ('劳动节', '2026-05-01', '2026-05-05', ['2026-05-09']),
+        ('端午节', '2026-06-19', '2026-06-21', []),
+        ('中秋节', '2026-09-25', '2026-09-27', []),
+        ('国庆节', '2026-10-01', '2026-10-07', ['2026-09-20', '2026-10-10']),
+    ],
+}
+
+# 2026 Chinese Public Holidays as (name, first day, last day)
+HOLIDAYS_2026 = [(name, start, end) for name, start, end, _ in PUBLIC_HOLIDAYS[2026]]
 
-# Lunar Festivals
+# Lunar Festivals: (name, lunar month, lunar day, description)
+# Negative days count from the end of the month: 除夕 is the last day of
+# the 12th month, which is 腊月廿九 in years where that month is short.
 LUNAR_FESTIVALS = [
-    ('春节 🧧', '2026-02-17', '农历新年，中国最重要的传统节日'),
-    ('元宵节 🏮', '2026-03-03', '农历正月十五，赏花灯吃汤圆'),
-    ('龙抬头 🐉', '2026-03-11', '农历二月初二，理发祈福'),
-    ('端午节 🚣', '2026-06-25', '农历五月初五，吃粽子赛龙舟'),
-    ('七夕节 💕', '2026-08-14', '农历七月初七，中国情人节'),
-    ('中元节 🕯️', '2026-08-30', '农历七月十五，祭祖节日'),
-    ('中秋节 🥮', '2026-10-03', '农历八月十五，赏月吃月饼'),
-    ('重阳节 🍵', '2026-10-23', '农历九月初九，登高敬老'),
-    ('腊八节 🍲', '2027-01-16', '农历腊月初八，喝腊八粥'),
-    ('小年 🧹', '2027-02-04', '农历腊月二十三，扫尘祭灶'),
-    ('除夕 🎆', '2027-02-15', '农历年最后一天，守岁迎新年'),
+    ('春节 🧧', 1, 1, '农历新年，中国最重要的传统节日'),
+    ('元宵节 🏮', 1, 15, '农历正月十五，赏花灯吃汤圆'),
+    ('龙抬头 🐉', 2, 2, '农历二月初二，理发祈福'),
+    ('端午节 🚣', 5, 5, '农历五月初五，吃粽子赛龙舟'),
+    ('七夕节 💕', 7, 7, '农历七月初七，中国情人节'),
+    ('中元节 🕯️', 7, 15, '农历七月十五，祭祖节日'),
+    ('中秋节 🥮', 8, 15, '农历八月十五，赏月吃月饼'),
+    ('重阳节 🍵', 9, 9, '农历九月初九，登高敬老'),
+    ('腊八节 🍲', 12, 8, '农历腊月初八，喝腊八粥'),
+    ('小年 🧹', 12, 23, '农历腊月二十三，扫尘祭灶'),
+    ('除夕 🎆', 12, -1, '农历年最后一天，守岁迎新年'),
 ]
 
-# 24 Solar Terms
+# 24 Solar Terms: (name, description), in calendar order from 小寒
 SOLAR_TERMS = [
-    ('立春', '2026-02-04', '春季开始，万物复苏'),
-    ('雨水', '2026-02-19', '降雨增多，气温回升'),
-    ('惊蛰', '2026-03-05', '春雷乍动，蛰虫惊醒'),
-    ('春分', '2026-03-20', '昼夜平分，春暖花开'),
-    ('清明', '2026-04-05', '天清地明，踏青祭祖'),
-    ('谷雨', '2026-04-20', '雨生百谷，春季最后节气'),
-    ('立夏', '2026-05-05', '夏季开始，万物生长'),
-    ('小满', '2026-05-21', '麦粒渐满，夏熟作物籽粒开始饱满'),
-    ('芒种', '2026-06-05', '有芒作物成熟，夏收夏种'),
-    ('夏至', '2026-06-21', '白昼最长，夏季过半'),
-    ('小暑', '2026-07-07', '天气开始炎热'),
-    ('大暑', '2026-07-22', '一年最热时期'),
-    ('立秋', '2026-08-07', '秋季开始，暑去凉来'),
-    ('处暑', '2026-08-23', '暑气渐消，秋高气爽'),
-    ('白露', '2026-09-07', '天气转凉，露凝而白'),
-    ('秋分', '2026-09-23', '昼夜平分，秋收时节'),
-    ('寒露', '2026-10-08', '露气寒冷，将凝结为霜'),
-    ('霜降', '2026-10-23', '天气渐冷，开始降霜'),
-    ('立冬', '2026-11-07', '冬季开始，万物收藏'),
-    ('小雪', '2026-11-22', '气温下降，开始下雪'),
-    ('大雪', '2026-12-07', '降雪增多，天气更冷'),
-    ('冬至', '2026-12-21', '白昼最短，数九寒天开始'),
-    ('小寒', '2027-01-05', '天气寒冷，尚未极冷'),
-    ('大寒', '2027-01-20', '一年最冷时期'),
+    ('小寒', '天气寒冷，尚未极冷'),
+    ('大寒', '一年最冷时期'),
+    ('立春', '春季开始，万物复苏'),
+    ('雨水', '降雨增多，气温回升'),
+    ('惊蛰', '春雷乍动，蛰虫惊醒'),
+    ('春分', '昼夜平分，春暖花开'),
+    ('清明', '天清地明，踏青祭祖'),
+    ('谷雨', '雨生百谷，春季最后节气'),
+    ('立夏', '夏季开始，万物生长'),
+    ('小满', '麦粒渐满，夏熟作物籽粒开始饱满'),
+    ('芒种', '有芒作物成熟，夏收夏种'),
+    ('夏至', '白昼最长，夏季过半'),
+    ('小暑', '天气开始炎热'),
+    ('大暑', '一年最热时期'),
+    ('立秋', '秋季开始，暑去凉来'),
+    ('处暑', '暑气渐消，秋高气爽'),
+    ('白露', '天气转凉，露凝而白'),
+    ('秋分', '昼夜平分，秋收时节'),
+    ('寒露', '露气寒冷，将凝结为霜'),
+    ('霜降', '天气渐冷，开始降霜'),
+    ('立冬', '冬季开始，万物收藏'),
+    ('小雪', '气温下降，开始下雪'),
+    ('大雪', '降雪增多，天气更冷'),
+    ('冬至', '白昼最短，数九寒天开始'),
 ]
 
 # International Holidays
@@ -0,0 +1,244 @@
+"""
+Precomputed Chinese calendar tables, 1900-2100.
+
+Generated by tools/build_lunar_tables.py; do not edit by hand.
+
+LUNAR_YEAR_INFO packs one lunar year per int (see utils.lunar.pack_lunar_year).
+SOLAR_TERM_DAYS holds the day of month of the 24 solar terms of each
+Gregorian year, in order from 小寒 to 冬至 (two terms per month).
+"""
+
+FIRST_YEAR = 1900
+
+LUNAR_YEAR_INFO = (
+    0x3d16d2, 0x620752, 0x4c0ea5, 0x38b64a, 0x5c064b, 0x440a9b, 0x30955a, 0x56056a,
+    0x400b59, 0x2a5752, 0x500752, 0x3adb25, 0x600b25, 0x480a4b, 0x32b4ab, 0x5802ad,
+    0x42056b, 0x2c4b69, 0x520da9, 0x3efd92, 0x640e92, 0x4c0d25, 0x36ba4d, 0x5c0a56,
+    0x4602b6, 0x2e95b5, 0x5606d4, 0x400ea9, 0x2c5e92, 0x500e92, 0x3acd26, 0x5e052b,
+    0x480a57, 0x32b2b6, 0x580b5a, 0x4406d4, 0x2e6ec9, 0x520749, 0x3cf693, 0x620a93,
+    0x4c052b, 0x34ca5b, 0x5a0aad, 0x46056a, 0x309b55, 0x560ba4, 0x400b49, 0x2a5a93,
+    0x500a95, 0x38f52d, 0x5e0536, 0x480aad, 0x34b5aa, 0x5805b2, 0x420da5, 0x2e7d4a,
+    0x540d4a, 0x3d0a95, 0x600a97, 0x4c0556, 0x36cab5, 0x5a0ad5, 0x4606d2, 0x308ea5,
+    0x560ea5, 0x40064a, 0x286c97, 0x4e0a9b, 0x3af55a, 0x5e056a, 0x480b69, 0x34b752,
+    0x5a0b52, 0x420b25, 0x2c964b, 0x520a4b, 0x3d14ab, 0x6002ad, 0x4a056d, 0x36cb69,
+    0x5c0da9, 0x460d92, 0x309d25, 0x560d25, 0x415a4d, 0x640a56, 0x4e02b6, 0x38c5b5,
+    0x5e06d5, 0x480ea9, 0x34be92, 0x5a0e92, 0x440d26, 0x2c6a56, 0x500a57, 0x3d14d6,
+    0x62035a, 0x4a06d5, 0x36b6c9, 0x5c0749, 0x460693, 0x2e952b, 0x54052b, 0x3e0a5b,
+    0x2a555a, 0x4e056a, 0x38fb55, 0x600ba4, 0x4a0b49, 0x32ba93, 0x580a95, 0x42052d,
+    0x2c8aad, 0x500ab5, 0x3d35aa, 0x6205d2, 0x4c0da5, 0x36dd4a, 0x5c0d4a, 0x460c95,
+    0x30952e, 0x540556, 0x3e0ab5, 0x2a55b2, 0x5006d2, 0x38cea5, 0x5e0725, 0x48064b,
+    0x32ac97, 0x560cab, 0x42055a, 0x2c6ad6, 0x520b69, 0x3d7752, 0x620b52, 0x4c0b25,
+    0x36da4b, 0x5a0a4b, 0x4404ab, 0x2ea55b, 0x5405ad, 0x3e0b6a, 0x2a5b52, 0x500d92,
+    0x3afd25, 0x5e0d25, 0x480a55, 0x32b4ad, 0x5804b6, 0x4005b5, 0x2c6daa, 0x520ec9,
+    0x3f1e92, 0x620e92, 0x4c0d26, 0x36ca56, 0x5a0a57, 0x440556, 0x2e86d5, 0x540755,
+    0x400749, 0x286e93, 0x4e0693, 0x38f52b, 0x5e052b, 0x460a5b, 0x32b55a, 0x58056a,
+    0x420b65, 0x2c974a, 0x520b4a, 0x3d1a95, 0x620a95, 0x4a052d, 0x34caad, 0x5a0ab5,
+    0x4605aa, 0x2e8ba5, 0x540da5, 0x400d4a, 0x2a7c95, 0x4e0c96, 0x38f94e, 0x5e0556,
+    0x480ab5, 0x32b5b2, 0x5806d2, 0x420ea5, 0x2e8e4a, 0x50068b, 0x3b0c97, 0x6004ab,
+    0x4a055b, 0x34cad6, 0x5a0b6a, 0x460752, 0x309725, 0x540b45, 0x3e0a8b, 0x28549b,
+    0x4e04ab,
+)
+
+SOLAR_TERM_DAYS = bytes.fromhex(
+    '061404130615051406150616071708170817091808170716'  # 1900
+    '061504130615051506160616081708180818091808170816'  # 1901
+    '061505130615061506160716081808180818091808170817'  # 1902
+    '061505140716061507160716081809180918091808170817'  # 1903
+    '071505140615051406150616071708170817091808170716'  # 1904
+    '061504130615051506160616081708180818091808170816'  # 1905
+    '061505130615061506160616081808180818091808170817'  # 1906
+    '061505140716061507160716081809180918091808170817'  # 1907
+    '071505140615051406150616071708170817091808170716'  # 1908
+    '061404130615051506160616081708180818091808170816'  # 1909
+    '061505130615061506160616081808180818091808170817'  # 1910
+    '061505140716061506160716081809180918091808170817'  # 1911
+    '061505140615051406150616071708170817081808160716'  # 1912
+    '061404130615051506160616081708180817091808170816'  # 1913
+    '061504130615051506160616081808180818091808170817'  # 1914
+    '061505140616061506160716081808180918091808170817'  # 1915
+    '061505140615051406150616071708170817081808160716'  # 1916
+    '061404130615051506150616081708180817091808170716'  # 1917
+    '061504130615051506160616081808180818091808170816'  # 1918
+    '061505140616061506160716081808180918091808170817'  # 1919
+    '061505140615051406150616071708170817081808160716'  # 1920
+    '061404130615051406150616081708180817091808170716'  # 1921
+    '061504130615051506160616081808180818091808170816'  # 1922
+    '061505130615061506160716081808180918091808170817'  # 1923
+    '061505140615051406150616071708170817081808160716'  # 1924
+    '061404130615051406150616081708180817091808170716'  # 1925
+    '061504130615051506160616081708180818091808170816'  # 1926
+    '061505130615061506160716081808180818091808170817'  # 1927
+    '061505140615051406150615071708170817081707160716'  # 1928
+    '061404130615051406150616071708170817091808170716'  # 1929
+    '061504130615051506160616081708180818091808170816'  # 1930
+    '061505130615061506160716081808180818091808170817'  # 1931
+    '061505140615051406150615071708170817081707160716'  # 1932
+    '061404130615051406150616071708170817091808170716'  # 1933
+    '061504130615051506160616081708180818091808170816'  # 1934
+    '061505130615061506160616081808180818091808170817'  # 1935
+    '061505140615051406150615071708170817081707160716'  # 1936
+    '061404130615051406150616071708170817091808170716'  # 1937
+    '061504130615051506160616081708180818091808170816'  # 1938
+    '061505130615061506160616081808180818091808170817'  # 1939
+    '061505140615051406150615071708170817081707160716'  # 1940
+    '061404130615051406150616071708170817091808170716'  # 1941
+    '061504130615051506160616081708180818091808170816'  # 1942
+    '061505130615061506160616081808180818091808170817'  # 1943
+    '061505140615051405150615071708170817081707160716'  # 1944
+    '061404130615051406150616071708170817081808160716'  # 1945
+    '061404130615051506160616081708180817091808170816'  # 1946
+    '061504130615051506160616081808180818091808170817'  # 1947
+    '061505140515051405150615071707170817081707160716'  # 1948
+    '051404130615051406150616071708170817081808160716'  # 1949
+    '061404130615051406150616081708180817091808170816'  # 1950
+    '061504130615051506160616081808180818091808170816'  # 1951
+    '061505140515051405150615071707170817081707160716'  # 1952
+    '051404130615051406150616071708170817081808160716'  # 1953
+    '061404130615051406150616081708180817091808170716'  # 1954
+    '061504130615051506160616081708180818091808170816'  # 1955
+    '061505140514051405150615071707170817081707160716'  # 1956
+    '051404130615051406150616071708170817081808160716'  # 1957
+    '061404130615051406150616071708170817091808170716'  # 1958
+    '061504130615051506160616081708180818091808170816'  # 1959
+    '061505130514051405150615071707170717081707160716'  # 1960
+    '051404130615051406150615071708170817081707160716'  # 1961
+    '061404130615051406150616071708170817091808170716'  # 1962
+    '061504130615051506160616081708180818091808170816'  # 1963
+    '061505130514051405150615071707170717081707160716'  # 1964
+    '051404130615051406150615071708170817081707160716'  # 1965
+    '061404130615051406150616071708170817091808170716'  # 1966
+    '061504130615051506160616081708180818091808170816'  # 1967
+    '061505130514051405150515071707170717081707160716'  # 1968
+    '051404130615051406150615071708170817081707160716'  # 1969
+    '061404130615051406150616071708170817091808170716'  # 1970
+    '061504130615051506160616081708180818091808170816'  # 1971
+    '061505130514051405150515071707170717081707160716'  # 1972
+    '051404130615051405150615071708170817081707160716'  # 1973
+    '061404130615051406150616071708170817091808170716'  # 1974
+    '061504130615051506160616081708180817091808170816'  # 1975
+    '061505130514041405150515071707170717081707160716'  # 1976
+    '051404130615051405150615071707170817081707160716'  # 1977
+    '061404130615051406150616071708170817081808170716'  # 1978
+    '061404130615051506150616081708180817091808170816'  # 1979
+    '061505130514041405150515071707170717081707160716'  # 1980
+    '051404130615051405150615071707170817081707160716'  # 1981
+    '061404130615051406150616071708170817081808160716'  # 1982
+    '061404130615051406150616081708180817091808170816'  # 1983
+    '061504130514041405150515071607170717081707160716'  # 1984
+    '051404130515051405150615071707170817081707160716'  # 1985
+    '051404130615051406150616071708170817081808160716'  # 1986
+    '061404130615051406150616071708180817091808170716'  # 1987
+    '061504130514041405150515071607170717081707160715'  # 1988
+    '051404130514051405150615071707170717081707160716'  # 1989
+    '051404130615051406150615071708170817081808160716'  # 1990
+    '061404130615051406150616071708170817091808170716'  # 1991
+    '061504130514041405150515071607170717081707160715'  # 1992
+    '051404120514051405150615071707170717081707160716'  # 1993
+    '051404130615051406150615071708170817081707160716'  # 1994
+    '061404130615051406150616071708170817091808170716'  # 1995
+    '061504130514041405150515071607170717081707160715'  # 1996
+    '051404120514051405150515071707170717081707160716'  # 1997
+    '051404130615051406150615071708170817081707160716'  # 1998
+    '061404130615051406150616071708170817091808170716'  # 1999
+    '061504130514041405150515071607170717081707160715'  # 2000
+    '051404120514051405150515071707170717081707160716'  # 2001
+    '051404130615051406150615071708170817081707160716'  # 2002
+    '061404130615051406150616071708170817091808170716'  # 2003
+    '061504130514041405150515071607170717081707160715'  # 2004
+    '051404120514051405150515071707170717081707160716'  # 2005
+    '051404130615051405150615071707170817081707160716'  # 2006
+    '061404130615051406150616071708170817091808170716'  # 2007
+    '061504130514041405150515071607170716081707160715'  # 2008
+    '051404120514041405150515071707170717081707160716'  # 2009
+    '051404130615051405150615071707170817081707160716'  # 2010
+    '061404130615051406150616071708170817081808170716'  # 2011
+    '061504130514041405140515071607170716081707160715'  # 2012
+    '051404120514041405150515071607170717081707160716'  # 2013
+    '051404130615051405150615071707170817081707160716'  # 2014
+    '061404130615051406150616071708170817081808160716'  # 2015
+    '061404130514041305140515071607170716081707160715'  # 2016
+    '051403120514041405150515071607170717081707160716'  # 2017
+    '051404130515051405150615071707170817081707160716'  # 2018
+    '051404130615051406150615071708170817081808160716'  # 2019
+    '061404130514041305140515061607160716081707160715'  # 2020
+    '051403120514041405150515071607170717081707160715'  # 2021
+    '051404130514051405150615071707170717081707160716'  # 2022
+    '051404130615051406150615071708170817081808160716'  # 2023
+    '061404130514041305140515061607160716081707160615'  # 2024
+    '051403120514041405150515071607170717081707160715'  # 2025
+    '051404120514051405150515071707170717081707160716'  # 2026
+    '051404130615051406150615071708170817081707160716'  # 2027
+    '061404130514041305140515061607160716081707160615'  # 2028
+    '051403120514041405150515071607170717081707160715'  # 2029
+    '051404120514051405150515071707170717081707160716'  # 2030
+    '051404130615051406150615071708170817081707160716'  # 2031
+    '061404130514041305140515061607160716081707160615'  # 2032
+    '051403120514041405150515071607170717081707160715'  # 2033
+    '051404120514051405150515071707170717081707160716'  # 2034
+    '051404130615051405150615071707170817081707160716'  # 2035
+    '061404130514041305140515061607160716081707160615'  # 2036
+    '051403120514041405150515071607170717081707160715'  # 2037
+    '051404120514051405150515071707170717081707160716'  # 2038
+    '051404130615051405150615071707170817081707160716'  # 2039
+    '061404130514041305140515061607160716081707160615'  # 2040
+    '051403120514041405140515071607170716081707160715'  # 2041
+    '051404120514041405150515071707170717081707160716'  # 2042
+    '051404130615051405150615071707170817081707160716'  # 2043
+    '061404130514041305140515061607160716071707160615'  # 2044
+    '051403120514041305140515071607170716081707160715'  # 2045
+    '051404120514041405150515071607170717081707160716'  # 2046
+    '051404130615051405150615071707170817081707160716'  # 2047
+    '061404130514041305140514061607160716071707150615'  # 2048
+    '051303120514041305140515061607160716081707160715'  # 2049
+    '051403120514041405150515071607170717081707160716'  # 2050
+    '051404130514051405150615071707170717081707160716'  # 2051
+    '051404130514041305140514061607160716071707150615'  # 2052
+    '051303120514041305140515061607160716081707160715'  # 2053
+    '051403120514041405150515071607170717081707160716'  # 2054
+    '051404130514051405150515071707170717081707160716'  # 2055
+    '051404130514041305140514061607160716071707150615'  # 2056
+    '051303120514041305140515061607160716081707160615'  # 2057
+    '051403120514041405150515071607170717081707160715'  # 2058
+    '051404130514051405150515071707170717081707160716'  # 2059
+    '051404130514041305140514061607160716071606150615'  # 2060
+    '051303120514041305140515061607160716081707160615'  # 2061
+    '051403120514041405150515071607170717081707160715'  # 2062
+    '051404120514051405150515071707170717081707160716'  # 2063
+    '051404130514041305140514061607160716071606150615'  # 2064
+    '051303120514041305140515061607160716081707160615'  # 2065
+    '051403120514041405150515071607170717081707160715'  # 2066
+    '051404120514051405150515071707170717081707160716'  # 2067
+    '051404130514041304140514061606160716071606150615'  # 2068
+    '051303120514041305140515061607160716081707160615'  # 2069
+    '051403120514041405140515071607170716081707160715'  # 2070
+    '051404120514051405150515071707170717081707160716'  # 2071
+    '051404130514041304140514061606160716071606150615'  # 2072
+    '051303120514041305140515061607160716071707160615'  # 2073
+    '051403120514041405140515071607170716081707160715'  # 2074
+    '051404120514041405150515071607170717081707160716'  # 2075
+    '051404130514041304140514061606160716071606150615'  # 2076
+    '051303120514041305140515061607160716071707160615'  # 2077
+    '051403120514041305140515061607170716081707160715'  # 2078
+    '051404120514041405150515071607170717081707160716'  # 2079
+    '051404130514041304140514061606160716071606150615'  # 2080
+    '051303120514041305140514061607160716071707150615'  # 2081
+    '051403120514041305140515061607160716081707160715'  # 2082
+    '051403120514041405150515071607170717081707160716'  # 2083
+    '051404130413041304140514061606160616071606150615'  # 2084
+    '041303120514041305140514061607160716071707150615'  # 2085
+    '051303120514041305140515061607160716081707160715'  # 2086
+    '051403120514041405150515071607170717081707160716'  # 2087
+    '051404130413041304140414061606160616071606150615'  # 2088
+    '041303120514041305140514061607160716071707150615'  # 2089
+    '051303120514041305140515061607160716081707160615'  # 2090
+    '051403120514041405150515071607170717081707160715'  # 2091
+    '051404130413041304140414061606160616071606150615'  # 2092
+    '041303120514041305140514061607160716071606150615'  # 2093
+    '051303120514041305140515061607160716081707160615'  # 2094
+    '051403120514041405150515071607170717081707160715'  # 2095
+    '051404120413041304140414061606160616071606150615'  # 2096
+    '041303120514041305140514061606160716071606150615'  # 2097
+    '051303120514041305140515061607160716081707160615'  # 2098
+    '051403120514041405150515071607170717081707160715'  # 2099
+    '051404120514051405150515071707170717081707160716'  # 2100
+)
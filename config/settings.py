@@ -2,16 +2,144 @@
 
 import os
 
-# Output directory for ICS files
-OUTPUT_DIR = 'static/ics'
+# Output directory for ICS files (generate.py --output-dir overrides it
+# at runtime; read it as settings.OUTPUT_DIR when writing)
+OUTPUT_DIR = os.environ.get('OUTPUT_DIR', 'static/ics')
 
 # Timezone
 TIMEZONE = 'Asia/Shanghai'
 
-# Weather API
-WEATHER_API_URL = 'https://api.open-meteo.com/v1/forecast'
+# Precompressed variants written next to each file ('br' needs the brotli package)
+PRECOMPRESS = ('gz', 'br')
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Lunar festivals and solar terms cover the current year plus this many
+# following years unless --from-year/--to-year are given
+CALENDAR_YEARS_AHEAD = 1
+
+# Years covered by the workday engine (utils/workdays.py); years without
+# PUBLIC_HOLIDAYS data follow the Monday-Friday week
+WORKDAY_YEARS = (1990, 2100)
+
+# Window, in days from today, that unbounded recurring events are expanded
+# over with --expand-recurrence
+RECURRENCE_EXPAND_DAYS = 84
+
+# Default length in days of date-windowed feeds (--from/--to, ?from=&to=)
+FEED_WINDOW_DAYS = 30
+# Longest window server.py renders on request
+FEED_WINDOW_MAX_DAYS = 3660
+
+# Daemon mode (generate.py --daemon): (min, max) seconds between refreshes
+# of each feed, by stage; every refresh picks a random delay in the range
+# so feeds spread out. Plugin stages without an entry use 'default'.
+REFRESH_INTERVALS = {
+    'weather': (3600, 10800),
+    'holidays': (86400, 86400),
+    'reminders': (21600, 21600),
+    'default': (21600, 21600),
+}
+# Upstream weather requests the daemon may start per hour, and at once
+DAEMON_WEATHER_REQUESTS_PER_HOUR = 60
+DAEMON_WEATHER_BURST = 10
+# Longest sleep between checks for due feeds and changed config files
+DAEMON_POLL_SECONDS = 30
+# Files whose modification restarts the daemon with the new configuration
+DAEMON_WATCH = [os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py')]
+
+# Extra generators: (name, stage, 'module:Class'), imported only when selected.
+# Installed packages can also register generators under the
+# 'cal.generators' entry point group.
+GENERATOR_PLUGINS = []
+
+# Generators run in parallel by generate.py (--jobs)
+GENERATE_JOBS = os.cpu_count() or 1
+
+# Run metrics written by generate.py (--metrics-json/--metrics-textfile);
+# point METRICS_TEXTFILE into node_exporter's textfile collector directory
+METRICS_JSON = os.environ.get('METRICS_JSON')
+METRICS_TEXTFILE = os.environ.get('METRICS_TEXTFILE')
+
+# Profiling (generate.py --profile, server.py /admin/profile): output
+# directory, allocation sites listed per phase, and call stacks cut below
+# this share of a phase's time in collapsed stack files
+PROFILE_DIR = 'profile'
+PROFILE_TOP_ALLOCATIONS = 25
+PROFILE_MIN_STACK_SHARE = 0.0005
+
+# ICS serializer backend: 'icalendar' (object model) or 'stream' (direct writer)
+ICS_SERIALIZER = os.environ.get('ICS_SERIALIZER', 'icalendar')
+
+# Cities whose weather feeds are generated and listed by default (keys of
+# config/cities.tsv); None uses the whole catalog. Any catalog city can be
+# selected with --cities or requested from server.py.
+WEATHER_CITIES = ['Beijing', 'Shanghai', 'Guangzhou', 'Shenzhen', 'Hangzhou', 'Ningbo', 'Chengdu', 'Wuhan']
+
+# Weather API (override WEATHER_API_URL to point at a local stub server)
+WEATHER_API_URL = os.environ.get('WEATHER_API_URL', 'https://api.open-meteo.com/v1/forecast')
 WEATHER_FORECAST_DAYS = 7
 
+# HTTP client: (connect, read) timeout in seconds and concurrent fetch limit
+WEATHER_TIMEOUT = (5, 20)
+WEATHER_MAX_WORKERS = 8
+
+# Retries after the first attempt, with full-jitter exponential backoff
+# between (base, cap) seconds; no attempt starts after the deadline
+WEATHER_RETRIES = 3
+WEATHER_RETRY_BACKOFF = (0.5, 8)
+WEATHER_DEADLINE = 60
+# Send a second, hedged request when one is slower than this percentile of
+# recent latencies to the same host (None disables hedging)
+WEATHER_HEDGE_PERCENTILE = float(os.environ['WEATHER_HEDGE_PERCENTILE']) if os.environ.get('WEATHER_HEDGE_PERCENTILE') else None
+WEATHER_HEDGE_MIN_SAMPLES = 20
+# Consecutive failures that open a host's circuit, and seconds until a trial request
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 60
+
+# Cities per batched Open-Meteo request (1 disables batching)
+WEATHER_BATCH_SIZE = 50
+
+# On-disk weather response cache
+WEATHER_CACHE_DIR = os.environ.get('WEATHER_CACHE_DIR', '.cache/weather')
+WEATHER_CACHE_TTL = 3600                  # seconds served without refetching
+WEATHER_CACHE_MAX_AGE = 7 * 24 * 3600     # entries older than this are evicted
+WEATHER_CACHE_MAX_BYTES = 50 * 1024 * 1024
+WEATHER_CACHE_PRECISION = 2               # decimal places coordinates are rounded to
+
+# Hourly weather feeds (--hourly): hours per event, and the edges at which
+# runs of hours are told apart by wind speed (km/h, one per Beaufort
+# level) and precipitation probability (%); hours with the same weather,
+# wind level and precipitation band merge into one event
+WEATHER_HOURLY_STEPS = (1, 3)
+WEATHER_BEAUFORT_KMH = (1, 6, 12, 20, 29, 39, 50, 62, 75, 89, 103, 118)
+WEATHER_PRECIPITATION_EDGES = (20, 50, 80)
+
+# Arbitrary-coordinate weather feeds are snapped to this grid (degrees)
+WEATHER_GRID_STEP = 0.1
+# ...and named after the nearest catalog city within this distance
+WEATHER_NEAREST_CITY_KM = 30
+
+# HTTP service (server.py): rendered feeds kept in memory, TTL per stage
+FEED_CACHE_SIZE = 256
+# Bearer token for server.py's /admin endpoints (unset disables them)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+# Most feeds one composite feed (a+b+c) may combine
+COMPOSITE_MAX_FEEDS = 16
+FEED_TTLS = {
+    'weather': 30 * 60,
+    'holidays': 24 * 3600,
+    'reminders': 3600,
+    # Stages without an entry (e.g. from plugin generators)
+    'default': 3600,
+}
+# CalDAV collections (/caldav/<feed>/): removed events remembered per
+# collection for sync-collection; clients holding an older sync token
+# than the oldest forgotten removal resync from scratch
+CALDAV_TOMBSTONES = 4096
+# Largest PROPFIND/REPORT request body accepted (bytes)
+CALDAV_MAX_REQUEST_BYTES = 64 * 1024
+
 # Weather code to description mapping
 WEATHER_CODE_MAP = {
     0: '☀️ 晴天', 1: '🌤️ 晴朗', 2: '⛅ 多云', 3: '☁️ 阴天',
@@ -22,6 +150,3 @@ WEATHER_CODE_MAP = {
     80: '🌦️ 阵雨', 81: '⛈️ 强阵雨', 82: '⛈️ 暴雨',
     95: '⛈️ 雷暴', 96: '⛈️ 冰雹', 99: '⛈️ 强雷暴'
 }
-
-# Ensure output directory exists
-os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -4,83 +4,507 @@ Calendar Subscription Service Generator
 Generate various ICS calendar files for subscription.
 """
 
+import os
 import sys
+import time
+import signal
 import argparse
-from generators import (
-    WeatherGenerator,
-    HolidaysGenerator,
-    LunarFestivalsGenerator,
-    SolarTermsGenerator,
-    InternationalHolidaysGenerator,
-    CountdownGenerator,
-    WeeklyReminderGenerator,
-    HealthRemindersGenerator,
-    FinancialCalendarGenerator,
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from generators import get_generators, run_generator
+from generators.feeds import weather_cities
+from config import CITIES, settings
+from config.settings import (
+    WEATHER_MAX_WORKERS,
+    WEATHER_BATCH_SIZE,
+    WEATHER_CACHE_TTL,
+    WEATHER_HOURLY_STEPS,
+    GENERATE_JOBS,
+    CALENDAR_YEARS_AHEAD,
+    FEED_WINDOW_DAYS,
+    METRICS_JSON,
+    METRICS_TEXTFILE,
+    PROFILE_DIR,
+    REFRESH_INTERVALS,
+    DAEMON_WEATHER_REQUESTS_PER_HOUR,
+    DAEMON_WEATHER_BURST,
+    DAEMON_POLL_SECONDS,
+    DAEMON_WATCH,
 )
-from config import CITIES
+from utils.scheduler import Task, run_tasks, print_summary
+from utils.metrics import metrics
 
 
-def generate_weather_calendars(cities=None):
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most size items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def generate_weather_calendars(cities=None, workers=WEATHER_MAX_WORKERS,
+                               batch_size=WEATHER_BATCH_SIZE, offline=False, refresh=False,
+                               session=None, cache=None, step=None):
     """
     Generate weather calendars for specified cities.
     
+    Cities are split into chunks of batch_size, each chunk is fetched with
+    one multi-location request, and chunks run concurrently on a bounded
+    thread pool sharing one pooled HTTP session. The stage therefore takes
+    roughly as long as the slowest single request. Forecasts still fresh
+    in the on-disk cache are not requested at all.
+    
     Args:
-        cities: List of city keys, or None for all cities
+        cities: List of city keys, or None for the default cities (WEATHER_CITIES)
+        workers: Maximum number of concurrent requests
+        batch_size: Cities per request (1 fetches each city separately)
+        offline: Replay cached forecasts only, never hit the network
+        refresh: Ignore cached forecasts and refetch them
+        session: Shared requests.Session to reuse (default: a new one,
+            closed when done)
+        cache: Weather ResponseCache to reuse (default: a new one per
+            offline/refresh)
+        step: Hours per event for hourly feeds (None for daily feeds)
+        
+    Returns:
+        Dict mapping city key to True if its calendar was generated
     """
+    # Imported here so --help and the other stages do not load requests
+    from generators.weather import (
+        WeatherGenerator,
+        create_weather_cache,
+        fetch_weather_batch,
+        forecast_section,
+    )
+    from utils.http import create_session
+    
     if cities is None:
-        cities = list(CITIES.keys())
+        cities = weather_cities()
     
     print(f"\n📍 Generating weather calendars for {len(cities)} cities...")
     
-    generator = WeatherGenerator()
-    for city in cities:
-        generator.generate_and_save(city)
+    chunks = chunked(cities, max(1, batch_size))
+    workers = max(1, min(workers, len(chunks)))
+    own_session = session is None
+    if own_session:
+        session = create_session(workers)
+    if cache is None:
+        cache = create_weather_cache(ttl=0 if refresh else WEATHER_CACHE_TTL, offline=offline)
+    
+    def generate_chunk(chunk):
+        if len(chunk) == 1:
+            generator = WeatherGenerator(chunk[0], session=session, cache=cache, step=step)
+            return {chunk[0]: generator.generate_and_save(chunk[0])}
+        
+        try:
+            forecasts = fetch_weather_batch(chunk, session=session, cache=cache,
+                                            section=forecast_section(step))
+        except Exception as e:
+            print(f"❌ Error fetching weather for {', '.join(chunk)}: {e}")
+            return dict.fromkeys(chunk, False)
+        
+        return {
+            city: WeatherGenerator(city, session=session, cache=cache, step=step)
+            .generate_and_save(city, forecasts[city])
+            for city in chunk
+        }
+    
+    results = {}
+    with (session if own_session else nullcontext()), ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk_results in pool.map(generate_chunk, chunks):
+            results.update(chunk_results)
+    
+    cache.prune()
+    return results
 
 
-def generate_holiday_calendars():
-    """Generate all holiday-related calendars."""
-    print("\n🎊 Generating holiday calendars...")
+def generate_location_calendars(queries, workers=WEATHER_MAX_WORKERS,
+                                batch_size=WEATHER_BATCH_SIZE, offline=False, refresh=False,
+                                step=None):
+    """
+    Generate weather calendars for arbitrary coordinates or city names.
+    
+    Each query is snapped to the WEATHER_GRID_STEP grid and duplicates are
+    merged, so upstream requests scale with distinct grid cells rather
+    than with the number of queries.
+    
+    Args:
+        queries: List of 'lat,lon' strings or city names
+        workers: Maximum number of concurrent requests
+        batch_size: Locations per request
+        offline: Replay cached forecasts only, never hit the network
+        refresh: Ignore cached forecasts and refetch them
+        step: Hours per event for hourly feeds (None for daily feeds)
+        
+    Returns:
+        Dict mapping grid cell key to True if its calendar was generated
+    """
+    from generators.weather import (
+        WeatherGenerator,
+        create_weather_cache,
+        forecast_section,
+        request_forecasts,
+        resolve_location,
+    )
+    from utils.http import create_session
+    
+    locations = {}
+    for query in queries:
+        location = resolve_location(query)
+        locations.setdefault(location['key'], location)
+    
+    print(f"\n📍 Generating weather calendars for {len(locations)} grid cells...")
+    
+    chunks = chunked(list(locations.values()), max(1, batch_size))
+    workers = max(1, min(workers, len(chunks)))
+    session = create_session(workers)
+    cache = create_weather_cache(ttl=0 if refresh else WEATHER_CACHE_TTL, offline=offline)
+    
+    def generate_chunk(chunk):
+        try:
+            forecasts = request_forecasts(session, chunk, cache=cache, section=forecast_section(step))
+        except Exception as e:
+            print(f"❌ Error fetching weather for {', '.join(loc['name'] for loc in chunk)}: {e}")
+            return {location['key']: False for location in chunk}
+        
+        results = {}
+        for location, daily_data in zip(chunk, forecasts):
+            generator = WeatherGenerator(location=location, session=session, cache=cache, step=step)
+            results[location['key']] = generator.generate(daily_data)
+            if results[location['key']]:
+                generator.save(generator.filename)
+        return results
     
-    HolidaysGenerator().generate()
-    LunarFestivalsGenerator().generate()
-    SolarTermsGenerator().generate()
-    InternationalHolidaysGenerator().generate()
+    results = {}
+    with session, ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk_results in pool.map(generate_chunk, chunks):
+            results.update(chunk_results)
+    
+    cache.prune()
+    return results
 
 
-def generate_reminder_calendars():
-    """Generate all reminder calendars."""
-    print("\n⏰ Generating reminder calendars...")
+def run_weather_stage(weather_options):
+    """
+    Run the weather stage as one scheduler task.
+    
+    Cities that fail are reported but don't fail the run, so the feeds
+    that did succeed are still deployed.
+    
+    Returns:
+        Description of the failed cities for the summary, or None
+        
+    Raises:
+        RuntimeError: If every city failed
+    """
+    options = dict(weather_options)
+    locations = options.pop('locations', None)
+    cities = options.pop('cities', None)
+    if locations:
+        results = generate_location_calendars(locations, **options)
+    else:
+        results = generate_weather_calendars(cities, **options)
+    failed = [city for city, ok in results.items() if not ok]
+    if not failed:
+        return None
+    message = f"weather failed for {len(failed)}/{len(results)} cities: {', '.join(failed)}"
+    if len(failed) == len(results):
+        raise RuntimeError(message)
+    return message
+
+
+def weather_feeds(weather_options):
+    """
+    Map the weather feeds of a run to their city keys or location queries.
+    
+    Args:
+        weather_options: Keyword arguments for generate_weather_calendars
+            ('cities' or 'locations')
+        
+    Returns:
+        Dict of feed name (e.g. 'weather_Ningbo') to city key or location query
+    """
+    locations = weather_options.get('locations')
+    if locations:
+        from generators.weather import resolve_location
+        
+        return {f"weather_{resolve_location(query)['key']}": query for query in locations}
+    return {f'weather_{city}': city for city in weather_options.get('cities') or weather_cities()}
+
+
+def planned_feeds(stages, weather_options=None):
+    """
+    List the feeds a run of these stages generates, before sharding.
+    
+    Feeds are named by output file without extension; hourly and windowed
+    variants share the name of their feed.
+    
+    Returns:
+        List of feed names
+    """
+    feeds = []
+    for stage in stages:
+        if stage == 'weather':
+            feeds += list(weather_feeds(weather_options or {}))
+        else:
+            feeds += [spec.name for spec in get_generators(stage)]
+    return feeds
+
+
+def stage_tasks(stage, weather_options=None, generator_options=None, shard=None):
+    """
+    Build scheduler tasks for a stage.
+    
+    The weather stage is I/O-bound and runs on a thread; every registered
+    holiday/reminder generator is a separate CPU-bound task.
+    
+    Args:
+        stage: 'weather', 'holidays' or 'reminders'
+        weather_options: Keyword arguments for generate_weather_calendars
+        generator_options: Keyword arguments for generators that accept them
+            (e.g. from_year/to_year)
+        shard: Only run the feeds assigned to this Shard (utils/sharding.py)
+        
+    Returns:
+        List of Task
+    """
+    if stage == 'weather':
+        weather_options = dict(weather_options or {})
+        if shard:
+            owned = [target for feed, target in weather_feeds(weather_options).items() if shard.owns(feed)]
+            if not owned:
+                return []
+            weather_options['locations' if weather_options.get('locations') else 'cities'] = owned
+        return [Task('weather', run_weather_stage, (weather_options,), 'io')]
+    return [
+        Task(spec.name, run_generator, (spec.name, generator_options), 'cpu')
+        for spec in get_generators(stage)
+        if shard is None or shard.owns(spec.name)
+    ]
+
+
+def generate_holiday_calendars(jobs=GENERATE_JOBS, generator_options=None, shard=None):
+    """
+    Generate all holiday-related calendars.
+    
+    Returns:
+        List of TaskResult
+    """
+    print("\n🎊 Generating holiday calendars...")
+    return run_tasks(stage_tasks('holidays', generator_options=generator_options, shard=shard), jobs)
+
+
+def generate_reminder_calendars(jobs=GENERATE_JOBS, generator_options=None, shard=None):
+    """
+    Generate all reminder calendars.
     
-    CountdownGenerator().generate()
-    WeeklyReminderGenerator().generate()
-    HealthRemindersGenerator().generate()
-    FinancialCalendarGenerator().generate()
+    Returns:
+        List of TaskResult
+    """
+    print("\n⏰ Generating reminder calendars...")
+    return run_tasks(stage_tasks('reminders', generator_options=generator_options, shard=shard), jobs)
 
 
-def generate_all():
-    """Generate all calendars."""
+def generate_all(jobs=GENERATE_JOBS, generator_options=None, shard=None, **weather_options):
+    """
+    Generate all calendars.
+    
+    Independent generators run in parallel; a failing generator is reported
+    in the summary without stopping the others.
+    
+    Args:
+        jobs: Degree of parallelism
+        generator_options: Keyword arguments for generators that accept them
+        shard: Only generate the feeds assigned to this Shard
+        **weather_options: Keyword arguments for generate_weather_calendars
+        
+    Returns:
+        List of TaskResult
+    """
     print("=" * 60)
     print("🗓️  Calendar Subscription Service Generator")
     print("=" * 60)
     
+    tasks = []
+    for stage in ('weather', 'holidays', 'reminders'):
+        tasks += stage_tasks(stage, weather_options, generator_options, shard)
+    results = run_tasks(tasks, jobs)
+    
+    print("\n" + "=" * 60)
+    if all(result.ok for result in results):
+        print("✅ All ICS files generated successfully!")
+    else:
+        print("❌ Some calendars failed to generate")
+    print("=" * 60)
+    
+    return results
+
+
+def output_mtime(filename):
+    """Return an output file's modification time, or None if it does not exist."""
     try:
-        generate_weather_calendars()
-        generate_holiday_calendars()
-        generate_reminder_calendars()
+        return os.path.getmtime(os.path.join(settings.OUTPUT_DIR, filename))
+    except OSError:
+        return None
+
+
+def run_daemon(stages, weather_options=None, generator_options=None, stop=None,
+               metrics_json=METRICS_JSON, metrics_textfile=METRICS_TEXTFILE):
+    """
+    Keep feeds fresh, refreshing each one only when it is stale.
+    
+    Each feed is scheduled from its stage's REFRESH_INTERVALS policy with
+    jitter, starting from its output file's age. Generators run in this
+    process, so lunar tables and other caches stay warm, and weather
+    feeds share one HTTP session and forecast cache. Upstream weather
+    requests are rate limited; feeds over the limit are deferred. When a
+    file matched by DAEMON_WATCH changes, the loop stops so the caller
+    can restart with the new configuration.
+    
+    Args:
+        stages: Stages to keep fresh ('weather', 'holidays', 'reminders')
+        weather_options: Keyword arguments for generate_weather_calendars
+        generator_options: Keyword arguments for generators that accept them
+        stop: threading.Event that ends the loop when set
+        metrics_json: Metrics JSON path rewritten after each refresh (optional)
+        metrics_textfile: Prometheus textfile path rewritten after each refresh (optional)
         
-        print("\n" + "=" * 60)
-        print("✅ All ICS files generated successfully!")
-        print("=" * 60)
+    Returns:
+        True if the configuration changed, False if stopped
+    """
+    from generators.weather import create_weather_cache
+    from utils.http import create_session
+    from utils.calendar_helper import windowed_filename
+    from utils.refresh import RefreshScheduler, TokenBucket, config_fingerprint
+    
+    weather_options = dict(weather_options or {})
+    generator_options = generator_options or {}
+    stop = stop or threading.Event()
+    window = generator_options.get('window')
+    
+    def feed_filename(name):
+        filename = f'{name}.ics'
+        return windowed_filename(filename, *window) if window else filename
+    
+    step = weather_options.get('step')
+    scheduler = RefreshScheduler(REFRESH_INTERVALS)
+    if 'weather' in stages:
+        suffix = f'_{step}h' if step else ''
+        for city in weather_options.pop('cities', None) or weather_cities():
+            scheduler.add(f'weather_{city}', 'weather', output_mtime(f'weather_{city}{suffix}.ics'))
+    for stage in stages:
+        if stage != 'weather':
+            for spec in get_generators(stage):
+                scheduler.add(spec.name, stage, output_mtime(feed_filename(spec.name)))
+    
+    limiter = TokenBucket(DAEMON_WEATHER_REQUESTS_PER_HOUR / 3600, DAEMON_WEATHER_BURST)
+    workers = weather_options.get('workers', WEATHER_MAX_WORKERS)
+    batch_size = max(1, weather_options.get('batch_size', WEATHER_BATCH_SIZE))
+    session = create_session(workers)
+    cache = create_weather_cache(offline=weather_options.get('offline', False))
+    fingerprint = config_fingerprint(DAEMON_WATCH)
+    
+    print(f"🔁 Daemon started: keeping {len(scheduler.feeds)} feeds fresh")
+    with session:
+        while not stop.is_set():
+            if config_fingerprint(DAEMON_WATCH) != fingerprint:
+                print("🔧 Configuration changed")
+                return True
+            
+            due = scheduler.due()
+            refreshed = bool(due)
+            weather_due = [feed.name for feed in due if feed.stage == 'weather']
+            for feed in due:
+                if feed.stage == 'weather':
+                    continue
+                try:
+                    run_generator(feed.name, generator_options)
+                    scheduler.done(feed.name, True)
+                except Exception as e:
+                    print(f"❌ {feed.name} failed: {e}")
+                    scheduler.done(feed.name, False)
+            
+            if weather_due:
+                # One upstream request per chunk; defer what the limit does not allow
+                chunks = chunked(weather_due, batch_size)
+                granted = limiter.take(len(chunks))
+                allowed = [name for chunk in chunks[:granted] for name in chunk]
+                for name in weather_due[len(allowed):]:
+                    scheduler.defer(name, limiter.wait_time())
+                if allowed:
+                    results = generate_weather_calendars(
+                        [name[len('weather_'):] for name in allowed], workers=workers,
+                        batch_size=batch_size, session=session, cache=cache, step=step,
+                    )
+                    for city, ok in results.items():
+                        scheduler.done(f'weather_{city}', ok)
+            
+            if refreshed:
+                write_metrics(metrics_json, metrics_textfile)
+                wakeup = scheduler.next_due()
+                print(f"💤 Next refresh in {max(0, wakeup - time.time()):.0f}s")
+            stop.wait(min(max(1.0, scheduler.next_due() - time.time()), DAEMON_POLL_SECONDS))
+    return False
+
+
+def write_metrics(json_path=METRICS_JSON, textfile_path=METRICS_TEXTFILE):
+    """
+    Write the run metrics collected so far.
+    
+    Args:
+        json_path: JSON output path (skipped if None)
+        textfile_path: Prometheus textfile output path (skipped if None)
+    """
+    if json_path:
+        metrics.write_json(json_path)
+        print(f"📊 Metrics written to {json_path}")
+    if textfile_path:
+        metrics.write_prometheus(textfile_path)
+        print(f"📊 Metrics written to {textfile_path}")
+
+
+def write_profile(directory):
+    """
+    Stop profiling and write the collected reports (see utils/profiling.py).
+    
+    Args:
+        directory: Output directory
+    """
+    from utils.profiling import profiler
+    
+    profiler.stop()
+    paths = profiler.write(directory)
+    print(f"🔬 {len(paths)} profile files written to {directory}")
+
+
+def merge_outputs(directories):
+    """
+    Merge sharded outputs into the output directory (see utils/sharding.py).
+    
+    Args:
+        directories: Output directories of the shards
         
-    except Exception as e:
-        print(f"\n❌ Error during generation: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    Returns:
+        Number of problems found
+    """
+    from utils.sharding import merge_shards
+    
+    copied, problems = merge_shards(directories)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        print(f"❌ Merge into {settings.OUTPUT_DIR} found {len(problems)} problems")
+    else:
+        print(f"🧩 Shards merged into {settings.OUTPUT_DIR}: {copied} files updated")
+    return len(problems)
 
 
 def main():
-    """Main entry point with command line argument support."""
+    """
+    Main entry point with command line argument support.
+    
+    Returns:
+        Number of failed tasks
+    """
     parser = argparse.ArgumentParser(
         description='Generate ICS calendar files for subscription service'
     )
@@ -95,26 +519,285 @@ def main():
     parser.add_argument(
         '--cities',
         nargs='+',
-        choices=list(CITIES.keys()),
-        help='Cities for weather calendars (default: all)'
+        metavar='CITY',
+        help='Cities for weather calendars: keys, Chinese names or aliases from '
+             'config/cities.tsv, or "all" for the whole catalog (default: WEATHER_CITIES)'
+    )
+    
+    parser.add_argument(
+        '--locations',
+        nargs='+',
+        metavar='LAT,LON|CITY',
+        help='Weather calendars for arbitrary coordinates or city names, '
+             'snapped to a grid (replaces --cities)'
+    )
+    
+    parser.add_argument(
+        '--hourly',
+        type=int,
+        choices=WEATHER_HOURLY_STEPS,
+        metavar='HOURS',
+        help='Hourly weather feeds instead of daily ones: timed events in steps of '
+             f"{' or '.join(map(str, WEATHER_HOURLY_STEPS))} hours, runs of unchanged "
+             'weather merged into one event'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=WEATHER_MAX_WORKERS,
+        help=f'Concurrent weather requests (default: {WEATHER_MAX_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=WEATHER_BATCH_SIZE,
+        help=f'Cities per weather request, 1 disables batching (default: {WEATHER_BATCH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Replay cached weather forecasts only, without network access'
+    )
+    
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Ignore cached weather forecasts and refetch them'
+    )
+    
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=GENERATE_JOBS,
+        help=f'Generators run in parallel (default: {GENERATE_JOBS})'
+    )
+    
+    parser.add_argument(
+        '--from-year',
+        type=int,
+        help='First year of lunar festivals and solar terms (default: current year)'
+    )
+    
+    parser.add_argument(
+        '--to-year',
+        type=int,
+        help=f'Last year of lunar festivals and solar terms '
+             f'(default: from-year + {CALENDAR_YEARS_AHEAD})'
+    )
+    
+    parser.add_argument(
+        '--expand-recurrence',
+        action='store_true',
+        help='Write every occurrence of recurring reminders as a separate event '
+             'instead of an RRULE, for clients without recurrence support'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Write holiday and reminder events to disk as they are generated '
+             'instead of collecting them first, keeping memory flat for very large calendars'
+    )
+    
+    parser.add_argument(
+        '--from',
+        dest='window_from',
+        metavar='YYYY-MM-DD',
+        help='Write holiday and reminder feeds trimmed to events from this day '
+             '(default with --to/--days: today)'
+    )
+    
+    parser.add_argument(
+        '--to',
+        dest='window_to',
+        metavar='YYYY-MM-DD',
+        help='Last day of trimmed feeds, inclusive'
+    )
+    
+    parser.add_argument(
+        '--days',
+        type=int,
+        help=f'Length of trimmed feeds when --to is not given (default: {FEED_WINDOW_DAYS})'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep running and refresh each feed when it goes stale '
+             '(see REFRESH_INTERVALS in config/settings.py)'
+    )
+    
+    parser.add_argument(
+        '--metrics-json',
+        default=METRICS_JSON,
+        metavar='PATH',
+        help='Write per-generator timings, sizes and HTTP latency as JSON'
+    )
+    
+    parser.add_argument(
+        '--metrics-textfile',
+        default=METRICS_TEXTFILE,
+        metavar='PATH',
+        help='Write the same metrics in Prometheus textfile format (e.g. for node_exporter)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const=PROFILE_DIR,
+        metavar='DIR',
+        help='Profile each generator with cProfile and tracemalloc, split into build '
+             '(add_event), serialize (to_ical) and write phases, and save .pstats files, '
+             f'collapsed stacks for flamegraphs and allocation reports to DIR (default: {PROFILE_DIR}); '
+             'generators run one at a time'
+    )
+    
+    parser.add_argument(
+        '--shard',
+        metavar='I/N',
+        help='Generate only the feeds assigned to shard I of N (1-based) by a stable hash '
+             'of the feed name, and write a partial manifest for --merge'
+    )
+    
+    parser.add_argument(
+        '--merge',
+        nargs='+',
+        metavar='DIR',
+        help='Validate the outputs of all shards in these directories and merge them '
+             'into the output directory, then exit'
+    )
+    
+    parser.add_argument(
+        '--output-dir',
+        metavar='DIR',
+        help=f'Write (or merge) calendars into DIR instead of {settings.OUTPUT_DIR}'
     )
     
     args = parser.parse_args()
+    if args.output_dir:
+        # Also exported, for worker processes that re-import the settings
+        settings.OUTPUT_DIR = os.environ['OUTPUT_DIR'] = args.output_dir
+    if args.merge:
+        return merge_outputs(args.merge)
+    shard = None
+    if args.shard:
+        from utils.sharding import Shard
+        
+        try:
+            shard = Shard.parse(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.from_year is not None and args.to_year is not None and args.to_year < args.from_year:
+        parser.error('--to-year must not be before --from-year')
+    generator_options = {
+        'from_year': args.from_year,
+        'to_year': args.to_year,
+        'expand_recurrence': args.expand_recurrence,
+        'streaming': args.stream,
+    }
+    if args.window_from or args.window_to or args.days:
+        from utils.calendar_helper import resolve_window
+        
+        try:
+            window = resolve_window(args.window_from, args.window_to, args.days)
+        except ValueError as e:
+            parser.error(str(e))
+        # Cover the window with lunar festivals and solar terms
+        generator_options.update(
+            window=window,
+            from_year=args.from_year or window[0].year,
+            to_year=args.to_year or window[1].year,
+        )
+    cities = args.cities
+    if cities == ['all']:
+        cities = list(CITIES)
+    elif cities:
+        keys = [CITIES.find(city) for city in cities]
+        unknown = [city for city, key in zip(cities, keys) if key is None]
+        if unknown:
+            parser.error(f"unknown cities: {', '.join(unknown)} (see config/cities.tsv)")
+        cities = list(dict.fromkeys(keys))
+    if args.profile:
+        from utils.profiling import profiler
+        
+        profiler.start()
+        args.jobs = 1
+    
+    weather_options = {
+        'cities': cities,
+        'locations': args.locations,
+        'workers': args.workers,
+        'batch_size': args.batch_size,
+        'offline': args.offline,
+        'refresh': args.refresh,
+        'step': args.hourly,
+    }
+    
+    stages = ['weather', 'holidays', 'reminders'] if args.type == 'all' else [args.type]
+    if args.daemon:
+        if args.locations:
+            parser.error('--locations is not supported with --daemon')
+        if shard:
+            parser.error('--shard is not supported with --daemon')
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        try:
+            changed = run_daemon(stages, weather_options, generator_options, stop,
+                                 args.metrics_json, args.metrics_textfile)
+        except KeyboardInterrupt:
+            changed = False
+        if args.profile:
+            write_profile(args.profile)
+        if changed:
+            # Start over so the new configuration is imported
+            print("🔁 Restarting")
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+        print("👋 Daemon stopped")
+        return 0
     
     if args.type == 'all':
-        generate_all()
+        results = generate_all(args.jobs, generator_options, shard, **weather_options)
     elif args.type == 'weather':
-        generate_weather_calendars(args.cities)
+        results = run_tasks(stage_tasks('weather', weather_options, shard=shard), args.jobs)
     elif args.type == 'holidays':
-        generate_holiday_calendars()
+        results = generate_holiday_calendars(args.jobs, generator_options, shard)
     elif args.type == 'reminders':
-        generate_reminder_calendars()
+        results = generate_reminder_calendars(args.jobs, generator_options, shard)
+    
+    if shard:
+        from utils.sharding import write_partial_manifest
+        
+        window = generator_options.get('window')
+        # Options that change the output; every shard of a run must agree on them
+        run_options = {
+            'type': args.type,
+            'hourly': args.hourly,
+            'from_year': generator_options['from_year'],
+            'to_year': generator_options['to_year'],
+            'expand_recurrence': args.expand_recurrence,
+            'window': [day.isoformat() for day in window] if window else None,
+        }
+        feeds = planned_feeds(stages, weather_options)
+        path = write_partial_manifest(shard, feeds, [result.name for result in results if not result.ok],
+                                      run_options)
+        owned = sum(shard.owns(feed) for feed in feeds)
+        print(f"🧩 Shard {shard}: {owned}/{len(feeds)} feeds, partial manifest written to {path}")
+    
+    write_metrics(args.metrics_json, args.metrics_textfile)
+    if args.profile:
+        write_profile(args.profile)
+    return print_summary(results)
 
 
 if __name__ == '__main__':
     if len(sys.argv) == 1:
         # No arguments provided, generate all
-        generate_all()
+        results = generate_all()
+        write_metrics()
+        sys.exit(1 if print_summary(results) else 0)
     else:
         # Parse command line arguments
-        main()
+        sys.exit(1 if main() else 0)
@@ -1,27 +1,37 @@
-"""Calendar generators module."""
+"""
+Calendar generators module.
 
-from .weather import WeatherGenerator
-from .holidays import (
-    HolidaysGenerator,
-    LunarFestivalsGenerator,
-    SolarTermsGenerator,
-    InternationalHolidaysGenerator,
-)
-from .reminders import (
-    CountdownGenerator,
-    WeeklyReminderGenerator,
-    HealthRemindersGenerator,
-    FinancialCalendarGenerator,
-)
+Names are resolved on first access (PEP 562), so importing the package
+does not import every generator and its dependencies.
+"""
 
-__all__ = [
-    'WeatherGenerator',
-    'HolidaysGenerator',
-    'LunarFestivalsGenerator',
-    'SolarTermsGenerator',
-    'InternationalHolidaysGenerator',
-    'CountdownGenerator',
-    'WeeklyReminderGenerator',
-    'HealthRemindersGenerator',
-    'FinancialCalendarGenerator',
-]
+import importlib
+
+from .registry import register, get_generators, run_generator
+
+_LAZY_ATTRS = {
+    'WeatherGenerator': '.weather',
+    'fetch_weather_batch': '.weather',
+    'create_weather_cache': '.weather',
+    'resolve_location': '.weather',
+    'make_location': '.weather',
+    'HolidaysGenerator': '.holidays',
+    'AdjustedWorkdaysGenerator': '.holidays',
+    'LunarFestivalsGenerator': '.holidays',
+    'SolarTermsGenerator': '.holidays',
+    'InternationalHolidaysGenerator': '.holidays',
+    'CountdownGenerator': '.reminders',
+    'WeeklyReminderGenerator': '.reminders',
+    'HealthRemindersGenerator': '.reminders',
+    'FinancialCalendarGenerator': '.reminders',
+}
+
+__all__ = ['register', 'get_generators', 'run_generator', *_LAZY_ATTRS]
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,96 @@
+"""Feed catalog: every servable calendar by name."""
+
+from config import CITIES
+from config.settings import WEATHER_CITIES, WEATHER_HOURLY_STEPS
+from utils.metrics import metrics
+from .registry import get_generators, get_spec, create_generator
+
+WEATHER_PREFIX = 'weather_'
+
+
+def weather_cities():
+    """Keys of the cities whose weather feeds are generated and listed by default."""
+    return list(CITIES) if WEATHER_CITIES is None else list(WEATHER_CITIES)
+
+
+def list_feeds():
+    """
+    List the default feed names (output filenames without .ics).
+
+    Weather feeds of other catalog cities, and hourly weather feeds, are
+    servable but not listed.
+
+    Returns:
+        List of feed names, weather feeds first
+    """
+    return [f'{WEATHER_PREFIX}{city}' for city in weather_cities()] + [spec.name for spec in get_generators()]
+
+
+def parse_weather_feed(name):
+    """
+    Split a weather feed name into city key and hourly step.
+
+    weather_Ningbo is the daily feed, weather_Ningbo_1h and weather_Ningbo_3h
+    the hourly feeds (see WEATHER_HOURLY_STEPS).
+
+    Returns:
+        (city key, step or None), or None if name is not a weather feed
+    """
+    if not name.startswith(WEATHER_PREFIX):
+        return None
+    city = name[len(WEATHER_PREFIX):]
+    if city in CITIES:
+        return city, None
+    city, _, suffix = city.rpartition('_')
+    for step in WEATHER_HOURLY_STEPS:
+        if suffix == f'{step}h' and city in CITIES:
+            return city, step
+    return None
+
+
+def feed_stage(name):
+    """
+    Return the stage of a feed ('weather', 'holidays', 'reminders').
+
+    Raises:
+        KeyError: If the feed does not exist
+    """
+    if parse_weather_feed(name):
+        return 'weather'
+    return get_spec(name).stage
+
+
+def build_feed(name, session=None, cache=None, options=None):
+    """
+    Build a feed's calendar in memory, without saving it.
+
+    Args:
+        name: Feed name from list_feeds()
+        session: Shared requests.Session for weather feeds
+        cache: Weather ResponseCache for weather feeds
+        options: Keyword arguments for generators that accept them, and
+            'window' to trim the feed to a (first, last) date range
+
+    Returns:
+        Built BaseCalendarGenerator
+
+    Raises:
+        KeyError: If the feed does not exist
+        RuntimeError: If a weather forecast could not be fetched
+    """
+    weather = parse_weather_feed(name)
+    if weather:
+        from .weather import WeatherGenerator
+
+        city, step = weather
+        generator = WeatherGenerator(city, session=session, cache=cache, step=step)
+        if options and options.get('window'):
+            generator.set_window(*options['window'])
+        if not generator.generate():
+            raise RuntimeError(f'Failed to fetch weather for {city}')
+        return generator
+
+    generator = create_generator(name, options)
+    with metrics.phase(generator.metrics_name, 'build'):
+        generator.run_build()
+    return generator
@@ -1,74 +1,152 @@
 """Holiday calendar generators."""
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from utils import BaseCalendarGenerator
-from config import HOLIDAYS_2026, LUNAR_FESTIVALS, SOLAR_TERMS, INTERNATIONAL_HOLIDAYS
+from utils.lunar import lunar_to_solar, solar_terms
+from config import PUBLIC_HOLIDAYS, LUNAR_FESTIVALS, SOLAR_TERMS, INTERNATIONAL_HOLIDAYS
+from config.settings import CALENDAR_YEARS_AHEAD
+
+WEEKDAY_NAMES = '一二三四五六日'
+
+
+def format_day(day):
+    """Format a date as e.g. '2月14日（周六）'."""
+    day = date.fromisoformat(day) if isinstance(day, str) else day
+    return f'{day.month}月{day.day}日（周{WEEKDAY_NAMES[day.weekday()]}）'
+
+
+def year_range(from_year=None, to_year=None):
+    """
+    Resolve an inclusive year range, defaulting to the current year plus
+    CALENDAR_YEARS_AHEAD following years.
+
+    Returns:
+        range of years
+
+    Raises:
+        ValueError: If to_year is before from_year
+    """
+    if from_year is None:
+        from_year = datetime.now().year
+    if to_year is None:
+        to_year = from_year + CALENDAR_YEARS_AHEAD
+    if to_year < from_year:
+        raise ValueError(f'to_year {to_year} is before from_year {from_year}')
+    return range(from_year, to_year + 1)
 
 
 class HolidaysGenerator(BaseCalendarGenerator):
     """Generate Chinese public holidays calendar."""
     
+    filename = 'holidays.ics'
+    
     def __init__(self):
         super().__init__('中国法定节假日')
     
-    def generate(self):
-        """Generate holidays calendar."""
-        for name, start, end in HOLIDAYS_2026:
-            self.add_event(
-                summary=name,
-                start_date=start,
-                end_date=end,
-                description=f'{name} - 中国法定节假日'
-            )
-        self.save('holidays.ics')
+    def build(self):
+        """Build holidays calendar."""
+        for year in sorted(PUBLIC_HOLIDAYS):
+            for name, start, end, workdays in PUBLIC_HOLIDAYS[year]:
+                description = f'{name} - 中国法定节假日'
+                if workdays:
+                    description += '\n调休上班：' + '、'.join(map(format_day, workdays))
+                # end is the last day off; DTEND is exclusive
+                self.add_event(
+                    summary=name,
+                    start_date=start,
+                    end_date=date.fromisoformat(end) + timedelta(days=1),
+                    description=description
+                )
+
+
+class AdjustedWorkdaysGenerator(BaseCalendarGenerator):
+    """Generate a calendar of weekend days worked for public holidays (调休上班)."""
+    
+    filename = 'adjusted_workdays.ics'
+    
+    def __init__(self):
+        super().__init__('调休上班')
+    
+    def build(self):
+        """Build adjusted workdays calendar."""
+        for year in sorted(PUBLIC_HOLIDAYS):
+            for name, start, end, workdays in PUBLIC_HOLIDAYS[year]:
+                for day in workdays:
+                    yield dict(
+                        summary=f'🏢 调休上班（{name}）',
+                        start_date=day,
+                        description=f'{format_day(day)}照常上班，调休补{name}'
+                                    f'（{format_day(start)}至{format_day(end)}放假）'
+                    )
 
 
 class LunarFestivalsGenerator(BaseCalendarGenerator):
     """Generate lunar festivals calendar."""
     
-    def __init__(self):
+    filename = 'lunar_festivals.ics'
+    
+    def __init__(self, from_year=None, to_year=None):
+        """
+        Initialize lunar festivals generator.
+        
+        Args:
+            from_year: First lunar year (default: current year)
+            to_year: Last lunar year, inclusive
+        """
         super().__init__('中国传统节日')
+        self.years = year_range(from_year, to_year)
     
-    def generate(self):
-        """Generate lunar festivals calendar."""
-        for name, date, desc in LUNAR_FESTIVALS:
-            self.add_event(
-                summary=name,
-                start_date=date,
-                description=desc
-            )
-        self.save('lunar_festivals.ics')
+    def build(self):
+        """Build lunar festivals calendar."""
+        for year in self.years:
+            for name, month, day, desc in LUNAR_FESTIVALS:
+                self.add_event(
+                    summary=name,
+                    start_date=lunar_to_solar(year, month, day).isoformat(),
+                    description=desc
+                )
 
 
 class SolarTermsGenerator(BaseCalendarGenerator):
     """Generate 24 solar terms calendar."""
     
-    def __init__(self):
+    filename = 'solar_terms.ics'
+    
+    def __init__(self, from_year=None, to_year=None):
+        """
+        Initialize solar terms generator.
+        
+        Args:
+            from_year: First year (default: current year)
+            to_year: Last year, inclusive
+        """
         super().__init__('二十四节气')
+        self.years = year_range(from_year, to_year)
     
-    def generate(self):
-        """Generate solar terms calendar."""
-        for name, date, desc in SOLAR_TERMS:
-            self.add_event(
-                summary=f'{name} - 二十四节气',
-                start_date=date,
-                description=desc
-            )
-        self.save('solar_terms.ics')
+    def build(self):
+        """Build solar terms calendar."""
+        for year in self.years:
+            for (name, desc), date in zip(SOLAR_TERMS, solar_terms(year)):
+                self.add_event(
+                    summary=f'{name} - 二十四节气',
+                    start_date=date.isoformat(),
+                    description=desc
+                )
 
 
 class InternationalHolidaysGenerator(BaseCalendarGenerator):
     """Generate international holidays calendar."""
     
+    filename = 'international_holidays.ics'
+    
     def __init__(self):
         super().__init__('国际节日')
     
-    def generate(self):
-        """Generate international holidays calendar."""
+    def build(self):
+        """Build international holidays calendar."""
         for name, date, desc in INTERNATIONAL_HOLIDAYS:
             self.add_event(
                 summary=name,
                 start_date=date,
                 description=desc
             )
-        self.save('international_holidays.ics')
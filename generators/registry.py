@@ -0,0 +1,197 @@
+"""
+Registry of calendar generators by name and stage.
+
+Generators are registered by name with a 'module:Class' import path and
+imported only when selected, so listing generators or running one of them
+does not import every other generator and its dependencies.
+"""
+
+import inspect
+import importlib
+from collections import namedtuple
+from config.settings import GENERATOR_PLUGINS
+
+# target is a 'module:Class' import path until loaded, then the class
+GeneratorSpec = namedtuple('GeneratorSpec', 'name stage target')
+
+# Entry point group third-party packages use to add generators; the entry
+# point name is the generator name, its value the class, and the class's
+# `stage` attribute the stage
+ENTRY_POINT_GROUP = 'cal.generators'
+
+BUILTIN_GENERATORS = [
+    ('holidays', 'holidays', 'generators.holidays:HolidaysGenerator'),
+    ('adjusted_workdays', 'holidays', 'generators.holidays:AdjustedWorkdaysGenerator'),
+    ('lunar_festivals', 'holidays', 'generators.holidays:LunarFestivalsGenerator'),
+    ('solar_terms', 'holidays', 'generators.holidays:SolarTermsGenerator'),
+    ('international_holidays', 'holidays', 'generators.holidays:InternationalHolidaysGenerator'),
+    ('countdown', 'reminders', 'generators.reminders:CountdownGenerator'),
+    ('weekly_reminder', 'reminders', 'generators.reminders:WeeklyReminderGenerator'),
+    ('health_reminders', 'reminders', 'generators.reminders:HealthRemindersGenerator'),
+    ('financial_calendar', 'reminders', 'generators.reminders:FinancialCalendarGenerator'),
+]
+
+REGISTRY = {}
+_plugins_loaded = False
+
+
+def register_lazy(name, stage, target):
+    """
+    Register a generator by import path without importing it.
+
+    Args:
+        name: Unique generator name (also the output file basename)
+        stage: Stage the generator belongs to ('holidays', 'reminders', ...)
+        target: 'module:Class' import path, or the class itself
+
+    Raises:
+        ValueError: If the name is already registered
+    """
+    if name in REGISTRY:
+        raise ValueError(f"Generator '{name}' is already registered")
+    REGISTRY[name] = GeneratorSpec(name, stage, target)
+
+
+def register(name, stage):
+    """
+    Class decorator registering an already imported generator.
+
+    Args:
+        name: Unique generator name (also the output file basename)
+        stage: Stage the generator belongs to ('holidays', 'reminders', ...)
+    """
+    def decorator(cls):
+        register_lazy(name, stage, cls)
+        return cls
+    return decorator
+
+
+def load_plugins():
+    """
+    Register plugin generators from GENERATOR_PLUGINS and installed packages.
+
+    Runs once, on the first lookup. Entry point classes are imported here
+    to read their stage.
+    """
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    # Imported here: scanning installed distributions is slow and only
+    # needed once a generator is looked up
+    from importlib.metadata import entry_points
+
+    plugins = list(GENERATOR_PLUGINS)
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        group = eps.select(group=ENTRY_POINT_GROUP)
+    else:
+        # Python < 3.10 returns a dict of group name to entry points
+        group = eps.get(ENTRY_POINT_GROUP, [])
+    for entry_point in group:
+        cls = entry_point.load()
+        plugins.append((entry_point.name, getattr(cls, 'stage', 'reminders'), cls))
+
+    # Registered only once everything loaded and checked, so a failed load
+    # is retried on the next lookup instead of leaving a partial registry
+    names = [name for name, _, _ in plugins]
+    for name in names:
+        if name in REGISTRY or names.count(name) > 1:
+            raise ValueError(f"Generator '{name}' is already registered")
+    for name, stage, target in plugins:
+        register_lazy(name, stage, target)
+    _plugins_loaded = True
+
+
+for _name, _stage, _target in BUILTIN_GENERATORS:
+    register_lazy(_name, _stage, _target)
+
+
+def get_generators(stage=None):
+    """
+    List registered generators in registration order, without importing them.
+
+    Args:
+        stage: Only return generators of this stage (all if None)
+
+    Returns:
+        List of GeneratorSpec
+    """
+    load_plugins()
+    return [spec for spec in REGISTRY.values() if stage is None or spec.stage == stage]
+
+
+def get_spec(name):
+    """
+    Look up a registered generator.
+
+    Raises:
+        KeyError: If no generator has this name
+    """
+    load_plugins()
+    return REGISTRY[name]
+
+
+def load_generator(name):
+    """
+    Import a registered generator's class.
+
+    Returns:
+        Generator class
+
+    Raises:
+        KeyError: If no generator has this name
+    """
+    spec = get_spec(name)
+    if isinstance(spec.target, str):
+        module_name, _, class_name = spec.target.partition(':')
+        cls = getattr(importlib.import_module(module_name), class_name)
+        REGISTRY[name] = spec._replace(target=cls)
+        return cls
+    return spec.target
+
+
+def create_generator(name, options=None):
+    """
+    Instantiate a registered generator.
+
+    Options the generator's constructor does not accept are ignored, so one
+    set of CLI options (e.g. from_year/to_year) can be passed to every
+    generator. The 'window' option, a (first, last) date tuple, applies to
+    every generator and trims its output to that date range; a true
+    'streaming' option makes generate() write events as they are added.
+
+    Args:
+        name: Registered generator name
+        options: Dict of keyword arguments for generators that accept them
+
+    Returns:
+        BaseCalendarGenerator instance
+    """
+    cls = load_generator(name)
+    options = dict(options or {})
+    window = options.pop('window', None)
+    streaming = options.pop('streaming', False)
+    accepted = inspect.signature(cls).parameters
+    kwargs = {key: value for key, value in options.items()
+              if key in accepted and value is not None}
+    generator = cls(**kwargs)
+    if window:
+        generator.set_window(*window)
+    generator.streaming = bool(streaming)
+    return generator
+
+
+def run_generator(name, options=None):
+    """
+    Instantiate a registered generator and run it.
+
+    Module-level so it can be submitted to a process pool by name.
+
+    Args:
+        name: Registered generator name
+        options: Dict of keyword arguments for generators that accept them
+
+    Returns:
+        True if the output file was written, False if it was unchanged
+    """
+    return create_generator(name, options).generate()
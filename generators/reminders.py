@@ -1,17 +1,23 @@
 """Reminder calendar generators."""
 
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from utils import BaseCalendarGenerator
 
+# Fixed Monday that weekly recurrences start from, so output does not
+# depend on the build date
+RECURRENCE_ANCHOR = date(2026, 1, 5)
+
 
 class CountdownGenerator(BaseCalendarGenerator):
     """Generate countdown calendar for important dates."""
     
+    filename = 'countdown.ics'
+    
     def __init__(self):
         super().__init__('重要日期倒计时')
     
-    def generate(self):
-        """Generate countdown calendar."""
+    def build(self):
+        """Build countdown calendar."""
         important_dates = [
             ('高考 📝', '2026-06-07', '2026-06-09', '全国普通高等学校招生统一考试'),
             ('考研 📚', '2026-12-26', '2026-12-28', '全国硕士研究生招生考试'),
@@ -31,18 +37,18 @@ class CountdownGenerator(BaseCalendarGenerator):
                 end_date=end,
                 description=desc
             )
-        
-        self.save('countdown.ics')
 
 
 class WeeklyReminderGenerator(BaseCalendarGenerator):
     """Generate weekly reminder calendar."""
     
-    def __init__(self):
-        super().__init__('每周提醒')
+    filename = 'weekly_reminder.ics'
+    
+    def __init__(self, expand_recurrence=False):
+        super().__init__('每周提醒', expand_recurrence=expand_recurrence)
     
-    def generate(self):
-        """Generate weekly reminder calendar."""
+    def build(self):
+        """Build weekly reminder calendar."""
         reminders = [
             (0, '周一加油 💪', '新的一周开始了，为目标努力！'),
             (1, '周二继续 🔥', '保持昨天的干劲，继续前进！'),
@@ -53,28 +59,25 @@ class WeeklyReminderGenerator(BaseCalendarGenerator):
             (6, '周日准备 📅', '为下周做好准备！'),
         ]
         
-        start_date = datetime.now()
-        # Generate 12 weeks of reminders
-        for week in range(12):
-            for day_offset, summary, desc in reminders:
-                date = start_date + timedelta(days=week*7 + day_offset)
-                self.add_event(
-                    summary=summary,
-                    start_date=date.date(),
-                    description=desc
-                )
-        
-        self.save('weekly_reminder.ics')
+        for day_offset, summary, desc in reminders:
+            self.add_event(
+                summary=summary,
+                start_date=RECURRENCE_ANCHOR + timedelta(days=day_offset),
+                description=desc,
+                rrule={'freq': 'weekly'}
+            )
 
 
 class HealthRemindersGenerator(BaseCalendarGenerator):
     """Generate health reminder calendar."""
     
-    def __init__(self):
-        super().__init__('健康提醒')
+    filename = 'health_reminders.ics'
     
-    def generate(self):
-        """Generate health reminders calendar."""
+    def __init__(self, expand_recurrence=False):
+        super().__init__('健康提醒', expand_recurrence=expand_recurrence)
+    
+    def build(self):
+        """Build health reminders calendar."""
         health_tips = [
             ('💧 多喝水', '每天保持2000ml水分摄入'),
             ('🏃 运动锻炼', '每天至少30分钟有氧运动'),
@@ -85,41 +88,35 @@ class HealthRemindersGenerator(BaseCalendarGenerator):
             ('🦷 口腔护理', '早晚刷牙，饭后漱口'),
         ]
         
-        start_date = datetime.now()
-        # Generate 12 weeks of health reminders
-        for week in range(12):
-            for day, (summary, desc) in enumerate(health_tips):
-                date = start_date + timedelta(days=week*7 + day)
-                self.add_event(
-                    summary=summary,
-                    start_date=date.date(),
-                    description=desc
-                )
-        
-        self.save('health_reminders.ics')
+        # One tip per weekday, repeating every week
+        for day, (summary, desc) in enumerate(health_tips):
+            self.add_event(
+                summary=summary,
+                start_date=RECURRENCE_ANCHOR + timedelta(days=day),
+                description=desc,
+                rrule={'freq': 'weekly'}
+            )
 
 
 class FinancialCalendarGenerator(BaseCalendarGenerator):
     """Generate financial calendar."""
     
-    def __init__(self):
-        super().__init__('财务日历')
+    filename = 'financial_calendar.ics'
+    
+    def __init__(self, expand_recurrence=False):
+        super().__init__('财务日历', expand_recurrence=expand_recurrence)
     
-    def generate(self):
-        """Generate financial calendar."""
+    def build(self):
+        """Build financial calendar."""
         # Monthly salary reminders
-        for month in range(1, 13):
-            try:
-                date = datetime(2026, month, 10).date()
-                self.add_event(
-                    summary='💰 工资日',
-                    start_date=date,
-                    description='预计工资发放日'
-                )
-            except:
-                pass
+        self.add_event(
+            summary='💰 工资日',
+            start_date='2026-01-10',
+            description='预计工资发放日',
+            rrule={'freq': 'monthly', 'bymonthday': 10}
+        )
         
-        # Quarterly tax deadlines
+        # Quarterly tax deadlines, every year
         tax_dates = [
             ('2026-04-15', '第一季度'),
             ('2026-07-15', '第二季度'),
@@ -127,14 +124,15 @@ class FinancialCalendarGenerator(BaseCalendarGenerator):
             ('2027-01-15', '第四季度'),
         ]
         
-        for date, quarter in tax_dates:
+        for deadline, quarter in tax_dates:
             self.add_event(
                 summary=f'📊 {quarter}纳税申报截止',
-                start_date=date,
-                description=f'{quarter}纳税申报截止日期'
+                start_date=deadline,
+                description=f'{quarter}纳税申报截止日期',
+                rrule={'freq': 'yearly'}
             )
         
-        # Shopping festivals
+        # Shopping festivals, every year
         shopping_events = [
             ('2026-03-08', '👩 三八女王节', '妇女节购物促销'),
             ('2026-06-18', '🛍️ 618购物节', '年中大促'),
@@ -142,11 +140,10 @@ class FinancialCalendarGenerator(BaseCalendarGenerator):
             ('2026-12-12', '🎁 双十二购物节', '年终大促'),
         ]
         
-        for date, summary, desc in shopping_events:
+        for festival, summary, desc in shopping_events:
             self.add_event(
                 summary=summary,
-                start_date=date,
-                description=desc
+                start_date=festival,
+                description=desc,
+                rrule={'freq': 'yearly'}
             )
-        
-        self.save('financial_calendar.ics')
@@ -1,81 +1,451 @@
 """Weather calendar generator."""
 
-import requests
-from datetime import datetime, timedelta
-from utils import BaseCalendarGenerator
+import time
+from datetime import datetime, timedelta, timezone
+from utils import BaseCalendarGenerator, create_session, ResponseCache, CacheMiss
+from utils.http import resilient_get, CircuitOpenError
+from utils.metrics import metrics
+from utils.forecast import HOURLY_VARIABLES, hourly_periods
+from utils.geo import snap_to_grid, parse_coordinates, validate_coordinates, format_coordinates
 from config import CITIES, WEATHER_API_URL
-from config.settings import WEATHER_CODE_MAP, WEATHER_FORECAST_DAYS
+from config.settings import (
+    WEATHER_CODE_MAP,
+    WEATHER_FORECAST_DAYS,
+    WEATHER_TIMEOUT,
+    WEATHER_CACHE_DIR,
+    WEATHER_CACHE_TTL,
+    WEATHER_CACHE_MAX_AGE,
+    WEATHER_CACHE_MAX_BYTES,
+    WEATHER_CACHE_PRECISION,
+    WEATHER_GRID_STEP,
+    WEATHER_NEAREST_CITY_KM,
+    WEATHER_HOURLY_STEPS,
+)
+
+DAILY_VARIABLES = 'temperature_2m_max,temperature_2m_min,weathercode'
+# Variables requested per forecast section
+SECTION_VARIABLES = {'daily': DAILY_VARIABLES, 'hourly': HOURLY_VARIABLES}
+
+
+def create_weather_cache(ttl=WEATHER_CACHE_TTL, offline=False):
+    """
+    Create the on-disk weather response cache.
+    
+    Args:
+        ttl: Seconds a cached forecast is used without refetching
+        offline: Replay cached forecasts only, never hit the network
+        
+    Returns:
+        ResponseCache object
+    """
+    return ResponseCache(
+        WEATHER_CACHE_DIR,
+        ttl=ttl,
+        max_age=WEATHER_CACHE_MAX_AGE,
+        max_bytes=WEATHER_CACHE_MAX_BYTES,
+        offline=offline,
+    )
+
+
+def forecast_cache_key(info, days, variables=DAILY_VARIABLES):
+    """Build the cache key for a location's forecast (coordinates quantized)."""
+    return ResponseCache.make_key(
+        lat=round(info['lat'], WEATHER_CACHE_PRECISION),
+        lon=round(info['lon'], WEATHER_CACHE_PRECISION),
+        days=days,
+        variables=variables,
+    )
+
+
+def forecast_section(step):
+    """Forecast section ('daily' or 'hourly') a weather feed with this hourly step needs."""
+    return 'hourly' if step else 'daily'
+
+
+def _request_upstream(session, locations, days, headers=None, section='daily'):
+    """
+    Perform one Open-Meteo request for one or more locations.
+    
+    Open-Meteo accepts comma-separated coordinate lists and answers with
+    one result per location, in request order. Hourly forecasts are
+    requested with unix timestamps, and each 'hourly' dict carries the
+    location's 'utc_offset_seconds'.
+    
+    Every request's latency and status is recorded in run metrics for
+    each location it covers. Timeouts, retries, hedging and the circuit
+    breaker are handled by resilient_get().
+    
+    Returns:
+        (response, list of section dicts), the list is None on 304
+    """
+    params = {
+        'latitude': ','.join(str(info['lat']) for info in locations),
+        'longitude': ','.join(str(info['lon']) for info in locations),
+        section: SECTION_VARIABLES[section],
+        'timezone': 'Asia/Shanghai',
+        'forecast_days': days,
+    }
+    if section == 'hourly':
+        params['timeformat'] = 'unixtime'
+    
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        response = resilient_get(session, WEATHER_API_URL, params=params, headers=headers, timeout=WEATHER_TIMEOUT)
+        status = response.status_code
+    except CircuitOpenError:
+        status = 'circuit_open'
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        for info in locations:
+            metrics.record_http(info['name'], status, elapsed)
+    
+    if response.status_code == 304:
+        return response, None
+    response.raise_for_status()
+    data = response.json()
+    
+    results = data if isinstance(data, list) else [data]
+    if len(results) != len(locations):
+        raise ValueError(f"Expected {len(locations)} locations in API response, got {len(results)}")
+    
+    for info, result in zip(locations, results):
+        if section not in result:
+            raise ValueError(f"{section.capitalize()} data not found in API response for {info['name']}")
+    
+    if section == 'hourly':
+        return response, [
+            dict(result['hourly'], utc_offset_seconds=result.get('utc_offset_seconds', 0))
+            for result in results
+        ]
+    return response, [result[section] for result in results]
+
+
+def request_forecasts(session, locations, days=WEATHER_FORECAST_DAYS, cache=None,
+                      metrics_name='weather', section='daily'):
+    """
+    Get forecasts for one or more locations, using the cache first.
+    
+    Fresh cache hits are served without a request; all remaining locations
+    are fetched together in a single call. A lone stale entry is
+    revalidated with a conditional request when it carries validators.
+    If the request fails, the last known good forecasts from the cache are
+    used instead, trimmed to days that have not passed yet.
+    
+    Args:
+        session: requests.Session to use
+        locations: List of city info dicts with 'lat', 'lon' and 'name'
+        days: Number of forecast days
+        cache: ResponseCache object (None disables caching)
+        metrics_name: Name the fetch time is reported under in run metrics
+        section: 'daily' or 'hourly'
+        
+    Returns:
+        List of section dicts, one per location
+        
+    Raises:
+        CacheMiss: In offline mode, if a location has no cached forecast
+    """
+    with metrics.phase(metrics_name, 'fetch'):
+        return _request_forecasts(session, locations, days, cache, section)
+
+
+def _request_forecasts(session, locations, days, cache, section):
+    """Implementation of request_forecasts()."""
+    results = [None] * len(locations)
+    keys = [forecast_cache_key(info, days, SECTION_VARIABLES[section]) for info in locations]
+    pending = []
+    
+    for i, (info, key) in enumerate(zip(locations, keys)):
+        entry = cache.get(key) if cache else None
+        if entry and (cache.offline or cache.is_fresh(entry)):
+            results[i] = entry['data']
+        elif cache and cache.offline:
+            raise CacheMiss(f"No cached forecast for {info['name']} (offline mode)")
+        else:
+            pending.append((i, entry))
+    
+    if not pending:
+        return results
+    
+    stale = pending[0][1] if len(pending) == 1 else None
+    headers = cache.conditional_headers(stale) if cache else None
+    try:
+        response, fetched = _request_upstream(session, [locations[i] for i, _ in pending], days, headers, section)
+    except Exception as e:
+        fallbacks = [trim_forecast(entry['data']) if entry else None for _, entry in pending]
+        if not all(fallbacks):
+            raise
+        names = ', '.join(locations[i]['name'] for i, _ in pending)
+        print(f"⚠️  Weather request failed ({e}), using last known forecast for {names}")
+        for (i, _), daily in zip(pending, fallbacks):
+            results[i] = daily
+        return results
+    
+    if fetched is None:
+        i = pending[0][0]
+        results[i] = stale['data']
+        cache.touch(keys[i], stale)
+        return results
+    
+    for (i, _), daily in zip(pending, fetched):
+        results[i] = daily
+        if cache:
+            cache.put(
+                keys[i],
+                daily,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
+    
+    return results
+
+
+def trim_forecast(daily, today=None):
+    """
+    Drop days that have already passed from a cached forecast.
+    
+    Args:
+        daily: Open-Meteo 'daily' dict with a 'time' list of YYYY-MM-DD
+            and one list per variable, or an 'hourly' dict with unix
+            timestamps and 'utc_offset_seconds'
+        today: First day to keep (default: today)
+        
+    Returns:
+        Trimmed dict, or None if no day is left
+    """
+    today = today or datetime.now().date()
+    times = daily.get('time', ())
+    if times and not isinstance(times[0], str):
+        # Hourly forecast: keep hours from the forecast's local midnight on
+        midnight = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
+        cutoff = midnight.timestamp() - daily.get('utc_offset_seconds', 0)
+        keep = [i for i, moment in enumerate(times) if moment >= cutoff]
+    else:
+        today = today.isoformat()
+        keep = [i for i, day in enumerate(times) if day >= today]
+    if not keep:
+        return None
+    return {
+        key: [values[i] for i in keep] if isinstance(values, list) else values
+        for key, values in daily.items()
+    }
+
+
+def fetch_weather_batch(city_keys, days=WEATHER_FORECAST_DAYS, session=None, cache=None,
+                        section='daily'):
+    """
+    Fetch forecasts for several configured cities in one request.
+    
+    Args:
+        city_keys: List of city keys from the city catalog
+        days: Number of forecast days
+        session: Shared requests.Session (a new pooled one if omitted)
+        cache: ResponseCache object (None disables caching)
+        section: 'daily' or 'hourly'
+        
+    Returns:
+        Dict mapping city key to its section data
+    """
+    session = session or create_session()
+    locations = [CITIES[key] for key in city_keys]
+    return dict(zip(city_keys, request_forecasts(session, locations, days, cache, section=section)))
+
+
+def find_city(name):
+    """
+    Look up a catalog city by key, Chinese name or alias (case-insensitive).
+    
+    Returns:
+        City key, or None if not found
+    """
+    return CITIES.find(name)
+
+
+def make_location(lat, lon, name=None, step=WEATHER_GRID_STEP):
+    """
+    Build a grid-snapped location for an arbitrary coordinate.
+    
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        name: Display name (defaults to the snapped coordinates, after the
+            nearest catalog city within WEATHER_NEAREST_CITY_KM)
+        step: Grid step in degrees
+        
+    Returns:
+        Location dict with 'key', 'lat', 'lon' and 'name'
+    """
+    validate_coordinates(lat, lon)
+    nearest = None if name else CITIES.nearest(lat, lon)
+    lat, lon = snap_to_grid(lat, lon, step)
+    if not name:
+        name = format_coordinates(lat, lon)
+        if nearest and nearest[1] <= WEATHER_NEAREST_CITY_KM:
+            name = f"{CITIES[nearest[0]]['name']} {name}"
+    return {
+        'key': f'{lat}_{lon}',
+        'lat': lat,
+        'lon': lon,
+        'name': name,
+    }
+
+
+def resolve_location(query, step=WEATHER_GRID_STEP):
+    """
+    Resolve a 'lat,lon' string or city name to a grid-snapped location.
+    
+    Raises:
+        ValueError: If the query is neither valid coordinates nor a known city
+    """
+    coordinates = parse_coordinates(query)
+    if coordinates:
+        return make_location(*coordinates, step=step)
+    
+    city = find_city(query)
+    if city is None:
+        raise ValueError(f"Unknown city or invalid coordinates: '{query}'")
+    info = CITIES[city]
+    return make_location(info['lat'], info['lon'], info['name'], step)
 
 
 class WeatherGenerator(BaseCalendarGenerator):
-    """Generate weather forecast calendars for cities."""
+    """
+    Generate weather forecast calendars for cities.
     
-    def __init__(self, city='Ningbo', days=WEATHER_FORECAST_DAYS):
+    Daily feeds have one all-day event per day. Hourly feeds have timed
+    events covering runs of step hours with unchanged weather, wind level
+    and precipitation band (see utils.forecast.hourly_periods).
+    """
+    
+    def __init__(self, city='Ningbo', days=WEATHER_FORECAST_DAYS, session=None, cache=None,
+                 location=None, step=None):
         """
         Initialize weather calendar generator.
         
         Args:
-            city: City name (from CITIES config)
+            city: City key, name or alias from the city catalog
             days: Number of forecast days
+            session: Shared requests.Session (a new pooled one if omitted)
+            cache: Weather ResponseCache (the default on-disk cache if omitted)
+            location: Location dict from make_location(), used instead of city
+            step: Hours per event of an hourly feed (one of
+                WEATHER_HOURLY_STEPS), None for the daily feed
+            
+        Raises:
+            ValueError: If city is not in the catalog or step is not supported
         """
-        self.city_info = CITIES.get(city, CITIES['Ningbo'])
+        if step is not None and step not in WEATHER_HOURLY_STEPS:
+            raise ValueError(f"Unsupported hourly step: {step}, expected one of "
+                             f"{', '.join(map(str, WEATHER_HOURLY_STEPS))}")
+        suffix = f'_{step}h' if step else ''
+        if location is not None:
+            self.city_info = location
+            self.filename = f"weather_{location['key']}{suffix}.ics"
+        else:
+            key = city if city in CITIES else find_city(city)
+            if key is None:
+                raise ValueError(f"Unknown city: '{city}'")
+            self.city_info = CITIES[key]
+            self.filename = f'weather_{key}{suffix}.ics'
         self.city_name = self.city_info['name']
         self.days = days
+        self.step = step
+        self.session = session or create_session()
+        self.cache = cache or create_weather_cache()
         
-        super().__init__(f'{self.city_name}天气日历')
+        if step:
+            super().__init__(f"{self.city_name}逐{'' if step == 1 else step}小时天气")
+        else:
+            super().__init__(f'{self.city_name}天气日历')
     
     def fetch_weather_data(self):
         """Fetch weather data from API."""
-        url = (
-            f"{WEATHER_API_URL}"
-            f"?latitude={self.city_info['lat']}"
-            f"&longitude={self.city_info['lon']}"
-            f"&daily=temperature_2m_max,temperature_2m_min,weathercode"
-            f"&timezone=Asia/Shanghai"
-            f"&forecast_days={self.days}"
-        )
-        
-        response = requests.get(url)
-        data = response.json()
-        
-        if 'daily' not in data:
-            raise ValueError(f"Daily data not found in API response for {self.city_name}")
-        
-        return data['daily']
+        return request_forecasts(
+            self.session, [self.city_info], self.days, self.cache,
+            metrics_name=self.metrics_name, section=forecast_section(self.step),
+        )[0]
     
-    def generate(self):
-        """Generate weather calendar."""
+    def generate(self, daily_data=None):
+        """
+        Generate weather calendar.
+        
+        Args:
+            daily_data: Prefetched 'daily' data, or 'hourly' data for an
+                hourly feed (fetched from API if omitted)
+        """
         try:
-            daily_data = self.fetch_weather_data()
-            
-            for i in range(self.days):
-                date = datetime.now() + timedelta(days=i)
-                temp_max = daily_data['temperature_2m_max'][i]
-                temp_min = daily_data['temperature_2m_min'][i]
-                weather_code = daily_data['weathercode'][i]
-                
-                weather_desc = WEATHER_CODE_MAP.get(weather_code, '☁️ 未知')
-                summary = f"{self.city_name} {weather_desc} {int(temp_min)}°C ~ {int(temp_max)}°C"
-                description = f"最高温度: {temp_max}°C\n最低温度: {temp_min}°C\n天气: {weather_desc}"
-                
-                self.add_event(
-                    summary=summary,
-                    start_date=date.date(),
-                    description=description
-                )
+            if daily_data is None:
+                daily_data = self.fetch_weather_data()
             
+            with metrics.phase(self.metrics_name, 'build'):
+                if self.step:
+                    self._add_hourly_events(daily_data)
+                else:
+                    self._add_forecast_events(daily_data)
             return True
         except Exception as e:
             print(f"❌ Error generating weather for {self.city_name}: {e}")
             return False
     
-    def generate_and_save(self, city_key):
+    def _add_forecast_events(self, daily_data):
+        """Add one event per forecast day."""
+        days = daily_data.get('time')
+        for i in range(min(self.days, len(daily_data['temperature_2m_max']))):
+            # Dates come from the forecast itself, so a trimmed last-known-good
+            # forecast lands on the right days
+            date = datetime.fromisoformat(days[i]) if days else datetime.now() + timedelta(days=i)
+            temp_max = daily_data['temperature_2m_max'][i]
+            temp_min = daily_data['temperature_2m_min'][i]
+            weather_code = daily_data['weathercode'][i]
+            
+            weather_desc = WEATHER_CODE_MAP.get(weather_code, '☁️ 未知')
+            summary = f"{self.city_name} {weather_desc} {int(temp_min)}°C ~ {int(temp_max)}°C"
+            description = f"最高温度: {temp_max}°C\n最低温度: {temp_min}°C\n天气: {weather_desc}"
+            
+            self.add_event(
+                summary=summary,
+                start_date=date.date(),
+                description=description
+            )
+    
+    def _add_hourly_events(self, hourly_data):
+        """Add one timed event per period of unchanged weather."""
+        for period in hourly_periods(hourly_data, self.step):
+            weather_desc = WEATHER_CODE_MAP.get(period.code, '☁️ 未知')
+            low, high = round(period.temp_min), round(period.temp_max)
+            temperature = f'{low}°C' if low == high else f'{low}°C ~ {high}°C'
+            summary = (f"{self.city_name} {weather_desc} {temperature} "
+                       f"💧{period.precipitation}% 🌬️{period.level}级")
+            description = (
+                f"温度: {period.temp_min}°C ~ {period.temp_max}°C\n"
+                f"降水概率: {period.precipitation}%\n"
+                f"风力: {period.level}级 ({period.wind} km/h)\n"
+                f"天气: {weather_desc}"
+            )
+            
+            self.add_event(
+                summary=summary,
+                start_date=datetime.fromtimestamp(period.start, timezone.utc),
+                end_date=datetime.fromtimestamp(period.end, timezone.utc),
+                description=description
+            )
+    
+    def generate_and_save(self, city_key, daily_data=None):
         """
         Generate and save weather calendar for a city.
         
         Args:
-            city_key: City key from CITIES config
+            city_key: City key from the city catalog
+            daily_data: Prefetched 'daily' data, or 'hourly' data for an
+                hourly feed (fetched from API if omitted)
+            
+        Returns:
+            True if the calendar was generated and saved
         """
-        self.__init__(city_key)
-        if self.generate():
-            self.save(f'weather_{city_key}.ics')
+        self.__init__(city_key, self.days, self.session, self.cache, step=self.step)
+        if self.generate(daily_data):
+            self.save(self.filename)
+            return True
+        return False
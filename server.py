@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Calendar Subscription Service HTTP server
+Serve ICS feeds on demand from an in-memory rendered-feed cache.
+
+Usage:
+    python3 server.py --host 0.0.0.0 --port 8000
+    curl http://127.0.0.1:8000/ics/holidays.ics
+    curl -X PROPFIND -H 'Depth: 1' http://127.0.0.1:8000/caldav/holidays/
+"""
+
+import hmac
+import time
+import argparse
+import threading
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from generators.feeds import list_feeds, feed_stage, build_feed
+from generators import WeatherGenerator, create_weather_cache, make_location, resolve_location
+from config.settings import (
+    FEED_CACHE_SIZE,
+    FEED_TTLS,
+    FEED_WINDOW_MAX_DAYS,
+    COMPOSITE_MAX_FEEDS,
+    WEATHER_HOURLY_STEPS,
+    ADMIN_TOKEN,
+    PROFILE_DIR,
+    CALDAV_MAX_REQUEST_BYTES,
+)
+from utils import create_session
+from utils import caldav
+from utils.calendar_helper import resolve_window
+from utils.composite import FragmentCache, split_composite, make_fragment, composite_key, compose
+from utils.feed_cache import FeedCache
+from utils.metrics import metrics
+from utils.profiling import profiler
+
+ICS_MEDIA_TYPE = 'text/calendar; charset=utf-8'
+CALDAV_HOME = '/caldav/'
+CALDAV_HEADERS = {
+    'DAV': '1, 3, calendar-access',
+    'Allow': 'OPTIONS, GET, PROPFIND, REPORT',
+}
+
+app = FastAPI(title='Calendar Subscription Service')
+
+feed_cache = FeedCache(FEED_CACHE_SIZE)
+# Pre-serialized events of the feeds composite feeds are built from
+fragment_cache = FragmentCache(FEED_CACHE_SIZE)
+session = create_session()
+weather_cache = create_weather_cache()
+
+# feed name -> (content hash, DTSTAMP) of its last render
+_dtstamps = {}
+
+# Where /admin/profile/stop writes reports (set by --profile)
+profile_dir = PROFILE_DIR
+
+# CalDAV: feed name -> CalendarCollection, and when each was last rebuilt
+# (the cached body is the collection's sync token). Sync tokens carry the
+# epoch, so tokens issued before a restart are rejected.
+caldav_epoch = format(int(time.time()), 'x')
+caldav_collections = {}
+_caldav_lock = threading.Lock()
+collection_cache = FeedCache(FEED_CACHE_SIZE)
+
+
+def feed_ttl(name):
+    """
+    Seconds a feed stays fresh: its stage's FEED_TTLS entry, or the default one.
+
+    Raises:
+        KeyError: If the feed does not exist
+    """
+    return FEED_TTLS.get(feed_stage(name), FEED_TTLS['default'])
+
+
+def stable_dtstamp(name, generator):
+    """
+    Choose the DTSTAMP for a render of a built generator.
+
+    DTSTAMP is kept from the previous render while the content is
+    unchanged, so an unchanged feed keeps the same bytes and ETag.
+
+    Returns:
+        Aware UTC datetime
+    """
+    previous = _dtstamps.get(name)
+    if previous and previous[0] == generator.content_hash:
+        return previous[1]
+    dtstamp = generator.dtstamp_for(generator.filename)
+    _dtstamps[name] = (generator.content_hash, dtstamp)
+    return dtstamp
+
+
+def serialize(name, generator):
+    """
+    Serialize a built generator with a stable DTSTAMP.
+
+    Returns:
+        ICS file content
+    """
+    return generator.to_ical(stable_dtstamp(name, generator))
+
+
+def render_feed(name, key=None, options=None):
+    """
+    Build and serialize a catalog feed.
+
+    Args:
+        name: Feed name
+        key: Cache key of this variant of the feed (defaults to name)
+        options: Keyword arguments for generators that accept them
+    """
+    generator = build_feed(name, session=session, cache=weather_cache, options=options)
+    return serialize(key or name, generator)
+
+
+def render_fragment(name, key, options=None):
+    """Build a catalog feed and pre-serialize its events for composite feeds."""
+    generator = build_feed(name, session=session, cache=weather_cache, options=options)
+    return make_fragment(generator.name, generator.selected_events(), stable_dtstamp(key, generator))
+
+
+def composite_feed(parts, suffix, options, ttl):
+    """
+    Serve a composite feed from cached fragments.
+
+    Only fragments that are missing or expired are rebuilt; the merged
+    calendar is cached under a key derived from the fragments' digests,
+    so it is concatenated again only when a source calendar changed.
+
+    Args:
+        parts: Feed names in order
+        suffix: Cache key suffix of the requested variant (see feed_variant)
+        options: Keyword arguments for generators that accept them
+        ttl: Seconds the merged feed stays fresh
+
+    Returns:
+        CachedFeed
+    """
+    fragments = []
+    for part in parts:
+        key = f'{part}{suffix}'
+        fragments.append(fragment_cache.get(
+            key, feed_ttl(part), lambda: render_fragment(part, key, options)
+        ).body)
+    return feed_cache.get(composite_key(fragments), ttl, lambda: compose(fragments))
+
+
+def render_location_feed(key, location, step=None):
+    """Build and serialize a weather feed for a grid-snapped location."""
+    generator = WeatherGenerator(location=location, session=session, cache=weather_cache, step=step)
+    if not generator.generate():
+        raise RuntimeError(f"Failed to fetch weather for {location['name']}")
+    return serialize(key, generator)
+
+
+def etag_matches(if_none_match, etag):
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(','))
+    return etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+def feed_response(request, feed, max_age):
+    """
+    Build a feed response, answering 304 when the client's copy is current.
+
+    Args:
+        request: Incoming request
+        feed: CachedFeed
+        max_age: Seconds clients may cache the response
+    """
+    headers = {
+        'ETag': feed.etag,
+        'Cache-Control': f'public, max-age={max(0, int(max_age))}',
+    }
+    if etag_matches(request.headers.get('if-none-match'), feed.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(feed.body, media_type=ICS_MEDIA_TYPE, headers=headers)
+
+
+@app.get('/metrics')
+def get_metrics():
+    """Expose render timings and upstream HTTP latency in Prometheus format."""
+    return Response(metrics.to_prometheus(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def require_admin(request):
+    """
+    Check the request's bearer token against ADMIN_TOKEN.
+
+    Raises:
+        HTTPException: 404 if admin endpoints are disabled (no ADMIN_TOKEN),
+            401 if the token is missing or wrong
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail='Not Found')
+    token = request.headers.get('authorization', '')
+    if not hmac.compare_digest(token.encode('utf-8'), f'Bearer {ADMIN_TOKEN}'.encode('utf-8')):
+        raise HTTPException(status_code=401, detail='Admin token required',
+                            headers={'WWW-Authenticate': 'Bearer'})
+
+
+@app.post('/admin/profile/start')
+def start_profile(request: Request, memory: bool = True):
+    """
+    Start profiling renders of real traffic (admin only).
+
+    Only cache misses render, so profiled phases are the feeds built while
+    profiling is on. With ?memory=0 allocations are not traced.
+    """
+    require_admin(request)
+    profiler.start(memory=memory)
+    return {'profiling': True, 'memory': profiler.memory}
+
+
+@app.post('/admin/profile/stop')
+def stop_profile(request: Request):
+    """Stop profiling and write the reports to the profile directory (admin only)."""
+    require_admin(request)
+    profiler.stop()
+    return {'profiling': False, 'files': profiler.write(profile_dir)}
+
+
+def get_collection(name):
+    """
+    Return a feed's CalDAV collection, creating it empty if needed (no build).
+
+    Raises:
+        KeyError: If the feed does not exist
+    """
+    feed_stage(name)
+    with _caldav_lock:
+        collection = caldav_collections.get(name)
+        if collection is None:
+            collection = caldav_collections[name] = caldav.CalendarCollection(name, caldav_epoch)
+        return collection
+
+
+def refresh_collection(name):
+    """
+    Return a feed's CalDAV collection, rebuilt from its generator once its TTL expired.
+
+    Raises:
+        KeyError: If the feed does not exist
+    """
+    collection = get_collection(name)
+
+    def rebuild():
+        generator = build_feed(name, session=session, cache=weather_cache)
+        collection.update(generator.name, generator.events, stable_dtstamp(name, generator))
+        return collection.sync_token.encode('utf-8')
+
+    collection_cache.get(name, feed_ttl(name), rebuild)
+    return collection
+
+
+async def read_dav_body(request):
+    """
+    Read a PROPFIND/REPORT body.
+
+    Raises:
+        HTTPException: 413 if it exceeds CALDAV_MAX_REQUEST_BYTES
+    """
+    body = await request.body()
+    if len(body) > CALDAV_MAX_REQUEST_BYTES:
+        raise HTTPException(status_code=413, detail='Request body too large')
+    return body
+
+
+def dav_call(handler, *args):
+    """
+    Run a CalDAV handler, mapping its errors to HTTP responses.
+
+    Returns:
+        207 multistatus response, or 403 with a DAV:error body for failed preconditions
+    """
+    try:
+        body = handler(*args)
+    except caldav.DAVError as e:
+        return Response(e.body(), status_code=403, media_type=caldav.XML_MEDIA_TYPE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(body, status_code=207, media_type=caldav.XML_MEDIA_TYPE, headers=CALDAV_HEADERS)
+
+
+def load_collection(name):
+    """
+    refresh_collection() for a request.
+
+    Raises:
+        HTTPException: 404 for unknown feeds, 502 if the feed failed to build
+    """
+    try:
+        return refresh_collection(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f'Unknown feed: {name}')
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f'Failed to render {name}: {e}')
+
+
+def collection_call(name, handler, *args):
+    """Refresh a collection, then run a CalDAV handler on it (see dav_call)."""
+    return dav_call(handler, f'{CALDAV_HOME}{name}/', load_collection(name), *args)
+
+
+@app.api_route('/.well-known/caldav', methods=['GET', 'PROPFIND'])
+def caldav_well_known():
+    """Point CalDAV clients at the calendar home (RFC 6764)."""
+    return RedirectResponse(CALDAV_HOME, status_code=301)
+
+
+@app.options('/caldav/{path:path}')
+def caldav_options(path: str):
+    """Advertise CalDAV support."""
+    return Response(headers=CALDAV_HEADERS)
+
+
+@app.api_route('/caldav/', methods=['PROPFIND'])
+async def caldav_home(request: Request):
+    """
+    List the calendar collections, one per listed feed.
+
+    Collections not built yet report revision 0, so listing the home
+    does not build every feed.
+    """
+    body = await read_dav_body(request)
+    collections = [get_collection(name) for name in list_feeds()]
+    return dav_call(caldav.propfind_home, CALDAV_HOME, collections, request.headers.get('depth', '1'), body)
+
+
+@app.api_route('/caldav/{name}/', methods=['PROPFIND', 'REPORT'])
+async def caldav_collection(name: str, request: Request):
+    """
+    Serve a feed as a read-only CalDAV calendar collection.
+
+    PROPFIND lists the collection and, with Depth: 1, its events with
+    their ETags; REPORT answers sync-collection (only the events added,
+    changed or removed since the client's sync token), calendar-query and
+    calendar-multiget.
+    """
+    body = await read_dav_body(request)
+    if request.method == 'PROPFIND':
+        return await run_in_threadpool(
+            collection_call, name, caldav.propfind_collection, request.headers.get('depth', '1'), body
+        )
+    return await run_in_threadpool(collection_call, name, caldav.report, body)
+
+
+@app.get('/caldav/{name}/{resource}')
+def caldav_member(name: str, resource: str, request: Request):
+    """Serve one event of a CalDAV collection as a calendar object resource."""
+    member = load_collection(name).get(resource)
+    if member is None:
+        raise HTTPException(status_code=404, detail=f'Unknown event: {resource}')
+    headers = {'ETag': member.etag}
+    if etag_matches(request.headers.get('if-none-match'), member.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(member.body, media_type=caldav.MEMBER_MEDIA_TYPE, headers=headers)
+
+
+@app.get('/ics/')
+def feeds():
+    """List available feeds."""
+    return {'feeds': [f'{name}.ics' for name in list_feeds()]}
+
+
+@app.get('/ics/weather.ics')
+def get_location_feed(request: Request, lat: float = None, lon: float = None, city: str = None,
+                      hourly: int = None):
+    """
+    Serve a weather feed for any coordinate or city name.
+
+    Coordinates are snapped to WEATHER_GRID_STEP, so all subscribers in one
+    grid cell share a single cached feed and a single upstream fetch.
+    ?hourly=1 or ?hourly=3 serves the hourly feed instead of the daily one.
+    """
+    try:
+        if hourly is not None and hourly not in WEATHER_HOURLY_STEPS:
+            raise ValueError(f"hourly must be one of {', '.join(map(str, WEATHER_HOURLY_STEPS))}")
+        if city:
+            location = resolve_location(city)
+        elif lat is not None and lon is not None:
+            location = make_location(lat, lon)
+        else:
+            raise ValueError('Either city or lat and lon are required')
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    key = f"weather@{location['key']}" + (f'_{hourly}h' if hourly else '')
+    try:
+        feed = feed_cache.get(key, FEED_TTLS['weather'], lambda: render_location_feed(key, location, hourly))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to render weather for {location['name']}: {e}")
+
+    return feed_response(request, feed, feed.expires_at - time.time())
+
+
+def feed_variant(expand=False, window_from=None, window_to=None, days=None):
+    """
+    Resolve the query parameters of a feed request.
+
+    Returns:
+        (generator options, cache key suffix) tuple
+
+    Raises:
+        HTTPException: 400 if the date window is invalid or too long
+    """
+    options = {}
+    suffix = ''
+    if expand:
+        options['expand_recurrence'] = True
+        suffix += '?expand'
+    if window_from or window_to or days is not None:
+        try:
+            first, last = resolve_window(window_from, window_to, days)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if (last - first).days >= FEED_WINDOW_MAX_DAYS:
+            raise HTTPException(status_code=400, detail=f'Window is longer than {FEED_WINDOW_MAX_DAYS} days')
+        options.update(window=(first, last), from_year=first.year, to_year=last.year)
+        suffix += f'@{first:%Y%m%d}-{last:%Y%m%d}'
+    return options, suffix
+
+
+@app.get('/ics/{name}.ics')
+def get_feed(name: str, request: Request, expand: bool = False,
+             window_from: str = Query(None, alias='from'),
+             window_to: str = Query(None, alias='to'),
+             days: int = None):
+    """
+    Serve one feed, or several merged into one, from the rendered-feed cache.
+
+    Feed names joined with '+' (e.g. holidays+solar_terms+weather_Ningbo)
+    are served as one composite calendar, with events present in more than
+    one source included once. With ?expand=1, recurring events are written
+    out occurrence by occurrence for clients that do not support RRULE.
+    With ?from=, ?to= and/or ?days=, only events with an occurrence in that
+    date window are included (e.g. ?days=30 for the next 30 days).
+    """
+    parts = split_composite(name)
+    if len(parts) > COMPOSITE_MAX_FEEDS:
+        raise HTTPException(status_code=400, detail=f'At most {COMPOSITE_MAX_FEEDS} feeds can be combined')
+    try:
+        ttl = min(feed_ttl(part) for part in parts or [name])
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f'Unknown feed: {e.args[0]}')
+
+    options, suffix = feed_variant(expand, window_from, window_to, days)
+    try:
+        if len(parts) == 1:
+            key = f'{parts[0]}{suffix}'
+            feed = feed_cache.get(key, ttl, lambda: render_feed(parts[0], key, options))
+        else:
+            feed = composite_feed(parts, suffix, options, ttl)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f'Failed to render {name}: {e}')
+
+    return feed_response(request, feed, feed.expires_at - time.time())
+
+
+def main():
+    """Run the server with uvicorn."""
+    import uvicorn
+
+    global profile_dir
+
+    parser = argparse.ArgumentParser(description='Serve ICS calendar feeds over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Bind port (default: 8000)')
+    parser.add_argument('--profile', nargs='?', const=PROFILE_DIR, metavar='DIR',
+                        help='Profile every render from startup and write the reports to DIR '
+                             f'on shutdown or /admin/profile/stop (default: {PROFILE_DIR})')
+    args = parser.parse_args()
+
+    if args.profile:
+        profile_dir = args.profile
+        profiler.start()
+    try:
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        if args.profile:
+            profiler.stop()
+            paths = profiler.write(profile_dir)
+            print(f"🔬 {len(paths)} profile files written to {profile_dir}")
+
+
+if __name__ == '__main__':
+    main()
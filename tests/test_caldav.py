@@ -0,0 +1,254 @@
+"""CalDAV collections served by server.py, exercised locally through TestClient."""
+
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from config import settings
+from utils import caldav
+from utils.caldav import CALDAV, DAV, CalendarCollection, DAVError, tag
+from utils.calendar_helper import BaseCalendarGenerator
+
+FEED = 'holidays'
+PATH = f'/caldav/{FEED}/'
+DTSTAMP = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+EVENTS = [
+    ('元旦', '2026-01-01', '2026-01-02', ''),
+    ('春节', '2026-02-16', '2026-02-22', ''),
+    ('清明节', '2026-04-04', '2026-04-06', ''),
+]
+
+SYNC_REPORT = '''<?xml version="1.0" encoding="utf-8"?>
+<d:sync-collection xmlns:d="DAV:">
+  <d:sync-token>{token}</d:sync-token>
+  <d:sync-level>1</d:sync-level>
+  <d:prop><d:getetag/></d:prop>
+</d:sync-collection>'''
+
+QUERY_REPORT = '''<?xml version="1.0" encoding="utf-8"?>
+<c:calendar-query xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+  <d:prop><d:getetag/></d:prop>
+  <c:filter>
+    <c:comp-filter name="VCALENDAR">
+      <c:comp-filter name="VEVENT">
+        <c:time-range start="{start}" end="{end}"/>
+      </c:comp-filter>
+    </c:comp-filter>
+  </c:filter>
+</c:calendar-query>'''
+
+MULTIGET_REPORT = '''<?xml version="1.0" encoding="utf-8"?>
+<c:calendar-multiget xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+  <d:prop><d:getetag/><c:calendar-data/></d:prop>
+  {hrefs}
+</c:calendar-multiget>'''
+
+
+class FakeGenerator(BaseCalendarGenerator):
+    """Feed built from a fixed list of (summary, start, end, description[, rrule]) events."""
+
+    filename = f'{FEED}.ics'
+
+    def __init__(self, events):
+        super().__init__('测试日历')
+        for summary, start, end, description, *rrule in events:
+            self.add_event(summary, start, end, description, rrule=rrule[0] if rrule else None)
+
+
+def build(*events):
+    """EventStore of a FakeGenerator."""
+    return FakeGenerator(events).events
+
+
+def parse_multistatus(response):
+    """
+    Parse a 207 response.
+
+    Returns:
+        (dict of href to its getetag, or its status for status-only
+        responses; sync token or None) tuple
+    """
+    assert response.status_code == 207
+    root = ET.fromstring(response.content)
+    results = {}
+    for item in root.findall(tag(DAV, 'response')):
+        href = item.findtext(tag(DAV, 'href'))
+        status = item.findtext(tag(DAV, 'status'))
+        results[href] = status if status else item.findtext(f".//{tag(DAV, 'getetag')}")
+    return results, root.findtext(tag(DAV, 'sync-token'))
+
+
+@pytest.fixture
+def feed(monkeypatch, tmp_path):
+    """
+    Serve FEED from a mutable event list instead of its generator.
+
+    Returns:
+        List of events to edit; call server.collection_cache.invalidate()
+        for the next request to rebuild the collection
+    """
+    events = list(EVENTS)
+    monkeypatch.setattr(settings, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(server, 'build_feed', lambda name, **kwargs: FakeGenerator(events))
+    monkeypatch.setattr(server, 'caldav_collections', {})
+    server.collection_cache.invalidate()
+    server._dtstamps.clear()
+    yield events
+    server.collection_cache.invalidate()
+
+
+@pytest.fixture
+def client(feed):
+    return TestClient(server.app)
+
+
+def dav(client, method, path, body='', depth=None):
+    headers = {'Content-Type': 'application/xml; charset=utf-8'}
+    if depth is not None:
+        headers['Depth'] = depth
+    return client.request(method, path, content=body.encode('utf-8'), headers=headers)
+
+
+def test_propfind_lists_members_with_etags(client):
+    response = dav(client, 'PROPFIND', PATH, depth='1')
+    results, _ = parse_multistatus(response)
+    root = ET.fromstring(response.content)
+
+    assert 'calendar-access' in response.headers['dav']
+    assert root.find(f".//{tag(CALDAV, 'calendar')}") is not None
+    assert root.findtext(f".//{tag(DAV, 'displayname')}") == '测试日历'
+    members = {href: etag for href, etag in results.items() if href != PATH}
+    assert len(members) == len(EVENTS)
+    assert all(etag.startswith('"') for etag in members.values())
+
+    href, etag = next(iter(members.items()))
+    member = client.get(href)
+    assert member.status_code == 200
+    assert member.headers['etag'] == etag
+    assert member.text.startswith('BEGIN:VCALENDAR')
+    assert client.get(href, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_propfind_depth_zero_and_home(client):
+    results, _ = parse_multistatus(dav(client, 'PROPFIND', PATH, depth='0'))
+    assert list(results) == [PATH]
+
+    results, _ = parse_multistatus(dav(client, 'PROPFIND', '/caldav/', depth='1'))
+    assert '/caldav/' in results and PATH in results
+
+
+def test_sync_collection_round_trip(client, feed):
+    initial, token = parse_multistatus(dav(client, 'REPORT', PATH, SYNC_REPORT.format(token='')))
+    assert len(initial) == len(EVENTS)
+    assert token.startswith(caldav.SYNC_TOKEN_PREFIX)
+
+    # Nothing changed: no responses, same token
+    results, same = parse_multistatus(dav(client, 'REPORT', PATH, SYNC_REPORT.format(token=token)))
+    assert results == {} and same == token
+
+    # Drop 元旦, edit 清明节 (same UID), add 劳动节, keep 春节
+    feed[:] = [EVENTS[1], EVENTS[2][:3] + ('调休：4月6日',), ('劳动节', '2026-05-01', '2026-05-05', '')]
+    server.collection_cache.invalidate()
+    results, new_token = parse_multistatus(dav(client, 'REPORT', PATH, SYNC_REPORT.format(token=token)))
+    assert new_token != token
+    removed = [href for href, value in results.items() if value == 'HTTP/1.1 404 Not Found']
+    changed = {href: etag for href, etag in results.items() if href not in removed}
+    assert len(removed) == 1 and removed[0] in initial
+    assert len(changed) == 2
+    edited = [href for href in changed if href in initial]
+    assert len(edited) == 1 and changed[edited[0]] != initial[edited[0]]
+
+    # The untouched member keeps its ETag and is not reported
+    current, _ = parse_multistatus(dav(client, 'PROPFIND', PATH, depth='1'))
+    kept = set(initial) - set(removed) - set(edited)
+    assert len(kept) == 1 and all(current[href] == initial[href] for href in kept)
+
+    results, _ = parse_multistatus(dav(client, 'REPORT', PATH, SYNC_REPORT.format(token=new_token)))
+    assert results == {}
+
+
+def test_sync_collection_rejects_invalid_tokens(client):
+    _, token = parse_multistatus(dav(client, 'REPORT', PATH, SYNC_REPORT.format(token='')))
+    for invalid in ('bogus', token.rsplit(':', 2)[0] + ':otherepoch:0', token[:-1] + '99'):
+        response = dav(client, 'REPORT', PATH, SYNC_REPORT.format(token=invalid))
+        assert response.status_code == 403
+        assert ET.fromstring(response.content).find(tag(DAV, 'valid-sync-token')) is not None
+
+
+def test_calendar_query_time_range(client):
+    body = QUERY_REPORT.format(start='20260201T000000Z', end='20260405T000000Z')
+    results, _ = parse_multistatus(dav(client, 'REPORT', PATH, body))
+    # 春节 lies inside the range and 清明节 starts on its last day; 元旦 is before it
+    assert len(results) == 2
+
+    body = QUERY_REPORT.format(start='20260407T000000Z', end='20260408T000000Z')
+    results, _ = parse_multistatus(dav(client, 'REPORT', PATH, body))
+    assert results == {}
+
+
+def test_calendar_query_open_ended_time_range(client, feed):
+    feed.append(('周会', '2026-01-05', '2026-01-06', '', {'freq': 'weekly'}))
+    server.collection_cache.invalidate()
+    open_ended = QUERY_REPORT.replace(' end="{end}"', '')
+
+    # Only the weekly event recurs after the holidays
+    results, _ = parse_multistatus(dav(client, 'REPORT', PATH, open_ended.format(start='20270101T000000Z')))
+    assert len(results) == 1
+    results, _ = parse_multistatus(dav(client, 'REPORT', PATH, open_ended.format(start='20260301T000000Z')))
+    assert len(results) == 2
+    results, _ = parse_multistatus(dav(client, 'REPORT', PATH, open_ended.format(start='99991225T000000Z')))
+    assert len(results) == 1
+
+
+def test_calendar_multiget_reports_unknown_hrefs(client):
+    listed, _ = parse_multistatus(dav(client, 'PROPFIND', PATH, depth='1'))
+    known = next(href for href in listed if href != PATH)
+    unknown = f'{PATH}missing.ics'
+    hrefs = ''.join(f'<d:href>{href}</d:href>' for href in (known, unknown))
+    response = dav(client, 'REPORT', PATH, MULTIGET_REPORT.format(hrefs=hrefs))
+    results, _ = parse_multistatus(response)
+
+    assert results[known] == listed[known]
+    assert results[unknown] == 'HTTP/1.1 404 Not Found'
+    assert b'BEGIN:VEVENT' in response.content
+
+
+def test_read_only_and_unknown_feeds(client):
+    assert client.put(f'{PATH}x.ics', content=b'BEGIN:VCALENDAR').status_code == 405
+    assert dav(client, 'PROPFIND', '/caldav/no_such_feed/', depth='0').status_code == 404
+    assert dav(client, 'REPORT', PATH, '<d:expand-property xmlns:d="DAV:"/>').status_code == 403
+
+
+def test_tombstones_expire_oldest_tokens():
+    collection = CalendarCollection(FEED, 'epoch', max_tombstones=1)
+    collection.update('测试日历', build(*EVENTS), DTSTAMP)
+    first = collection.sync_token
+    collection.update('测试日历', build(*EVENTS[1:]), DTSTAMP)
+    second = collection.sync_token
+
+    # One removal is remembered, so both tokens still sync
+    changed, removed, _ = collection.changes_since(first)
+    assert changed == [] and len(removed) == 1
+    assert collection.changes_since(second)[:2] == ([], [])
+
+    # A second removal forgets the first, and tokens from before it expire
+    collection.update('测试日历', build(*EVENTS[2:]), DTSTAMP)
+    assert collection.oldest == 2
+    with pytest.raises(DAVError):
+        collection.changes_since(first)
+    changed, removed, _ = collection.changes_since(second)
+    assert changed == [] and len(removed) == 1
+
+
+def test_unchanged_build_keeps_revision():
+    collection = CalendarCollection(FEED, 'epoch')
+    assert collection.update('测试日历', build(*EVENTS), DTSTAMP)
+    token, etags = collection.sync_token, {href: member.etag for href, member in collection.members.items()}
+    later = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    assert not collection.update('测试日历', build(*EVENTS), later)
+    assert collection.sync_token == token
+    assert {href: member.etag for href, member in collection.members.items()} == etags
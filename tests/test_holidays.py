@@ -0,0 +1,36 @@
+"""Holiday feeds agree with the workday engine on which days are off."""
+
+from datetime import date, timedelta
+
+from config.holidays import PUBLIC_HOLIDAYS
+from generators.holidays import HolidaysGenerator
+from utils.workdays import WorkdayCalendar
+
+
+def build_holidays():
+    generator = HolidaysGenerator()
+    generator.run_build()
+    return generator
+
+
+def test_holiday_dtend_is_the_day_after_the_last_day_off():
+    generator = build_holidays()
+    spans = {(record.summary, record.start): record.end for record in generator.events}
+
+    # 元旦 2026: off January 1-3, back to work on the 4th (调休)
+    assert spans[('元旦', date(2026, 1, 1))] == date(2026, 1, 4)
+    # A one-day holiday ends the next day, not on the day itself
+    assert spans[('元旦', date(2025, 1, 1))] == date(2025, 1, 2)
+    assert b'DTEND;VALUE=DATE:20260104\r\n' in generator.to_ical()
+
+
+def test_holiday_spans_match_the_workday_calendar():
+    years = sorted(PUBLIC_HOLIDAYS)
+    calendar = WorkdayCalendar(PUBLIC_HOLIDAYS, years[0], years[-1])
+    for record in build_holidays().events:
+        days = [record.start + timedelta(days=n) for n in range((record.end - record.start).days)]
+        assert all(calendar.is_holiday(day) for day in days), record.summary
+        assert all(calendar.holiday_name(day) == record.summary for day in days)
+        # DTEND itself is the first day back (or a plain weekend day)
+        if record.end.year <= years[-1]:
+            assert not calendar.is_holiday(record.end), record.summary
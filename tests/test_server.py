@@ -0,0 +1,59 @@
+"""Feed routes of server.py, exercised locally through TestClient."""
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from config import settings
+from generators.registry import REGISTRY, GeneratorSpec, get_generators
+from utils.calendar_helper import BaseCalendarGenerator, resolve_window
+
+
+class PluginGenerator(BaseCalendarGenerator):
+    """Generator of a stage FEED_TTLS has no entry for, as a plugin may register."""
+
+    stage = 'custom'
+    filename = 'plugin_feed.ics'
+
+    def __init__(self):
+        super().__init__('插件日历')
+
+    def build(self):
+        self.add_event('插件事件', '2026-03-01')
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, 'OUTPUT_DIR', str(tmp_path))
+    get_generators()
+    monkeypatch.setitem(REGISTRY, 'plugin_feed', GeneratorSpec('plugin_feed', PluginGenerator.stage, PluginGenerator))
+    server.feed_cache.invalidate()
+    yield TestClient(server.app)
+    server.feed_cache.invalidate()
+
+
+def test_feed_of_a_stage_without_ttl_uses_the_default(client):
+    assert server.feed_ttl('plugin_feed') == settings.FEED_TTLS['default']
+    response = client.get('/ics/plugin_feed.ics')
+    assert response.status_code == 200
+    assert '插件事件' in response.text
+    assert client.get('/ics/holidays+plugin_feed.ics').status_code == 200
+    assert client.get('/ics/no_such_feed.ics').status_code == 404
+
+
+@pytest.mark.parametrize('query', ['days=1000000000', 'from=9999-12-31&days=5', 'from=9999-12-31&to=9999-12-31'])
+def test_windows_past_the_last_date_are_rejected(client, query):
+    response = client.get(f'/ics/holidays.ics?{query}')
+    assert response.status_code == 400
+    assert 'Window must end by' in response.json()['detail']
+
+
+def test_resolve_window_bounds():
+    assert resolve_window(days=3, today=date(2026, 1, 30)) == (date(2026, 1, 30), date(2026, 2, 1))
+    assert resolve_window('9999-12-29', days=2) == (date(9999, 12, 29), date(9999, 12, 30))
+    with pytest.raises(ValueError):
+        resolve_window('9999-12-29', days=3)
+    with pytest.raises(ValueError):
+        resolve_window(days=10 ** 9)
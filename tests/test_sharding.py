@@ -0,0 +1,150 @@
+"""Sharded generation end to end: N local generate.py processes, then --merge."""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import shutil
+import subprocess
+
+import pytest
+
+from utils.manifest import MANIFEST_NAME
+from utils.sharding import PARTIAL_MANIFEST_PATTERN, Shard, shard_of
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARDS = 2
+
+
+def generate(*args):
+    """Run generate.py in a new process and return the CompletedProcess."""
+    return subprocess.run(
+        [sys.executable, 'generate.py', *args],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+    )
+
+
+def run_shards(directory, count=SHARDS):
+    """
+    Generate the holiday feeds as count shards, one process and directory each.
+
+    Returns:
+        List of the shard output directories
+    """
+    directories = [str(directory / f'shard{index}') for index in range(1, count + 1)]
+    processes = [
+        subprocess.Popen(
+            [sys.executable, 'generate.py', '--type', 'holidays', '--jobs', '1',
+             '--shard', f'{index}/{count}', '--output-dir', path],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        for index, path in enumerate(directories, 1)
+    ]
+    assert [process.wait(timeout=300) for process in processes] == [0] * count
+    return directories
+
+
+def merge(target, *directories):
+    return generate('--merge', *directories, '--output-dir', str(target))
+
+
+def glob_one(directory, pattern):
+    paths = glob.glob(os.path.join(directory, pattern))
+    assert len(paths) == 1
+    return paths[0]
+
+
+def partial_manifest(directory):
+    with open(glob_one(directory, PARTIAL_MANIFEST_PATTERN), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(scope='module')
+def shards(tmp_path_factory):
+    """Shard output directories of one run, shared read-only by the tests."""
+    return run_shards(tmp_path_factory.mktemp('run'))
+
+
+def test_shard_assignment_is_stable():
+    assert shard_of('weather_Ningbo', 4) == shard_of('weather_Ningbo', 4)
+    assert all(1 <= shard_of(f'feed{i}', 3) <= 3 for i in range(50))
+    assert Shard.parse('2/3').owns('holidays') == (shard_of('holidays', 3) == 2)
+    with pytest.raises(ValueError):
+        Shard.parse('4/3')
+
+
+def test_merge_matches_the_shards(shards, tmp_path):
+    target = tmp_path / 'merged'
+    result = merge(target, *shards)
+    assert result.returncode == 0, result.stdout
+
+    with open(target / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+        merged = json.load(f)['files']
+    written = {}
+    for directory in shards:
+        written.update(partial_manifest(directory)['files'])
+    assert merged == written
+    feeds = [feed for directory in shards for feed in partial_manifest(directory)['feeds']]
+    assert sorted(feeds) == sorted(os.path.splitext(name)[0] for name in written)
+    for directory in shards:
+        for filename in partial_manifest(directory)['files']:
+            assert read(target / filename) == read(os.path.join(directory, filename))
+
+    # Merging the same shards again copies nothing
+    again = merge(target, *shards)
+    assert again.returncode == 0
+    assert ': 0 files updated' in again.stdout
+
+
+def test_merge_rejects_a_missing_shard(shards, tmp_path):
+    target = tmp_path / 'merged'
+    result = merge(target, *shards[1:])
+    assert result.returncode == 1
+    assert 'missing shards: 1 of 2' in result.stdout
+    assert not target.exists() or not any(target.iterdir())
+
+
+def test_merge_rejects_overlapping_files(shards, tmp_path):
+    first, second = (shutil.copytree(directory, tmp_path / os.path.basename(directory)) for directory in shards)
+    path = glob_one(second, PARTIAL_MANIFEST_PATTERN)
+    data = partial_manifest(second)
+    filename, entry = next(iter(partial_manifest(first)['files'].items()))
+    data['files'][filename] = entry
+    shutil.copy(os.path.join(first, filename), os.path.join(second, filename))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    target = tmp_path / 'merged'
+    result = merge(target, first, second)
+    assert result.returncode == 1
+    assert f'{filename}: written by both' in result.stdout
+    assert not target.exists() or not any(target.iterdir())
+
+
+def test_merge_replaces_stale_compressed_variants(shards, tmp_path):
+    target = tmp_path / 'merged'
+    assert merge(target, *shards).returncode == 0
+
+    # A later run: same events, new DTSTAMP, so each .ics changes but its
+    # compressed variants most likely keep their size
+    time.sleep(1.1)
+    fresh = run_shards(tmp_path / 'later')
+    result = merge(target, *fresh)
+    assert result.returncode == 0, result.stdout
+
+    for old, directory in zip(shards, fresh):
+        for filename, entry in partial_manifest(directory)['files'].items():
+            content = read(target / filename)
+            assert content != read(os.path.join(old, filename))
+            assert gzip.decompress(read(target / f'{filename}.gz')) == content
+            # Compared as bytes, so .br is checked even without brotli
+            for encoding in entry.get('compressed', {}):
+                variant = f'{filename}.{encoding}'
+                assert read(target / variant) == read(os.path.join(directory, variant))
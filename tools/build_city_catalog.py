@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Regenerate config/city_data.py from config/cities.tsv.
+
+Cities from a GeoNames dump (e.g. cities15000.txt from
+https://download.geonames.org/export/dump/) can be appended to the
+catalog; cities already listed in cities.tsv keep their entry.
+
+Usage:
+    python3 tools/build_city_catalog.py
+    python3 tools/build_city_catalog.py --geonames cities15000.txt --admin1 admin1CodesASCII.txt --country CN
+"""
+
+import os
+import re
+import sys
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.cities import City, compile_catalog, dump_columns
+
+SOURCE = os.path.join(ROOT, 'config', 'cities.tsv')
+OUTPUT = os.path.join(ROOT, 'config', 'city_data.py')
+
+HEADER = '''"""
+City catalog for weather calendars, {count} cities.
+
+Generated by tools/build_city_catalog.py from config/cities.tsv; do not
+edit by hand.
+
+One line per city in catalog order; load with utils.cities.parse_columns().
+ALIASES are tab-separated, COORDS holds latitude and longitude in 1e-4
+degrees, KDTREE the catalog positions in k-d tree order (see
+utils.cities.kdtree_order).
+"""
+
+'''
+
+CJK = re.compile(r'[一-鿿]')
+
+
+def read_tsv(path):
+    """
+    Read the curated catalog.
+
+    Returns:
+        List of City
+    """
+    cities = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            fields = line.split('\t')
+            if len(fields) < 5:
+                raise ValueError(f'{path}:{line_number}: expected key, name, province, lat, lon')
+            key, name, province, lat, lon = fields[:5]
+            aliases = tuple(alias.strip() for alias in fields[5].split(',') if alias.strip()) if len(fields) > 5 else ()
+            cities.append(City(key, name, province, float(lat), float(lon), aliases))
+    return cities
+
+
+def read_admin1(path):
+    """Map GeoNames admin1 codes ('CN.02') to names."""
+    names = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) >= 2:
+                names[fields[0]] = fields[1]
+    return names
+
+
+def read_geonames(path, countries=None, min_population=0, admin1=None):
+    """
+    Read cities from a GeoNames dump.
+
+    The first Chinese alternate name, if any, becomes the display name.
+    Keys are the ASCII name without punctuation, qualified by province
+    and then by GeoNames id when names repeat.
+
+    Returns:
+        List of City
+    """
+    admin1 = admin1 or {}
+    cities = []
+    keys = set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 15:
+                continue
+            country = fields[8]
+            if countries and country not in countries:
+                continue
+            if int(fields[14] or 0) < min_population:
+                continue
+            alternates = [name for name in fields[3].split(',') if name]
+            chinese = [name for name in alternates if CJK.search(name)]
+            province = admin1.get(f'{country}.{fields[10]}', fields[10])
+            base = re.sub(r'[^A-Za-z0-9]', '', fields[2]) or fields[0]
+            for key in (base, f"{base}-{re.sub(r'[^A-Za-z0-9]', '', province)}", f'{base}-{fields[0]}'):
+                if key not in keys:
+                    break
+            keys.add(key)
+            aliases = tuple(dict.fromkeys(name for name in [fields[1], fields[2]] + chinese[1:] if name))
+            cities.append(City(key, chinese[0] if chinese else fields[1], province,
+                               float(fields[4]), float(fields[5]), aliases))
+    return cities
+
+
+def build(cities):
+    """
+    Render the catalog module source.
+
+    Args:
+        cities: List of City in catalog order
+
+    Returns:
+        Python source text
+    """
+    columns = dump_columns(compile_catalog(cities))
+    blocks = []
+    for column, text in columns.items():
+        # Readable block literal unless a name needs escaping
+        literal = f'"""\\\n{text}"""' if '"' not in text and '\\' not in text else repr(text)
+        blocks.append(f'{column} = {literal}\n')
+    return HEADER.format(count=len(cities)) + '\n'.join(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default=SOURCE, help='Curated catalog (default: config/cities.tsv)')
+    parser.add_argument('--geonames', help='GeoNames cities dump to append')
+    parser.add_argument('--admin1', help='GeoNames admin1CodesASCII.txt, for province names')
+    parser.add_argument('--country', nargs='+', help='GeoNames country codes to keep (e.g. CN)')
+    parser.add_argument('--min-population', type=int, default=0, help='Smallest GeoNames city to keep')
+    parser.add_argument('--output', default=OUTPUT)
+    args = parser.parse_args()
+
+    cities = read_tsv(args.source)
+    if args.geonames:
+        admin1 = read_admin1(args.admin1) if args.admin1 else None
+        listed = {city.key for city in cities}
+        # Curated names win; keys taken by the curated list are skipped
+        cities += [city for city in read_geonames(args.geonames, args.country, args.min_population, admin1)
+                   if city.key not in listed]
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(build(cities))
+    print(f'✅ Wrote {len(cities)} cities to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
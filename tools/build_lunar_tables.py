@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Regenerate config/lunar_data.py from the astronomical lunar engine.
+
+Usage:
+    python3 tools/build_lunar_tables.py --from-year 1900 --to-year 2100
+"""
+
+import os
+import sys
+import argparse
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.lunar import compute_lunar_year, compute_solar_terms, pack_lunar_year
+
+OUTPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'lunar_data.py')
+
+HEADER = '''"""
+Precomputed Chinese calendar tables, {first}-{last}.
+
+Generated by tools/build_lunar_tables.py; do not edit by hand.
+
+LUNAR_YEAR_INFO packs one lunar year per int (see utils.lunar.pack_lunar_year).
+SOLAR_TERM_DAYS holds the day of month of the 24 solar terms of each
+Gregorian year, in order from 小寒 to 冬至 (two terms per month).
+"""
+
+FIRST_YEAR = {first}
+
+'''
+
+
+def build(first, last):
+    """
+    Render the table module source.
+
+    Args:
+        first: First year (inclusive)
+        last: Last year (inclusive)
+
+    Returns:
+        Python source text
+    """
+    info = []
+    term_rows = []
+    for year in range(first, last + 1):
+        new_year, lengths, leap = compute_lunar_year(year)
+        info.append(pack_lunar_year(year, new_year, lengths, leap))
+        term_rows.append(bytes(date.fromordinal(o).day for o in compute_solar_terms(year)).hex())
+
+    lines = [HEADER.format(first=first, last=last), 'LUNAR_YEAR_INFO = (\n']
+    for i in range(0, len(info), 8):
+        lines.append('    ' + ', '.join(f'0x{value:06x}' for value in info[i:i + 8]) + ',\n')
+    lines.append(')\n\nSOLAR_TERM_DAYS = bytes.fromhex(\n')
+    for year, row in zip(range(first, last + 1), term_rows):
+        lines.append(f"    '{row}'  # {year}\n")
+    lines.append(')\n')
+    return ''.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Regenerate precomputed lunar calendar tables')
+    parser.add_argument('--from-year', type=int, default=1900, help='First year (default: 1900)')
+    parser.add_argument('--to-year', type=int, default=2100, help='Last year (default: 2100)')
+    parser.add_argument('--output', default=OUTPUT, help='Output module path')
+    args = parser.parse_args()
+
+    source = build(args.from_year, args.to_year)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(source)
+    print(f"✅ Wrote {args.output} ({args.from_year}-{args.to_year})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Local Open-Meteo stub server for testing weather generation offline.
+
+Usage:
+    python3 tools/openmeteo_stub.py --port 8765 --latency 0.5
+    WEATHER_API_URL=http://127.0.0.1:8765/v1/forecast python3 generate.py --type weather
+"""
+
+import json
+import math
+import random
+import time
+import argparse
+import threading
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+WEATHER_CODES = [0, 1, 2, 3, 45, 61, 63, 80, 95]
+# Responses use Asia/Shanghai, like the requests this project sends
+UTC_OFFSET_SECONDS = 8 * 3600
+
+
+def build_daily(lat, lon, days):
+    """
+    Build a deterministic fake daily forecast for a location.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        days: Number of forecast days
+
+    Returns:
+        Dict shaped like Open-Meteo's single-location response
+    """
+    rng = random.Random(f'{lat:.4f},{lon:.4f}')
+    today = date.today()
+    temp_max = [round(rng.uniform(15, 35), 1) for _ in range(days)]
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'timezone': 'Asia/Shanghai',
+        'utc_offset_seconds': UTC_OFFSET_SECONDS,
+        'daily': {
+            'time': [(today + timedelta(days=i)).isoformat() for i in range(days)],
+            'temperature_2m_max': temp_max,
+            'temperature_2m_min': [round(t - rng.uniform(3, 10), 1) for t in temp_max],
+            'weathercode': [rng.choice(WEATHER_CODES) for _ in range(days)],
+        },
+    }
+
+
+def build_hourly(lat, lon, days, unixtime=False):
+    """
+    Build a deterministic fake hourly forecast for a location.
+    
+    Weather codes hold for a few hours at a time and temperatures follow
+    a daily cycle, like real forecasts.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        days: Number of forecast days
+        unixtime: Times as unix seconds (timeformat=unixtime) instead of
+            local ISO strings
+        
+    Returns:
+        Dict shaped like Open-Meteo's single-location response
+    """
+    rng = random.Random(f'hourly:{lat:.4f},{lon:.4f}')
+    midnight = datetime.combine(date.today(), datetime.min.time())
+    start = int(midnight.replace(tzinfo=timezone.utc).timestamp()) - UTC_OFFSET_SECONDS
+    hours = 24 * days
+    base = rng.uniform(10, 25)
+    
+    codes, chances, winds = [], [], []
+    wind = rng.uniform(3, 20)
+    while len(codes) < hours:
+        code = rng.choice(WEATHER_CODES)
+        chance = rng.randrange(0, 30) if code < 50 else rng.randrange(40, 100)
+        for _ in range(rng.randint(2, 9)):
+            wind = min(60.0, max(0.0, wind + rng.uniform(-4, 4)))
+            codes.append(code)
+            chances.append(chance)
+            winds.append(round(wind, 1))
+    
+    times = [start + 3600 * i for i in range(hours)]
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'timezone': 'Asia/Shanghai',
+        'utc_offset_seconds': UTC_OFFSET_SECONDS,
+        'hourly': {
+            'time': times if unixtime else [
+                (midnight + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M') for i in range(hours)
+            ],
+            'temperature_2m': [
+                round(base + 6 * math.sin((i % 24 - 9) * math.pi / 12) + rng.uniform(-1, 1), 1)
+                for i in range(hours)
+            ],
+            'precipitation_probability': chances[:hours],
+            'weathercode': codes[:hours],
+            'windspeed_10m': winds[:hours],
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler answering /v1/forecast like Open-Meteo."""
+
+    latency = 0.0
+    fail_rate = 0.0
+    request_count = 0
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler._lock:
+            type(self).request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if random.random() < self.fail_rate:
+            self._send(500, {'error': True, 'reason': 'stub failure'})
+            return
+
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            lats = [float(v) for v in query['latitude'][0].split(',')]
+            lons = [float(v) for v in query['longitude'][0].split(',')]
+            days = int(query.get('forecast_days', ['7'])[0])
+        except (KeyError, ValueError):
+            self._send(400, {'error': True, 'reason': 'invalid coordinates'})
+            return
+
+        if 'hourly' in query:
+            unixtime = query.get('timeformat', [''])[0] == 'unixtime'
+            results = [build_hourly(lat, lon, days, unixtime) for lat, lon in zip(lats, lons)]
+        else:
+            results = [build_daily(lat, lon, days) for lat, lon in zip(lats, lons)]
+        self._send(200, results[0] if len(results) == 1 else results)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.0, fail_rate=0.0):
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        port: Port to bind (0 picks a free port)
+        latency: Seconds to sleep before each response
+        fail_rate: Fraction of requests answered with HTTP 500
+
+    Returns:
+        Running ThreadingHTTPServer; its API URL is
+        f'http://127.0.0.1:{server.server_port}/v1/forecast'
+    """
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'latency': latency,
+        'fail_rate': fail_rate,
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Open-Meteo stub server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds to sleep before each response')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with HTTP 500')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.fail_rate)
+    print(f"🌐 Stub serving http://127.0.0.1:{server.server_port}/v1/forecast")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
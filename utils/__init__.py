@@ -1,5 +1,28 @@
-"""Utility functions and base classes for calendar generation."""
+"""
+Utility functions and base classes for calendar generation.
 
-from .calendar_helper import BaseCalendarGenerator, save_calendar
+Names are resolved on first access (PEP 562), so importing one utility
+module does not import requests through utils.http.
+"""
 
-__all__ = ['BaseCalendarGenerator', 'save_calendar']
+import importlib
+
+_LAZY_ATTRS = {
+    'BaseCalendarGenerator': '.calendar_helper',
+    'save_calendar': '.calendar_helper',
+    'create_session': '.http',
+    'ResponseCache': '.cache',
+    'CacheMiss': '.cache',
+    'WorkdayCalendar': '.workdays',
+    'get_workday_calendar': '.workdays',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,160 @@
+"""On-disk response cache with TTL and size/age eviction."""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+
+class CacheMiss(LookupError):
+    """Raised when an offline lookup finds no cached entry."""
+
+
+class ResponseCache:
+    """
+    Persistent JSON cache for upstream API responses.
+
+    Each entry is stored as one file named by the hash of its key and keeps
+    the response payload together with the validators (ETag/Last-Modified)
+    needed for conditional requests.
+    """
+
+    def __init__(self, directory, ttl, max_age=None, max_bytes=None, offline=False):
+        """
+        Initialize response cache.
+
+        Args:
+            directory: Cache directory (created on first write)
+            ttl: Seconds an entry is served without revalidation
+            max_age: Seconds after which prune() deletes an entry
+            max_bytes: Total size prune() trims the cache down to
+            offline: Serve cached entries only, never hit the network
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.offline = offline
+
+    @staticmethod
+    def make_key(**parts):
+        """
+        Build a stable cache key from keyword parts.
+
+        Returns:
+            Hex digest string
+        """
+        raw = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        """
+        Load a cache entry.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Entry dict with 'data', 'fetched_at', 'etag' and
+            'last_modified', or None if missing or unreadable
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        """Return True if the entry is younger than the TTL."""
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def put(self, key, data, etag=None, last_modified=None):
+        """
+        Store a response payload atomically.
+
+        Args:
+            key: Cache key from make_key()
+            data: JSON-serializable payload
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+        """
+        entry = {
+            'fetched_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'data': data,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def touch(self, key, entry):
+        """Mark an entry as revalidated (e.g. after a 304 response)."""
+        self.put(key, entry['data'], entry.get('etag'), entry.get('last_modified'))
+
+    def conditional_headers(self, entry):
+        """Build If-None-Match/If-Modified-Since headers for an entry."""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def prune(self):
+        """
+        Evict entries older than max_age, then the least recently written
+        entries until the cache fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith('.json')]
+        except OSError:
+            return 0
+
+        now = time.time()
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        removed = 0
+        kept = []
+        for mtime, size, path in sorted(entries, reverse=True):
+            if self.max_age is not None and now - mtime > self.max_age:
+                removed += self._remove(path)
+            else:
+                kept.append((size, path))
+
+        if self.max_bytes is not None:
+            total = sum(size for size, _ in kept)
+            while kept and total > self.max_bytes:
+                size, path = kept.pop()
+                total -= size
+                removed += self._remove(path)
+
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
@@ -0,0 +1,509 @@
+"""Read-only CalDAV collections: one resource per event, per-event ETags and an RFC 6578 change log."""
+
+import re
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from urllib.parse import unquote
+from config.settings import CALDAV_TOMBSTONES
+from .event_store import UNBOUNDED
+from .serializers import StreamSerializer
+
+DAV = 'DAV:'
+CALDAV = 'urn:ietf:params:xml:ns:caldav'
+CALSERVER = 'http://calendarserver.org/ns/'
+
+XML_MEDIA_TYPE = 'application/xml; charset=utf-8'
+MEMBER_MEDIA_TYPE = 'text/calendar; charset=utf-8; component=vevent'
+SYNC_TOKEN_PREFIX = 'urn:x-cal:sync:'
+TIME_RANGE_FORMAT = '%Y%m%dT%H%M%SZ'
+
+for _prefix, _namespace in (('d', DAV), ('cal', CALDAV), ('cs', CALSERVER)):
+    ET.register_namespace(_prefix, _namespace)
+
+# A calendar object resource: href is its name in the collection, body a
+# VCALENDAR holding the one VEVENT, digest the sha256 of that VEVENT
+# without DTSTAMP, revision the collection revision it last changed in
+Member = namedtuple('Member', 'href etag body digest revision')
+
+# A parsed REPORT: kind is the root element's tag, props the requested
+# property tags (None for all), hrefs the calendar-multiget targets,
+# sync_token the sync-collection token ('' for an initial sync),
+# components the VCALENDAR sub-components a calendar-query filters on and
+# time_range its (start, end) aware datetimes, either possibly None
+Report = namedtuple('Report', 'kind props hrefs sync_token components time_range')
+
+
+def tag(namespace, name):
+    """ElementTree tag of a namespaced element."""
+    return f'{{{namespace}}}{name}'
+
+
+CALENDAR_DATA = tag(CALDAV, 'calendar-data')
+SYNC_COLLECTION = tag(DAV, 'sync-collection')
+CALENDAR_QUERY = tag(CALDAV, 'calendar-query')
+CALENDAR_MULTIGET = tag(CALDAV, 'calendar-multiget')
+REPORTS = (SYNC_COLLECTION, CALENDAR_QUERY, CALENDAR_MULTIGET)
+
+
+class DAVError(Exception):
+    """A failed DAV precondition, answered with 403 and a DAV:error body naming it."""
+
+    def __init__(self, condition, message):
+        super().__init__(message)
+        self.condition = condition
+
+    def body(self):
+        """Render the DAV:error body."""
+        error = ET.Element(tag(DAV, 'error'))
+        ET.SubElement(error, self.condition)
+        return ET.tostring(error, encoding='utf-8', xml_declaration=True)
+
+
+def resource_name(uid):
+    """Name of the calendar object resource of an event UID."""
+    return re.sub(r'[^\w.-]', '_', uid) + '.ics'
+
+
+class CalendarCollection:
+    """
+    A feed served as a read-only CalDAV calendar collection.
+
+    Every event is a calendar object resource named after its UID, with
+    an ETag that changes only when that event does. update() diffs each
+    new build against the current members and starts a new revision when
+    anything changed. The revision each member last changed in, plus the
+    revision each removed member disappeared in (its tombstone), form a
+    compacted change log: changes_since() answers a sync-collection with
+    one pass over the members, however many revisions the client missed.
+    Only the newest max_tombstones removals are kept; older sync tokens
+    are rejected and the client resyncs from scratch.
+    """
+
+    def __init__(self, name, epoch, max_tombstones=CALDAV_TOMBSTONES):
+        """
+        Create an empty collection.
+
+        Args:
+            name: Feed name
+            epoch: Identifier of this server run; sync tokens of other
+                runs are rejected, as revisions restart from 0
+            max_tombstones: Removed members remembered for sync-collection
+        """
+        self.name = name
+        self.epoch = epoch
+        self.max_tombstones = max_tombstones
+        self.calname = name
+        self.revision = 0
+        # Oldest revision a sync token may carry; removals before it are forgotten
+        self.oldest = 0
+        self.members = {}
+        # href -> revision it was removed in, oldest first
+        self.removed = OrderedDict()
+        # EventStore of the last build, and the member href of each of its events
+        self.store = None
+        self.hrefs = []
+        self._lock = threading.Lock()
+
+    @property
+    def sync_token(self):
+        """RFC 6578 sync token of the current revision."""
+        return f'{SYNC_TOKEN_PREFIX}{self.name}:{self.epoch}:{self.revision}'
+
+    @property
+    def ctag(self):
+        """CalendarServer getctag value, for clients predating sync-collection."""
+        return f'{self.epoch}-{self.revision}'
+
+    def update(self, calname, events, dtstamp):
+        """
+        Apply a new build of the feed.
+
+        Unchanged events keep their body, DTSTAMP and ETag; new and changed
+        events are written with dtstamp.
+
+        Args:
+            calname: Calendar name
+            events: EventStore of the build
+            dtstamp: Aware UTC datetime for the DTSTAMP of new and changed events
+
+        Returns:
+            True if a new revision was started
+        """
+        header = StreamSerializer.header(calname)
+        stamp = f'DTSTAMP:{dtstamp.strftime(TIME_RANGE_FORMAT)}\r\n'.encode('ascii')
+        with self._lock:
+            revision = self.revision + 1
+            members = {}
+            hrefs = []
+            changed = False
+            for record in events:
+                href = resource_name(record.uid)
+                hrefs.append(href)
+                # The header is hashed too, so a renamed calendar changes every member
+                digest = hashlib.sha256(header + StreamSerializer.event(record, b'')).hexdigest()
+                member = self.members.get(href)
+                if member is None or member.digest != digest:
+                    body = header + StreamSerializer.event(record, stamp) + b'END:VCALENDAR\r\n'
+                    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+                    member = Member(href, etag, body, digest, revision)
+                    changed = True
+                members[href] = member
+            removed = [href for href in self.members if href not in members]
+            self.store, self.hrefs = events, hrefs
+            if not changed and not removed:
+                return False
+
+            for href, member in members.items():
+                if member.revision == revision:
+                    self.removed.pop(href, None)
+            for href in removed:
+                self.removed[href] = revision
+            while len(self.removed) > self.max_tombstones:
+                _, forgotten = self.removed.popitem(last=False)
+                self.oldest = forgotten
+            self.members = members
+            self.calname = calname
+            self.revision = revision
+            return True
+
+    def _token_revision(self, token):
+        """Revision a sync token of this collection was issued at."""
+        prefix = f'{SYNC_TOKEN_PREFIX}{self.name}:{self.epoch}:'
+        revision = token[len(prefix):] if token.startswith(prefix) else ''
+        if not revision.isdigit() or not self.oldest <= int(revision) <= self.revision:
+            raise DAVError(tag(DAV, 'valid-sync-token'), f'Unknown or expired sync token: {token}')
+        return int(revision)
+
+    def changes_since(self, token):
+        """
+        List the changes since a sync token.
+
+        Args:
+            token: Sync token of an earlier response, '' for an initial sync
+
+        Returns:
+            (added or changed members, removed hrefs, current sync token) tuple
+
+        Raises:
+            DAVError: DAV:valid-sync-token if the token is not from this
+                collection and server run, or older than the change log
+        """
+        with self._lock:
+            if not token:
+                return list(self.members.values()), [], self.sync_token
+            revision = self._token_revision(token)
+            changed = [member for member in self.members.values() if member.revision > revision]
+            removed = [href for href, when in self.removed.items() if when > revision]
+            return changed, removed, self.sync_token
+
+    def query(self, start=None, end=None):
+        """
+        List members with an occurrence in a time range.
+
+        Events are matched by the UTC days they cover, like feed windows.
+
+        Args:
+            start: Aware datetime the range starts at (unbounded if None)
+            end: Aware datetime the range ends at, exclusive (unbounded if None)
+
+        Returns:
+            List of Member in feed order
+        """
+        with self._lock:
+            members, store, hrefs = self.members, self.store, self.hrefs
+        if start is None and end is None:
+            return [members[href] for href in hrefs]
+        if not hrefs:
+            return []
+        first = start.astimezone(timezone.utc).toordinal() if start else 1
+        if end is None:
+            last = UNBOUNDED
+        else:
+            end = end.astimezone(timezone.utc)
+            last = end.toordinal() + (end.time() != datetime.min.time())
+        return [members[hrefs[i]] for i in store.overlapping(first, last)]
+
+    def get(self, name):
+        """Member of a resource name, or None."""
+        return self.members.get(name)
+
+
+def parse_body(body):
+    """
+    Parse a PROPFIND or REPORT body.
+
+    Returns:
+        Root Element, or None for an empty body
+
+    Raises:
+        ValueError: If the body is not well-formed XML or declares a DTD
+    """
+    if not body or not body.strip():
+        return None
+    if b'<!DOCTYPE' in body:
+        raise ValueError('DTDs are not allowed')
+    try:
+        return ET.fromstring(body)
+    except ET.ParseError as e:
+        raise ValueError(f'Malformed XML body: {e}')
+
+
+def requested_props(root):
+    """Property tags a PROPFIND or REPORT asks for, or None for all (DAV:allprop, empty body)."""
+    if root is None:
+        return None
+    prop = root.find(tag(DAV, 'prop'))
+    return None if prop is None else [child.tag for child in prop]
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, TIME_RANGE_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f"Invalid time-range value '{value}', expected e.g. 20260101T000000Z")
+
+
+def parse_report(body):
+    """
+    Parse a REPORT body.
+
+    calendar-query filters are honored down to VEVENT time-range;
+    property and text-match filters are not evaluated, so matches are a
+    superset the client filters further.
+
+    Returns:
+        Report
+
+    Raises:
+        ValueError: If the body is missing or malformed
+        DAVError: DAV:supported-report for reports other than
+            sync-collection, calendar-query and calendar-multiget
+    """
+    root = parse_body(body)
+    if root is None:
+        raise ValueError('REPORT requires a body')
+    if root.tag not in REPORTS:
+        raise DAVError(tag(DAV, 'supported-report'), f'Unsupported report: {root.tag}')
+
+    hrefs = [href.text.strip() for href in root.findall(tag(DAV, 'href')) if href.text]
+    sync_token = (root.findtext(tag(DAV, 'sync-token')) or '').strip()
+    components = time_range = None
+    calendar_filter = root.find(f"{tag(CALDAV, 'filter')}/{tag(CALDAV, 'comp-filter')}[@name='VCALENDAR']")
+    if calendar_filter is not None:
+        filters = calendar_filter.findall(tag(CALDAV, 'comp-filter'))
+        if filters:
+            components = [comp.get('name', '').upper() for comp in filters]
+        for comp in filters:
+            time_element = comp.find(tag(CALDAV, 'time-range'))
+            if comp.get('name', '').upper() == 'VEVENT' and time_element is not None:
+                time_range = (_parse_time(time_element.get('start')), _parse_time(time_element.get('end')))
+    return Report(root.tag, requested_props(root), hrefs, sync_token, components, time_range)
+
+
+def _fill(element, value):
+    if isinstance(value, str):
+        element.text = value
+    else:
+        element.extend(value)
+
+
+def _element(element_tag, text=None, **attributes):
+    element = ET.Element(element_tag, attributes)
+    element.text = text
+    return element
+
+
+def _href(path):
+    return [_element(tag(DAV, 'href'), path)]
+
+
+def prop_response(href, properties, requested):
+    """
+    Build a DAV:response with the requested properties of a resource.
+
+    Args:
+        href: Path of the resource
+        properties: Dict of property tag to value: text, or a list of child Elements
+        requested: Property tags asked for, or None for all of properties
+
+    Returns:
+        Element
+    """
+    response = _element(tag(DAV, 'response'))
+    response.append(_element(tag(DAV, 'href'), href))
+    names = list(properties) if requested is None else requested
+    found = [name for name in names if name in properties]
+    missing = [name for name in names if name not in properties]
+    for status, group in (('200 OK', found), ('404 Not Found', missing)):
+        if not group:
+            continue
+        propstat = ET.SubElement(response, tag(DAV, 'propstat'))
+        prop = ET.SubElement(propstat, tag(DAV, 'prop'))
+        for name in group:
+            element = ET.SubElement(prop, name)
+            if name in properties:
+                _fill(element, properties[name])
+        ET.SubElement(propstat, tag(DAV, 'status')).text = f'HTTP/1.1 {status}'
+    return response
+
+
+def status_response(href, status='404 Not Found'):
+    """Build a DAV:response carrying only a status (removed or missing members)."""
+    response = _element(tag(DAV, 'response'))
+    response.append(_element(tag(DAV, 'href'), href))
+    response.append(_element(tag(DAV, 'status'), f'HTTP/1.1 {status}'))
+    return response
+
+
+def multistatus(responses, sync_token=None):
+    """
+    Render a DAV:multistatus body.
+
+    Args:
+        responses: DAV:response Elements
+        sync_token: Sync token to include (sync-collection reports)
+
+    Returns:
+        XML bytes
+    """
+    root = _element(tag(DAV, 'multistatus'))
+    root.extend(responses)
+    if sync_token is not None:
+        root.append(_element(tag(DAV, 'sync-token'), sync_token))
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def home_properties(home):
+    """Properties of the calendar home, which doubles as the (anonymous) principal."""
+    return {
+        tag(DAV, 'resourcetype'): [_element(tag(DAV, 'collection'))],
+        tag(DAV, 'displayname'): 'Calendars',
+        tag(DAV, 'current-user-principal'): _href(home),
+        tag(DAV, 'principal-URL'): _href(home),
+        tag(CALDAV, 'calendar-home-set'): _href(home),
+    }
+
+
+def collection_properties(collection):
+    """Properties of a calendar collection."""
+    read = _element(tag(DAV, 'privilege'))
+    read.append(_element(tag(DAV, 'read')))
+    reports = []
+    for report in REPORTS:
+        supported = _element(tag(DAV, 'supported-report'))
+        ET.SubElement(supported, tag(DAV, 'report')).append(_element(report))
+        reports.append(supported)
+    return {
+        tag(DAV, 'resourcetype'): [_element(tag(DAV, 'collection')), _element(tag(CALDAV, 'calendar'))],
+        tag(DAV, 'displayname'): collection.calname,
+        tag(DAV, 'current-user-privilege-set'): [read],
+        tag(DAV, 'supported-report-set'): reports,
+        tag(DAV, 'sync-token'): collection.sync_token,
+        tag(CALSERVER, 'getctag'): collection.ctag,
+        tag(CALDAV, 'supported-calendar-component-set'): [_element(tag(CALDAV, 'comp'), name='VEVENT')],
+    }
+
+
+def member_properties(member, requested):
+    """Properties of a calendar object resource; calendar-data only when asked for by name."""
+    properties = {
+        tag(DAV, 'resourcetype'): [],
+        tag(DAV, 'getetag'): member.etag,
+        tag(DAV, 'getcontenttype'): MEMBER_MEDIA_TYPE,
+        tag(DAV, 'getcontentlength'): str(len(member.body)),
+    }
+    if requested and CALENDAR_DATA in requested:
+        properties[CALENDAR_DATA] = member.body.decode('utf-8')
+    return properties
+
+
+def propfind_home(home, collections, depth, body):
+    """
+    Answer a PROPFIND on the calendar home.
+
+    Args:
+        home: Path of the home, e.g. '/caldav/'
+        collections: CalendarCollection of every listed feed
+        depth: Depth header value ('0' lists the home only)
+        body: Request body
+
+    Returns:
+        Multistatus XML bytes
+    """
+    requested = requested_props(parse_body(body))
+    responses = [prop_response(home, home_properties(home), requested)]
+    if depth != '0':
+        for collection in collections:
+            responses.append(prop_response(f'{home}{collection.name}/', collection_properties(collection), requested))
+    return multistatus(responses)
+
+
+def propfind_collection(path, collection, depth, body):
+    """
+    Answer a PROPFIND on a calendar collection.
+
+    Args:
+        path: Path of the collection, e.g. '/caldav/holidays/'
+        collection: CalendarCollection
+        depth: Depth header value ('0' lists the collection only)
+        body: Request body
+
+    Returns:
+        Multistatus XML bytes
+    """
+    requested = requested_props(parse_body(body))
+    responses = [prop_response(path, collection_properties(collection), requested)]
+    if depth != '0':
+        for member in collection.query():
+            responses.append(prop_response(f'{path}{member.href}', member_properties(member, requested), requested))
+    return multistatus(responses)
+
+
+def report(path, collection, body):
+    """
+    Answer a REPORT on a calendar collection.
+
+    sync-collection returns members added or changed since the client's
+    sync token with their properties and removed members as 404, plus
+    the new token; calendar-query returns the members matching its
+    filter and calendar-multiget the members asked for by href.
+
+    Args:
+        path: Path of the collection, e.g. '/caldav/holidays/'
+        collection: CalendarCollection
+        body: Request body
+
+    Returns:
+        Multistatus XML bytes
+
+    Raises:
+        ValueError: If the body is missing or malformed
+        DAVError: For unsupported reports and invalid sync tokens
+    """
+    parsed = parse_report(body)
+    requested = parsed.props
+
+    def member_response(member, href=None):
+        return prop_response(href or f'{path}{member.href}', member_properties(member, requested), requested)
+
+    if parsed.kind == SYNC_COLLECTION:
+        changed, removed, token = collection.changes_since(parsed.sync_token)
+        responses = [member_response(member) for member in changed]
+        responses += [status_response(f'{path}{href}') for href in removed]
+        return multistatus(responses, token)
+
+    if parsed.kind == CALENDAR_QUERY:
+        if parsed.components is not None and 'VEVENT' not in parsed.components:
+            return multistatus([])
+        return multistatus([member_response(member) for member in collection.query(*(parsed.time_range or ()))])
+
+    responses = []
+    for href in parsed.hrefs:
+        member = collection.get(unquote(href.rstrip('/').rsplit('/', 1)[-1]))
+        responses.append(member_response(member, href) if member else status_response(href))
+    return multistatus(responses)
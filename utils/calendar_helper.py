@@ -1,77 +1,461 @@
 """Calendar generation helper utilities."""
 
+import io
 import os
-import uuid
-from datetime import datetime, timedelta
-from icalendar import Calendar, Event
-from config.settings import OUTPUT_DIR, TIMEZONE
+import hashlib
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from config import settings
+from config.settings import TIMEZONE, ICS_SERIALIZER, RECURRENCE_EXPAND_DAYS, FEED_WINDOW_DAYS
+from .manifest import load_manifest, update_manifest
+from .serializers import EventRecord, StreamSerializer, format_rrule, get_serializer, is_timed
+from .event_store import EventStore, day_span, overlaps
+from .compress import precompress
+from .metrics import metrics
+
+DTSTAMP_FORMAT = '%Y%m%dT%H%M%SZ'
+
+
+class _ContentChanged(Exception):
+    """Streamed content no longer matches the manifest's content hash."""
 
 
 class BaseCalendarGenerator:
-    """Base class for all calendar generators."""
+    """
+    Base class for all calendar generators.
     
-    def __init__(self, name):
+    Subclasses implement build(), either calling add_event() or yielding
+    add_event() keyword dicts. By default events are collected and
+    serialized when saved; with streaming set, generate() writes each
+    VEVENT to the output file as it is added, so memory use does not
+    grow with the number of events.
+    """
+    
+    # Output filename used by generate()
+    filename = None
+    
+    def __init__(self, name, serializer=None, expand_recurrence=False, streaming=False):
         """
         Initialize calendar generator.
         
         Args:
             name: Calendar name for prodid
+            serializer: Serializer backend name ('icalendar' or 'stream',
+                defaults to ICS_SERIALIZER)
+            expand_recurrence: Write each occurrence of recurring events as
+                a separate event, for clients without RRULE support
+            streaming: Write events to the output file as they are added
+                instead of collecting them (see generate())
         """
         self.name = name
-        self.calendar = Calendar()
-        self.calendar.add('prodid', f'-//{name}//')
-        self.calendar.add('version', '2.0')
-        self.calendar.add('calscale', 'GREGORIAN')
-        self.calendar.add('x-wr-calname', name)
+        self.serializer = get_serializer(serializer or ICS_SERIALIZER)
+        self.expand_recurrence = expand_recurrence
+        self.streaming = streaming
+        self.events = EventStore()
+        # (first, last) dates to trim output to, see set_window()
+        self.window = None
+        self._uids = set()
+        self._content_hash = hashlib.sha256(name.encode('utf-8'))
+        # (output, DTSTAMP line) while streaming, see _stream_render()
+        self._sink = None
+        self._streamed = 0
+        self._last_uid_base = None
+        self._uid_repeats = 0
     
-    def add_event(self, summary, start_date, end_date=None, description=''):
+    def make_uid(self, summary, start_date, end_date):
+        """
+        Build a stable, content-derived event UID.
+        
+        The same event always gets the same UID across runs; identical
+        events within one calendar are told apart by their order. While
+        streaming, only consecutive identical events are told apart, so
+        that no set of all UIDs is kept.
+        
+        Returns:
+            UID string
+        """
+        base = f'{self.name}|{summary}|{start_date.isoformat()}|{end_date.isoformat()}'
+        if self._sink is not None:
+            self._uid_repeats = self._uid_repeats + 1 if base == self._last_uid_base else 1
+            self._last_uid_base = base
+            if self._uid_repeats > 1:
+                base = f'{base}|{self._uid_repeats}'
+            return f"{hashlib.sha1(base.encode('utf-8')).hexdigest()}@cal"
+        
+        uid = hashlib.sha1(base.encode('utf-8')).hexdigest()
+        n = 1
+        while uid in self._uids:
+            n += 1
+            uid = hashlib.sha1(f'{base}|{n}'.encode('utf-8')).hexdigest()
+        self._uids.add(uid)
+        return f'{uid}@cal'
+    
+    def add_event(self, summary, start_date, end_date=None, description='',
+                  rrule=None, exdates=None):
         """
         Add an event to the calendar.
         
         Args:
             summary: Event title
-            start_date: Start date (datetime or string YYYY-MM-DD)
-            end_date: End date (optional, defaults to start_date)
+            start_date: Start date (datetime or string YYYY-MM-DD); a
+                timezone-aware datetime makes a timed event, written in UTC
+            end_date: End date (optional, defaults to start_date), or an
+                aware datetime for a timed event (defaults to an hour later)
             description: Event description
+            rrule: Recurrence rule parts (optional), e.g.
+                {'freq': 'weekly'} or {'freq': 'monthly', 'count': 12};
+                start_date is the first occurrence
+            exdates: Occurrence dates to skip (dates or YYYY-MM-DD strings)
+            
+        Raises:
+            ValueError: If a timed event is given an rrule
         """
-        event = Event()
-        event.add('uid', str(uuid.uuid4()))
-        event.add('dtstamp', datetime.utcnow())
-        event.add('summary', summary)
-        
         # Parse dates if strings
         if isinstance(start_date, str):
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+            start_date = parse_date(start_date)
         if isinstance(end_date, str):
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+            end_date = parse_date(end_date)
+        
+        if is_timed(start_date):
+            if rrule is not None:
+                raise ValueError('Recurring timed events are not supported')
+            start_date = start_date.astimezone(timezone.utc)
+            end_date = (start_date + timedelta(hours=1) if end_date is None
+                        else end_date.astimezone(timezone.utc))
         
         # Default end_date to next day (RFC 5545: DTEND is exclusive for DATE events)
         if end_date is None:
             end_date = start_date + timedelta(days=1)
         
-        event.add('dtstart', start_date)
-        event.add('dtend', end_date)
+        if rrule is None:
+            self._append_event(summary, start_date, end_date, description)
+            return
         
-        if description:
-            event.add('description', description)
+        rule = format_rrule(rrule)
+        exdates = tuple(sorted(parse_date(d) if isinstance(d, str) else d for d in exdates or ()))
+        if self.expand_recurrence:
+            if self.window:
+                first, last = self.window
+                occurrences = expand_rrule(rule, start_date, exdates, today=first,
+                                           horizon_days=(last - first).days + 1)
+            else:
+                occurrences = expand_rrule(rule, start_date, exdates)
+            for occurrence in occurrences:
+                self._append_event(summary, occurrence, occurrence + (end_date - start_date), description)
+        else:
+            self._append_event(summary, start_date, end_date, description, rule, exdates)
+    
+    def _append_event(self, summary, start_date, end_date, description, rrule=None, exdates=()):
+        """Record one VEVENT (or write it, while streaming) and fold it into the content hash."""
+        self._content_hash.update(
+            f'\0{summary}\0{start_date}\0{end_date}\0{description}'.encode('utf-8')
+        )
+        if rrule:
+            self._content_hash.update(f'\0{rrule}\0{",".join(map(str, exdates))}'.encode('utf-8'))
+        
+        if self._sink is None:
+            uid = self.make_uid(summary, start_date, end_date)
+            self.events.add(uid, summary, start_date, end_date, description, rrule, exdates)
+            return
+        if self.window and not overlaps(
+            *day_span(start_date, end_date), rrule, exdates,
+            self.window[0].toordinal(), self.window[1].toordinal() + 1,
+        ):
+            return
+        out, stamp = self._sink
+        uid = self.make_uid(summary, start_date, end_date)
+        out.write(StreamSerializer.event(
+            EventRecord(uid, summary, start_date, end_date, description, rrule, exdates), stamp
+        ))
+        self._streamed += 1
+    
+    def set_window(self, first, last):
+        """
+        Trim output to events with an occurrence between two dates.
         
-        # Compatibility flags for Apple/Microsoft clients
-        event.add('x-funambol-allday', '1')
-        event.add('x-microsoft-cdo-alldayevent', 'TRUE')
+        Args:
+            first: First day (datetime.date)
+            last: Last day, inclusive
+        """
+        self.window = (first, last)
+    
+    def selected_events(self):
+        """
+        Return the events to render: all of them, or those in the window.
         
-        self.calendar.add_component(event)
+        Returns:
+            EventStore or list of EventRecord
+        """
+        if self.window is None:
+            return self.events
+        return self.events.between(*self.window)
+    
+    @property
+    def output_filename(self):
+        """Filename generate() saves to; windowed output gets its own file."""
+        if self.window is None:
+            return self.filename
+        return windowed_filename(self.filename, *self.window)
+    
+    @property
+    def metrics_name(self):
+        """Name this calendar is reported under in run metrics (the feed name)."""
+        return os.path.splitext(self.filename)[0] if self.filename else self.name
+    
+    def build(self):
+        """
+        Add this calendar's events. Implemented by subclasses.
+        
+        Either call add_event() or yield dicts of add_event() keyword
+        arguments; yielded events are added as they arrive.
+        """
+        raise NotImplementedError
+    
+    def run_build(self):
+        """Run build(), adding any events it yields."""
+        events = self.build()
+        if events is not None:
+            for event in events:
+                self.add_event(**event)
+    
+    def generate(self):
+        """
+        Build the calendar and save it to its output file.
+        
+        Returns:
+            True if the file was written, False if it was unchanged
+        """
+        if self.streaming:
+            return self.stream_save(self.output_filename)
+        with metrics.phase(self.metrics_name, 'build'):
+            self.run_build()
+        return self.save(self.output_filename)
+    
+    def stream_save(self, filename):
+        """
+        Build the calendar straight into its output file.
+        
+        Events are serialized as build() adds them and are not kept, so
+        peak memory stays flat however many events there are. DTSTAMP must
+        be written before the content hash is known: the previous DTSTAMP
+        is tried first, which is right whenever the content is unchanged;
+        if the content turns out to differ, build() is run a second time
+        with the current time.
+        
+        Args:
+            filename: Output filename (without path)
+            
+        Returns:
+            True if the file was written, False if it was unchanged
+        """
+        previous = load_manifest().get(filename, {})
+        if previous.get('dtstamp') and previous.get('content_hash'):
+            dtstamp = datetime.strptime(previous['dtstamp'], DTSTAMP_FORMAT).replace(tzinfo=timezone.utc)
+            try:
+                return self._stream_write(filename, dtstamp, previous['content_hash'])
+            except _ContentChanged:
+                pass
+        return self._stream_write(filename, datetime.now(timezone.utc).replace(microsecond=0))
+    
+    def _stream_write(self, filename, dtstamp, expected_hash=None):
+        """Stream the calendar to filename, failing if its hash is not expected_hash."""
+        with metrics.phase(self.metrics_name, 'write'):
+            changed = write_output(filename, lambda out: self._stream_render(out, dtstamp, expected_hash))
+        metrics.record(self.metrics_name, events=self._streamed)
+        return changed
+    
+    def _stream_render(self, out, dtstamp, expected_hash):
+        """Render callback for write_output(); returns the manifest fields."""
+        self._content_hash = hashlib.sha256(self.name.encode('utf-8'))
+        self._streamed = 0
+        self._last_uid_base = None
+        self._sink = (out, f'DTSTAMP:{dtstamp.strftime(DTSTAMP_FORMAT)}\r\n'.encode('ascii'))
+        try:
+            out.write(StreamSerializer.header(self.name))
+            with metrics.phase(self.metrics_name, 'build'):
+                self.run_build()
+            out.write(b'END:VCALENDAR\r\n')
+        finally:
+            self._sink = None
+        if expected_hash is not None and self.content_hash != expected_hash:
+            raise _ContentChanged()
+        return {
+            'content_hash': self.content_hash,
+            'dtstamp': dtstamp.strftime(DTSTAMP_FORMAT),
+            'events': self._streamed,
+        }
+    
+    def dtstamp_for(self, filename):
+        """
+        Choose the DTSTAMP for the current content.
+        
+        If the content hash matches the manifest entry for filename, the
+        previous DTSTAMP is reused; otherwise the current time is used.
+        
+        Returns:
+            Aware UTC datetime
+        """
+        previous = load_manifest().get(filename, {})
+        if previous.get('content_hash') == self.content_hash and previous.get('dtstamp'):
+            dtstamp = datetime.strptime(previous['dtstamp'], DTSTAMP_FORMAT)
+            return dtstamp.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc).replace(microsecond=0)
+    
+    @property
+    def content_hash(self):
+        """Hex sha256 over the calendar name, all event content and the window."""
+        if self.window is None:
+            return self._content_hash.hexdigest()
+        content_hash = self._content_hash.copy()
+        content_hash.update(f'\0{self.window[0]}\0{self.window[1]}'.encode('utf-8'))
+        return content_hash.hexdigest()
+    
+    def to_ical(self, dtstamp=None):
+        """
+        Render the calendar to bytes.
+        
+        Args:
+            dtstamp: Aware UTC datetime (chosen by dtstamp_for() if omitted)
+            
+        Returns:
+            ICS file content
+        """
+        if dtstamp is None:
+            dtstamp = self.dtstamp_for(self.output_filename)
+        out = io.BytesIO()
+        self.render(out, dtstamp)
+        return out.getvalue()
+    
+    def render(self, out, dtstamp):
+        """
+        Serialize the calendar with the configured backend.
+        
+        Args:
+            out: Binary file-like object
+            dtstamp: Aware UTC datetime used for every DTSTAMP
+        """
+        with metrics.phase(self.metrics_name, 'serialize'):
+            self.serializer.write(out, self.name, self.selected_events(), dtstamp)
     
     def save(self, filename):
         """
         Save calendar to file.
         
+        DTSTAMP only moves when the calendar content changes: if the content
+        hash matches the manifest, the previous DTSTAMP is reused, so an
+        unchanged calendar renders to identical bytes and is not rewritten.
+        
         Args:
             filename: Output filename (without path)
+            
+        Returns:
+            True if the file was written, False if it was unchanged
         """
-        filepath = os.path.join(OUTPUT_DIR, filename)
-        with open(filepath, 'wb') as f:
-            f.write(self.calendar.to_ical())
-        print(f"✅ Generated: {filepath}")
+        events = len(self.selected_events())
+        metrics.record(self.metrics_name, events=events)
+        with metrics.phase(self.metrics_name, 'write'):
+            dtstamp = self.dtstamp_for(filename)
+            
+            return write_output(
+                filename,
+                lambda out: self.render(out, dtstamp),
+                content_hash=self.content_hash,
+                dtstamp=dtstamp.strftime(DTSTAMP_FORMAT),
+                events=events,
+            )
+
+
+class _HashingWriter:
+    """File wrapper that tracks sha256 and size of everything written."""
+    
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+
+def file_sha256(filepath):
+    """Return the hex sha256 of a file, or None if it cannot be read."""
+    sha256 = hashlib.sha256()
+    try:
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                sha256.update(chunk)
+    except OSError:
+        return None
+    return sha256.hexdigest()
+
+
+def write_output(filename, render, **manifest_fields):
+    """
+    Render a file into the output directory unless its bytes are unchanged.
+    
+    Output is streamed to a temporary file and atomically renamed over the
+    target, so readers never see a partially written calendar. Compressed
+    .gz/.br variants are written alongside and recorded in the manifest.
+    
+    Args:
+        filename: Output filename (without path)
+        render: Callable writing the content to a binary file-like object;
+            it may return a dict of further manifest fields
+        **manifest_fields: Extra fields recorded in the manifest entry
+        
+    Returns:
+        True if the file was written, False if it was unchanged
+    """
+    output_dir = settings.OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, filename)
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=f'.{filename}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            out = _HashingWriter(f)
+            manifest_fields.update(render(out) or {})
+        digest = out.sha256.hexdigest()
+        
+        unchanged = file_sha256(filepath) == digest
+        if unchanged:
+            os.unlink(tmp_path)
+            print(f"⏭️  Unchanged: {filepath}")
+        else:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, filepath)
+            print(f"✅ Generated: {filepath}")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    
+    metrics.record(os.path.splitext(filename)[0], bytes=out.size, changed=not unchanged)
+    compressed = precompress(filepath, reuse_existing=unchanged)
+    update_manifest(
+        filename,
+        sha256=digest,
+        size=out.size,
+        compressed={encoding: compressed[encoding] for encoding in sorted(compressed)},
+        **manifest_fields
+    )
+    return not unchanged
+
+
+def write_if_changed(filename, data, **manifest_fields):
+    """
+    Write rendered bytes to the output directory unless identical.
+    
+    Args:
+        filename: Output filename (without path)
+        data: Rendered file content
+        **manifest_fields: Extra fields recorded in the manifest entry
+        
+    Returns:
+        True if the file was written, False if it was unchanged
+    """
+    return write_output(filename, lambda out: out.write(data), **manifest_fields)
 
 
 def save_calendar(calendar, filename):
@@ -81,11 +465,97 @@ def save_calendar(calendar, filename):
     Args:
         calendar: icalendar Calendar object
         filename: Output filename (without path)
+        
+    Returns:
+        True if the file was written, False if it was unchanged
     """
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    with open(filepath, 'wb') as f:
-        f.write(calendar.to_ical())
-    print(f"✅ Generated: {filepath}")
+    return write_if_changed(filename, calendar.to_ical())
+
+
+def expand_rrule(rule, start_date, exdates=(), today=None, horizon_days=RECURRENCE_EXPAND_DAYS):
+    """
+    List the occurrence dates of a recurrence rule.
+    
+    Rules bounded by COUNT or UNTIL are expanded completely; unbounded
+    rules are expanded from today for horizon_days.
+    
+    Args:
+        rule: Canonical RRULE value (see format_rrule)
+        start_date: First occurrence (DTSTART)
+        exdates: Dates to skip
+        today: Start of the window for unbounded rules (default: today)
+        horizon_days: Length of the window for unbounded rules
+        
+    Returns:
+        List of datetime.date
+    """
+    from dateutil.rrule import rrulestr
+    
+    dtstart = datetime.combine(start_date, datetime.min.time())
+    recurrence = rrulestr(rule, dtstart=dtstart)
+    if 'COUNT=' in rule or 'UNTIL=' in rule:
+        occurrences = list(recurrence)
+    else:
+        window_start = max(dtstart, datetime.combine(today or datetime.now().date(), datetime.min.time()))
+        window_end = window_start + timedelta(days=horizon_days - 1)
+        occurrences = recurrence.between(window_start, window_end, inc=True)
+    skipped = set(exdates)
+    return [occurrence.date() for occurrence in occurrences if occurrence.date() not in skipped]
+
+
+def windowed_filename(filename, first, last):
+    """
+    Name the output file of a date-windowed feed.
+    
+    Example: holidays.ics -> holidays_20261018_20261116.ics
+    """
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{first.strftime('%Y%m%d')}_{last.strftime('%Y%m%d')}{ext}"
+
+
+# Last day a window may end on; the day after it must still be a valid
+# date, as windows are handled as half-open ranges
+_WINDOW_LAST_DAY = date.max - timedelta(days=1)
+
+
+def resolve_window(first=None, last=None, days=None, today=None):
+    """
+    Resolve a date window from optional bounds.
+    
+    A missing first day defaults to today, a missing last day to
+    days (default FEED_WINDOW_DAYS) days from the first.
+    
+    Args:
+        first: First day (datetime.date or YYYY-MM-DD string)
+        last: Last day, inclusive (datetime.date or YYYY-MM-DD string)
+        days: Window length when last is omitted
+        today: Reference day (default: today)
+        
+    Returns:
+        (first, last) tuple of datetime.date
+        
+    Raises:
+        ValueError: If a date is malformed, last is before first or the
+            window ends after _WINDOW_LAST_DAY
+    """
+    if isinstance(first, str):
+        first = parse_date(first)
+    if isinstance(last, str):
+        last = parse_date(last)
+    if first is None:
+        first = today or date.today()
+    if last is None:
+        days = FEED_WINDOW_DAYS if days is None else days
+        if days < 1:
+            raise ValueError('Window must be at least one day long')
+        if days - 1 > _WINDOW_LAST_DAY.toordinal() - first.toordinal():
+            raise ValueError(f'Window must end by {_WINDOW_LAST_DAY}')
+        last = first + timedelta(days=days - 1)
+    if last < first:
+        raise ValueError(f'Window end {last} is before its start {first}')
+    if last > _WINDOW_LAST_DAY:
+        raise ValueError(f'Window must end by {_WINDOW_LAST_DAY}')
+    return first, last
 
 
 def create_date_range(start_date, days):
@@ -111,5 +581,12 @@ def parse_date(date_str):
         
     Returns:
         datetime.date object
+        
+    Raises:
+        ValueError: If the string is not a YYYY-MM-DD date
     """
-    return datetime.strptime(date_str, '%Y-%m-%d').date()
+    # fromisoformat is several times faster than strptime; the length
+    # check keeps it from also accepting the YYYYMMDD form
+    if len(date_str) != 10:
+        raise ValueError(f"Invalid date '{date_str}', expected YYYY-MM-DD")
+    return date.fromisoformat(date_str)
@@ -0,0 +1,254 @@
+"""City catalog with a name index and a k-d tree for nearest-city lookup."""
+
+import re
+import math
+from array import array
+from collections import namedtuple
+from collections.abc import Mapping
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Coordinates are stored as integers in units of 1e-4 degrees (~11 m)
+COORD_SCALE = 10000
+
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# Columns of a compiled catalog: parallel sequences in catalog order,
+# ALIASES a tuple per city, COORDS flattened as (lat, lon, lat, lon, ...),
+# KDTREE the catalog positions in k-d tree order
+CatalogData = namedtuple('CatalogData', 'KEYS NAMES PROVINCES ALIASES COORDS KDTREE')
+
+City = namedtuple('City', 'key name province lat lon aliases')
+
+
+def unit_vector(lat, lon):
+    """Point on the unit sphere; chord length between points orders great-circle distance."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def kdtree_order(points):
+    """
+    Arrange points as an implicit k-d tree.
+
+    The median of every range [lo, hi) along axis depth % 3 sits at
+    (lo + hi) // 2, points before it are not greater and points after
+    it not smaller, so the tree needs no storage beyond the order.
+
+    Args:
+        points: Sequence of (x, y, z) tuples
+
+    Returns:
+        Tuple of point indices in tree order
+    """
+    order = list(range(len(points)))
+    stack = [(0, len(order), 0)]
+    while stack:
+        lo, hi, axis = stack.pop()
+        if hi - lo <= 1:
+            continue
+        order[lo:hi] = sorted(order[lo:hi], key=lambda i: points[i][axis])
+        middle = (lo + hi) // 2
+        stack.append((lo, middle, (axis + 1) % 3))
+        stack.append((middle + 1, hi, (axis + 1) % 3))
+    return tuple(order)
+
+
+def compile_catalog(cities):
+    """
+    Build catalog columns from city rows.
+
+    Args:
+        cities: Iterable of City, in catalog order
+
+    Returns:
+        CatalogData
+
+    Raises:
+        ValueError: On duplicate or malformed keys and invalid coordinates
+    """
+    keys, names, provinces, aliases, coords, points = [], [], [], [], [], []
+    seen = set()
+    for city in cities:
+        if not KEY_PATTERN.match(city.key):
+            raise ValueError(f"City key must be letters, digits, '_' or '-': '{city.key}'")
+        if city.key in seen:
+            raise ValueError(f"Duplicate city key: '{city.key}'")
+        if any(separator in text for text in (city.name, city.province, *city.aliases) for separator in '\t\n'):
+            raise ValueError(f"Tab or newline in names of '{city.key}'")
+        if not (-90 <= city.lat <= 90 and -180 <= city.lon <= 180):
+            raise ValueError(f"Invalid coordinates for '{city.key}': {city.lat},{city.lon}")
+        seen.add(city.key)
+        keys.append(city.key)
+        names.append(city.name)
+        provinces.append(city.province)
+        aliases.append(tuple(city.aliases))
+        lat, lon = round(city.lat * COORD_SCALE), round(city.lon * COORD_SCALE)
+        coords += (lat, lon)
+        points.append(unit_vector(lat / COORD_SCALE, lon / COORD_SCALE))
+    return CatalogData(tuple(keys), tuple(names), tuple(provinces), tuple(aliases),
+                       tuple(coords), kdtree_order(points))
+
+
+def dump_columns(data):
+    """
+    Render catalog columns as text, one line per city.
+
+    A module assigning these strings to the column names compiles to a
+    handful of constants, so importing it stays fast even without cached
+    bytecode; parse_columns() reverses this.
+
+    Returns:
+        Dict of column name to text
+    """
+    return {
+        'KEYS': '\n'.join(data.KEYS),
+        'NAMES': '\n'.join(data.NAMES),
+        'PROVINCES': '\n'.join(data.PROVINCES),
+        'ALIASES': '\n'.join('\t'.join(aliases) for aliases in data.ALIASES),
+        'COORDS': '\n'.join(f'{data.COORDS[i]} {data.COORDS[i + 1]}' for i in range(0, len(data.COORDS), 2)),
+        'KDTREE': '\n'.join(' '.join(map(str, data.KDTREE[i:i + 20])) for i in range(0, len(data.KDTREE), 20)),
+    }
+
+
+def parse_columns(module):
+    """
+    Load catalog columns from a module written by tools/build_city_catalog.py.
+
+    Returns:
+        CatalogData
+    """
+    keys = module.KEYS.split('\n') if module.KEYS else []
+    return CatalogData(
+        keys,
+        module.NAMES.split('\n') if keys else [],
+        module.PROVINCES.split('\n') if keys else [],
+        [tuple(line.split('\t')) if line else () for line in module.ALIASES.split('\n')] if keys else [],
+        array('i', map(int, module.COORDS.split())),
+        array('i', map(int, module.KDTREE.split())),
+    )
+
+
+def normalize_name(name):
+    """Normalize a city name for lookup: case, surrounding space and a trailing '市'."""
+    name = name.strip().lower()
+    return name[:-1] if name.endswith('市') and len(name) > 2 else name
+
+
+class CityCatalog(Mapping):
+    """
+    Read-only mapping of city key to city info dict.
+
+    The compiled columns are loaded on first access, and the name index
+    on the first find(), so importing the catalog costs nothing. Info
+    dicts carry 'lat', 'lon', 'name', 'province' and 'aliases'.
+    """
+
+    def __init__(self, load):
+        """
+        Initialize catalog.
+
+        Args:
+            load: Callable returning the compiled columns (CatalogData)
+        """
+        self._load = load
+        self._data = None
+        self._positions = None
+        self._points = None
+        self._names = None
+
+    @property
+    def data(self):
+        """The compiled columns, loaded on first use."""
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    @property
+    def positions(self):
+        """Dict of city key to catalog position."""
+        if self._positions is None:
+            self._positions = {key: i for i, key in enumerate(self.data.KEYS)}
+        return self._positions
+
+    def __len__(self):
+        return len(self.data.KEYS)
+
+    def __iter__(self):
+        return iter(self.data.KEYS)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def __getitem__(self, key):
+        return self.info(self.positions[key])
+
+    def info(self, i):
+        """Return the info dict of the city at catalog position i."""
+        data = self.data
+        return {
+            'lat': data.COORDS[2 * i] / COORD_SCALE,
+            'lon': data.COORDS[2 * i + 1] / COORD_SCALE,
+            'name': data.NAMES[i],
+            'province': data.PROVINCES[i],
+            'aliases': data.ALIASES[i],
+        }
+
+    def find(self, name):
+        """
+        Look up a city by key, name or alias (case-insensitive).
+
+        Names shared by several cities resolve to the first in catalog order.
+
+        Returns:
+            City key, or None if not found
+        """
+        if self._names is None:
+            data = self.data
+            names = {}
+            for i, key in enumerate(data.KEYS):
+                for candidate in (key, data.NAMES[i], *data.ALIASES[i]):
+                    names.setdefault(normalize_name(candidate), i)
+            self._names = names
+        i = self._names.get(normalize_name(name))
+        return None if i is None else self.data.KEYS[i]
+
+    def nearest(self, lat, lon):
+        """
+        Find the city closest to a coordinate.
+
+        Returns:
+            (city key, distance in km), or None for an empty catalog
+        """
+        data = self.data
+        if not data.KEYS:
+            return None
+        if self._points is None:
+            coords = data.COORDS
+            self._points = [unit_vector(coords[2 * i] / COORD_SCALE, coords[2 * i + 1] / COORD_SCALE)
+                            for i in range(len(data.KEYS))]
+        points, tree = self._points, data.KDTREE
+        target = unit_vector(lat, lon)
+        best = [math.inf, None]
+
+        # Entries carry a lower bound on the squared distance of their points
+        stack = [(0, len(tree), 0, 0.0)]
+        while stack:
+            lo, hi, axis, bound = stack.pop()
+            if lo >= hi or bound >= best[0]:
+                continue
+            middle = (lo + hi) // 2
+            i = tree[middle]
+            point = points[i]
+            distance = sum((a - b) ** 2 for a, b in zip(point, target))
+            if distance < best[0]:
+                best = [distance, i]
+            offset = target[axis] - point[axis]
+            near, far = ((lo, middle), (middle + 1, hi)) if offset < 0 else ((middle + 1, hi), (lo, middle))
+            # The near side is searched first; the far side is skipped on pop
+            # unless the splitting plane is closer than the best match so far
+            stack.append((*far, (axis + 1) % 3, offset * offset))
+            stack.append((*near, (axis + 1) % 3, 0.0))
+
+        chord = math.sqrt(best[0])
+        return data.KEYS[best[1]], 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
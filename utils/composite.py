@@ -0,0 +1,101 @@
+"""Composite feeds: several calendars merged by concatenating pre-serialized events."""
+
+import hashlib
+from collections import namedtuple
+from .serializers import StreamSerializer
+from .feed_cache import FeedCache
+
+COMPOSITE_SEPARATOR = '+'
+
+# calname is the source calendar's name, events a tuple of
+# (dedup key, VEVENT bytes), digest the sha256 over all event bytes
+Fragment = namedtuple('Fragment', 'calname events digest')
+
+
+def split_composite(name):
+    """
+    Split a composite feed name into its parts.
+
+    Example: 'holidays+solar_terms+holidays' -> ['holidays', 'solar_terms']
+
+    Returns:
+        List of feed names in order, without duplicates
+    """
+    return list(dict.fromkeys(part for part in name.split(COMPOSITE_SEPARATOR) if part))
+
+
+def dedup_key(record):
+    """
+    Key identifying the same real-world event across calendars.
+
+    Emoji, spaces and punctuation are ignored, so '劳动节' and '劳动节 🔨'
+    starting on the same day are one event.
+    """
+    return ''.join(ch for ch in record.summary if ch.isalnum()), record.start
+
+
+def make_fragment(calname, events, dtstamp):
+    """
+    Pre-serialize a calendar's events.
+
+    Args:
+        calname: Calendar name
+        events: Iterable of EventRecord
+        dtstamp: Aware UTC datetime used for every DTSTAMP
+
+    Returns:
+        Fragment
+    """
+    stamp = f"DTSTAMP:{dtstamp.strftime('%Y%m%dT%H%M%SZ')}\r\n".encode('ascii')
+    digest = hashlib.sha256(calname.encode('utf-8'))
+    blocks = []
+    for record in events:
+        block = StreamSerializer.event(record, stamp)
+        digest.update(block)
+        blocks.append((dedup_key(record), block))
+    return Fragment(calname, tuple(blocks), digest.hexdigest())
+
+
+def composite_key(fragments):
+    """Cache key of a composite feed, derived from its fragments' digests."""
+    return 'composite:' + hashlib.sha256(
+        '\0'.join(fragment.digest for fragment in fragments).encode('ascii')
+    ).hexdigest()
+
+
+def compose(fragments, calname=None):
+    """
+    Merge fragments into one VCALENDAR by concatenation.
+
+    Events are kept in fragment order. An event whose dedup key already
+    appeared in an earlier fragment is dropped; duplicates within one
+    fragment are kept, as they are distinct events of that calendar.
+
+    Args:
+        fragments: Fragments in subscription order
+        calname: Calendar name (default: the source names joined with ' + ')
+
+    Returns:
+        ICS file content
+    """
+    if calname is None:
+        calname = ' + '.join(fragment.calname for fragment in fragments)
+    parts = [StreamSerializer.header(calname)]
+    seen = set()
+    for fragment in fragments:
+        keys = set()
+        for key, block in fragment.events:
+            if key not in seen:
+                parts.append(block)
+                keys.add(key)
+        seen |= keys
+    parts.append(b'END:VCALENDAR\r\n')
+    return b''.join(parts)
+
+
+class FragmentCache(FeedCache):
+    """FeedCache holding Fragments instead of rendered bytes."""
+
+    @staticmethod
+    def make_etag(fragment):
+        return f'"{fragment.digest[:32]}"'
@@ -0,0 +1,112 @@
+"""Precompressed (.gz/.br) variants of generated files for static hosting."""
+
+import os
+import gzip
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import PRECOMPRESS, GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CHUNK_SIZE = 1 << 16
+
+_pool = None
+_pool_pid = None
+
+
+def _get_pool():
+    """
+    Return this process's compression thread pool.
+
+    zlib and brotli release the GIL, so threads compress in parallel. The
+    pool is recreated after a fork, since worker threads do not survive it.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ThreadPoolExecutor(max_workers=max(2, os.cpu_count() or 1))
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def available_encodings():
+    """Return the configured encodings whose compressor is installed."""
+    return [enc for enc in PRECOMPRESS if enc == 'gz' or (enc == 'br' and brotli is not None)]
+
+
+def _gzip(src, dst):
+    # mtime=0 keeps the output byte-identical for identical input
+    with gzip.GzipFile(fileobj=dst, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as gz:
+        shutil.copyfileobj(src, gz, CHUNK_SIZE)
+
+
+def _brotli(src, dst):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+        dst.write(compressor.process(chunk))
+    dst.write(compressor.finish())
+
+
+COMPRESSORS = {'gz': _gzip, 'br': _brotli}
+
+
+def compress_file(path, encoding):
+    """
+    Write path.<encoding> next to path, atomically.
+
+    Args:
+        path: File to compress
+        encoding: 'gz' or 'br'
+
+    Returns:
+        Size of the compressed file in bytes
+    """
+    target = f'{path}.{encoding}'
+    directory, name = os.path.split(target)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or '.', prefix=f'.{name}.', suffix='.tmp')
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            COMPRESSORS[encoding](src, dst)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return os.path.getsize(target)
+
+
+def precompress(path, reuse_existing=False):
+    """
+    Create all available compressed variants of a file in parallel.
+
+    Variants for encodings that are no longer available are removed so a
+    stale .br never outlives its source.
+
+    Args:
+        path: File to compress
+        reuse_existing: Keep variants that already exist (source unchanged)
+
+    Returns:
+        Dict mapping encoding to compressed size
+    """
+    encodings = available_encodings()
+    for encoding in set(COMPRESSORS) - set(encodings):
+        if os.path.exists(f'{path}.{encoding}'):
+            os.remove(f'{path}.{encoding}')
+
+    sizes = {}
+    pending = {}
+    for encoding in encodings:
+        variant = f'{path}.{encoding}'
+        if reuse_existing and os.path.exists(variant):
+            sizes[encoding] = os.path.getsize(variant)
+        else:
+            pending[encoding] = _get_pool().submit(compress_file, path, encoding)
+
+    for encoding, future in pending.items():
+        sizes[encoding] = future.result()
+    return sizes
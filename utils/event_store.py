@@ -0,0 +1,233 @@
+"""Column-oriented event storage with an interval index for date-range queries."""
+
+from array import array
+from bisect import bisect_left
+from itertools import takewhile
+from datetime import date, datetime, timedelta, timezone
+from .serializers import EventRecord, is_timed
+
+# Span end of recurring events without COUNT or UNTIL
+UNBOUNDED = date.max.toordinal() + 1
+
+
+class EventStore:
+    """
+    Append-only store of all-day and timed events.
+
+    Dates are held as proleptic Gregorian ordinals in array columns, text
+    fields in parallel lists. Timed events are kept in UTC, as the days
+    they cover plus the seconds into their first and last day. Iterating
+    yields EventRecord in insertion order, so the store can be passed to a
+    serializer as-is.
+
+    Range queries use an interval index built on first use: events sorted
+    by start, with a max-end tree over the sorted order, so a query only
+    descends into subtrees that contain an overlapping event.
+    """
+
+    def __init__(self):
+        self.starts = array('i')
+        self.ends = array('i')
+        # Last day covered by any occurrence (exclusive); differs from ends
+        # only for recurring events
+        self.span_ends = array('i')
+        # UTC seconds into the first/last day of timed events, -1 for all-day
+        self.start_seconds = array('i')
+        self.end_seconds = array('i')
+        self.uids = []
+        self.summaries = []
+        self.descriptions = []
+        self.rrules = []
+        self.exdates = []
+        self._index = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return (self.record(i) for i in range(len(self.starts)))
+
+    def add(self, uid, summary, start, end, description='', rrule=None, exdates=()):
+        """
+        Append an event.
+
+        Args:
+            uid: Event UID
+            summary: Event title
+            start: First day (datetime.date), or an aware datetime for a
+                timed event
+            end: Day after the last day (exclusive DTEND), or an aware
+                datetime for a timed event
+            description: Event description
+            rrule: Canonical RRULE value (optional, all-day events only)
+            exdates: Excluded occurrence dates
+        """
+        if is_timed(start):
+            start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+            self.start_seconds.append(_seconds(start))
+            self.end_seconds.append(_seconds(end))
+        else:
+            self.start_seconds.append(-1)
+            self.end_seconds.append(-1)
+        start, end = day_span(start, end)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.span_ends.append(_span_end(rrule, start, end) if rrule else end)
+        self.uids.append(uid)
+        self.summaries.append(summary)
+        self.descriptions.append(description)
+        self.rrules.append(rrule)
+        self.exdates.append(tuple(exdates))
+        self._index = None
+
+    def record(self, i):
+        """Return event i as an EventRecord."""
+        if self.start_seconds[i] < 0:
+            start, end = date.fromordinal(self.starts[i]), date.fromordinal(self.ends[i])
+        else:
+            # ends is the day after the last day touched; an end at midnight
+            # touches no time of its own day
+            end_seconds = self.end_seconds[i]
+            start = _utc_datetime(self.starts[i], self.start_seconds[i])
+            end = _utc_datetime(self.ends[i] - (end_seconds > 0), end_seconds)
+        return EventRecord(
+            self.uids[i], self.summaries[i], start, end,
+            self.descriptions[i], self.rrules[i], self.exdates[i],
+        )
+
+    def _build_index(self):
+        order = sorted(range(len(self.starts)), key=self.starts.__getitem__)
+        size = 1
+        while size < len(order):
+            size *= 2
+        # Implicit binary tree: node n has children 2n and 2n+1, leaves
+        # start at size; each node holds the max span end below it
+        tree = array('i', bytes(4 * 2 * size))
+        for position, i in enumerate(order):
+            tree[size + position] = self.span_ends[i]
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._index = (array('i', order), array('i', (self.starts[i] for i in order)), tree, size)
+        return self._index
+
+    def overlapping(self, start, end):
+        """
+        Find events with an occurrence overlapping [start, end).
+
+        Args:
+            start: First day as an ordinal
+            end: Day after the last day as an ordinal
+
+        Returns:
+            Sorted list of event indices
+        """
+        order, sorted_starts, tree, size = self._index or self._build_index()
+        # Only events starting before end can overlap; of those, descend
+        # into subtrees whose max span end lies after start
+        limit = bisect_left(sorted_starts, end)
+        found = []
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or tree[node] <= start:
+                continue
+            if node >= size:
+                found.append(order[node - size])
+                continue
+            middle = (lo + hi) // 2
+            stack.append((2 * node + 1, middle, hi))
+            stack.append((2 * node, lo, middle))
+        found.sort()
+        return [
+            i for i in found
+            if not self.rrules[i]
+            or recurs_in(self.rrules[i], self.starts[i], self.ends[i], self.exdates[i], start, end)
+        ]
+
+    def between(self, first, last):
+        """
+        List events with an occurrence between two dates.
+
+        Timed events are matched by the UTC days they cover.
+
+        Args:
+            first: First day of the window (datetime.date)
+            last: Last day of the window, inclusive
+
+        Returns:
+            List of EventRecord in insertion order
+        """
+        return [self.record(i) for i in self.overlapping(first.toordinal(), last.toordinal() + 1)]
+
+
+def day_span(start, end):
+    """
+    Ordinals of the first day an event covers and the day after its last day.
+
+    Args:
+        start: datetime.date, or an aware UTC datetime for a timed event
+        end: Exclusive end, of the same kind as start
+
+    Returns:
+        (start, end) ordinal tuple
+    """
+    if is_timed(end):
+        return start.toordinal(), end.toordinal() + (_seconds(end) > 0)
+    return start.toordinal(), end.toordinal()
+
+
+def overlaps(start, end, rrule, exdates, window_start, window_end):
+    """
+    Check whether an event has an occurrence overlapping [window_start, window_end).
+
+    All arguments except rrule and exdates are ordinals; end is exclusive.
+    """
+    if not rrule:
+        return start < window_end and end > window_start
+    return recurs_in(rrule, start, end, exdates, window_start, window_end)
+
+
+def recurs_in(rrule, start, end, exdates, window_start, window_end):
+    """Check whether a recurring event has an occurrence overlapping [window_start, window_end)."""
+    from dateutil.rrule import rrulestr
+
+    if start >= window_end:
+        return False
+    recurrence = rrulestr(rrule, dtstart=_ordinal_datetime(start))
+    # An occurrence overlaps if it starts in [window_start - duration + 1, window_end)
+    first = _ordinal_datetime(max(1, window_start - (end - start) + 1))
+    occurrences = recurrence.xafter(first, inc=True)
+    # An open-ended window (UNBOUNDED) has no last day to stop at
+    if window_end <= date.max.toordinal():
+        last = _ordinal_datetime(window_end) - timedelta(seconds=1)
+        occurrences = takewhile(lambda occurrence: occurrence <= last, occurrences)
+    skipped = set(exdates)
+    try:
+        return any(occurrence.date() not in skipped for occurrence in occurrences)
+    except ValueError:
+        # dateutil steps past date.max looking for occurrences near year 9999
+        return False
+
+
+def _ordinal_datetime(ordinal):
+    return datetime.combine(date.fromordinal(ordinal), datetime.min.time())
+
+
+def _seconds(moment):
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+def _utc_datetime(ordinal, seconds):
+    return _ordinal_datetime(ordinal).replace(tzinfo=timezone.utc) + timedelta(seconds=seconds)
+
+
+def _span_end(rule, start, end):
+    """Exclusive end ordinal of the last occurrence of a recurring event."""
+    if 'COUNT=' not in rule and 'UNTIL=' not in rule:
+        return UNBOUNDED
+    from dateutil.rrule import rrulestr
+
+    occurrences = list(rrulestr(rule, dtstart=_ordinal_datetime(start)))
+    if not occurrences:
+        return end
+    return occurrences[-1].date().toordinal() + (end - start)
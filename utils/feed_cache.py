@@ -0,0 +1,99 @@
+"""In-memory LRU cache of rendered feeds with single-flight rendering."""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+CachedFeed = namedtuple('CachedFeed', 'body etag rendered_at expires_at')
+
+
+class _Flight:
+    """A render in progress that other callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class FeedCache:
+    """
+    LRU cache of rendered feed bytes with per-entry TTL.
+
+    Concurrent misses for the same key are coalesced: the first caller
+    renders, the others wait for its result (single-flight), so a burst of
+    polls triggers only one render.
+    """
+
+    def __init__(self, max_entries):
+        """
+        Initialize feed cache.
+
+        Args:
+            max_entries: Maximum number of cached feeds
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_etag(body):
+        """Build a strong ETag from rendered bytes."""
+        return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    def get(self, key, ttl, render):
+        """
+        Return a cached feed, rendering it if missing or expired.
+
+        Args:
+            key: Cache key (e.g. feed name)
+            ttl: Seconds the rendered feed stays fresh
+            render: Callable returning the feed bytes
+
+        Returns:
+            CachedFeed
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > time.time():
+                self._entries.move_to_end(key)
+                return entry
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            body = render()
+            now = time.time()
+            flight.result = CachedFeed(body, self.make_etag(body), now, now + ttl)
+            with self._lock:
+                self._entries[key] = flight.result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def invalidate(self, key=None):
+        """Drop one cached feed, or all of them if key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,159 @@
+"""Column-wise conversion of Open-Meteo hourly forecasts into periods of unchanged weather."""
+
+from bisect import bisect_right
+from collections import namedtuple
+from config.settings import WEATHER_CODE_MAP, WEATHER_BEAUFORT_KMH, WEATHER_PRECIPITATION_EDGES
+
+HOURLY_VARIABLES = 'temperature_2m,precipitation_probability,weathercode,windspeed_10m'
+HOURLY_COLUMNS = tuple(HOURLY_VARIABLES.split(','))
+
+# A run of hours with unchanged conditions. start/end are UTC unix
+# seconds, code the most severe WMO weather code, precipitation the
+# highest probability in %, wind the highest speed in km/h and level its
+# Beaufort level
+Period = namedtuple('Period', 'start end code temp_min temp_max precipitation wind level')
+
+# numpy module once looked up by get_numpy(), None if not installed
+_numpy = False
+
+# WMO codes are 0-99; codes mapped to the same description share a
+# condition, unmapped codes fall into condition 0
+_descriptions = list(dict.fromkeys(WEATHER_CODE_MAP.values()))
+CODE_CONDITIONS = [
+    _descriptions.index(WEATHER_CODE_MAP[code]) + 1 if code in WEATHER_CODE_MAP else 0
+    for code in range(100)
+]
+
+
+def get_numpy():
+    """Return the numpy module, or None if it is not installed (imported on first use)."""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def _condition_key(day, condition, band, level):
+    """Pack the properties that must match for hours to merge into one integer."""
+    return ((day * 128 + condition) * 8 + band) * 16 + level
+
+
+def hourly_periods(hourly, step=1, backend=None):
+    """
+    Convert an hourly forecast into periods of unchanged weather.
+
+    Hours are grouped into blocks of step hours aligned to local midnight.
+    Each block is classified by its most severe weather code, highest
+    precipitation band and highest Beaufort level, and consecutive blocks
+    of the same local day and class merge into one period. All steps work
+    on whole columns: as NumPy array operations when NumPy is installed,
+    otherwise the same steps over lists, with identical results.
+
+    Args:
+        hourly: Open-Meteo 'hourly' dict requested with timeformat=unixtime,
+            holding 'time', the HOURLY_COLUMNS lists and 'utc_offset_seconds';
+            hours from the first missing (null) value on are dropped
+        step: Hours per block
+        backend: 'numpy' or 'python' (default: numpy if installed)
+
+    Returns:
+        List of Period in time order
+    """
+    columns = [hourly['time']] + [hourly[name] for name in HOURLY_COLUMNS]
+    rows = min(len(column) for column in columns)
+    for column in columns:
+        if None in column[:rows]:
+            rows = column.index(None)
+    if rows == 0:
+        return []
+    columns = [column[:rows] for column in columns]
+    offset = hourly.get('utc_offset_seconds', 0)
+
+    if backend is None:
+        backend = 'python' if get_numpy() is None else 'numpy'
+    if backend == 'numpy':
+        return _numpy_periods(*columns, offset, step)
+    if backend == 'python':
+        return _python_periods(*columns, offset, step)
+    raise ValueError(f"Unknown backend '{backend}', expected 'numpy' or 'python'")
+
+
+def _numpy_periods(times, temperatures, precipitation, codes, winds, offset, step):
+    """hourly_periods() on NumPy arrays."""
+    np = get_numpy()
+    times = np.array(times, dtype=np.int64)
+    temperatures = np.array(temperatures, dtype=float)
+    precipitation = np.array(precipitation, dtype=float)
+    codes = np.array(codes, dtype=np.int64)
+    winds = np.array(winds, dtype=float)
+    local = times + offset
+
+    def starts(values):
+        return np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+
+    blocks = starts(local // (3600 * step))
+    block_codes = np.maximum.reduceat(codes, blocks)
+    known = (block_codes >= 0) & (block_codes < 100)
+    conditions = np.where(known, np.array(CODE_CONDITIONS)[np.where(known, block_codes, 0)], 0)
+    bands = np.searchsorted(WEATHER_PRECIPITATION_EDGES, np.maximum.reduceat(precipitation, blocks), 'right')
+    levels = np.searchsorted(WEATHER_BEAUFORT_KMH, np.maximum.reduceat(winds, blocks), 'right')
+    keys = _condition_key(local[blocks] // 86400, conditions, bands, levels)
+
+    runs = blocks[starts(keys)]
+    run_winds = np.maximum.reduceat(winds, runs)
+    return [Period(*row) for row in zip(
+        times[runs].tolist(),
+        np.append(times[runs[1:]], times[-1] + 3600).tolist(),
+        np.maximum.reduceat(codes, runs).tolist(),
+        np.minimum.reduceat(temperatures, runs).tolist(),
+        np.maximum.reduceat(temperatures, runs).tolist(),
+        np.maximum.reduceat(precipitation, runs).astype(np.int64).tolist(),
+        run_winds.tolist(),
+        np.searchsorted(WEATHER_BEAUFORT_KMH, run_winds, 'right').tolist(),
+    )]
+
+
+def _python_periods(times, temperatures, precipitation, codes, winds, offset, step):
+    """hourly_periods() on lists, mirroring _numpy_periods()."""
+    local = [t + offset for t in times]
+
+    def starts(values):
+        return [i for i in range(len(values)) if i == 0 or values[i] != values[i - 1]]
+
+    def reduce_at(reduce, values, indices):
+        bounds = list(indices[1:]) + [len(values)]
+        return [reduce(values[lo:hi]) for lo, hi in zip(indices, bounds)]
+
+    span = 3600 * step
+    blocks = starts([t // span for t in local])
+    keys = [
+        _condition_key(
+            local[block] // 86400,
+            CODE_CONDITIONS[code] if 0 <= code < 100 else 0,
+            bisect_right(WEATHER_PRECIPITATION_EDGES, chance),
+            bisect_right(WEATHER_BEAUFORT_KMH, wind),
+        )
+        for block, code, chance, wind in zip(
+            blocks,
+            reduce_at(max, codes, blocks),
+            reduce_at(max, precipitation, blocks),
+            reduce_at(max, winds, blocks),
+        )
+    ]
+
+    runs = [blocks[i] for i in starts(keys)]
+    run_winds = [float(wind) for wind in reduce_at(max, winds, runs)]
+    return [Period(*row) for row in zip(
+        [times[i] for i in runs],
+        [times[i] for i in runs[1:]] + [times[-1] + 3600],
+        reduce_at(max, codes, runs),
+        [float(t) for t in reduce_at(min, temperatures, runs)],
+        [float(t) for t in reduce_at(max, temperatures, runs)],
+        [int(chance) for chance in reduce_at(max, precipitation, runs)],
+        run_winds,
+        [bisect_right(WEATHER_BEAUFORT_KMH, wind) for wind in run_winds],
+    )]
@@ -0,0 +1,62 @@
+"""Coordinate parsing and grid quantization helpers."""
+
+
+def snap_to_grid(lat, lon, step):
+    """
+    Snap coordinates to the center lines of a regular grid.
+
+    Nearby points map to the same grid cell, so they can share one
+    forecast and one rendered feed.
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        step: Grid step in degrees (e.g. 0.1)
+
+    Returns:
+        (lat, lon) tuple rounded to the grid
+    """
+    decimals = max(0, len(f'{step:.10f}'.rstrip('0').split('.')[1]))
+    return (
+        round(round(lat / step) * step, decimals),
+        round(round(lon / step) * step, decimals),
+    )
+
+
+def format_coordinates(lat, lon):
+    """Format coordinates for display, e.g. '30.3°N 120.2°E'."""
+    return f"{abs(lat)}°{'N' if lat >= 0 else 'S'} {abs(lon)}°{'E' if lon >= 0 else 'W'}"
+
+
+def parse_coordinates(text):
+    """
+    Parse a 'lat,lon' string.
+
+    Returns:
+        (lat, lon) tuple, or None if text is not a coordinate pair
+
+    Raises:
+        ValueError: If the coordinates are out of range
+    """
+    parts = text.split(',')
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    validate_coordinates(lat, lon)
+    return lat, lon
+
+
+def validate_coordinates(lat, lon):
+    """
+    Check that coordinates are within valid ranges.
+
+    Raises:
+        ValueError: If latitude or longitude is out of range
+    """
+    if not -90 <= lat <= 90:
+        raise ValueError(f'Latitude out of range: {lat}')
+    if not -180 <= lon <= 180:
+        raise ValueError(f'Longitude out of range: {lon}')
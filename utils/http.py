@@ -0,0 +1,245 @@
+"""Shared HTTP client utilities: pooled sessions and bounded-latency requests."""
+
+import time
+import random
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config.settings import (
+    WEATHER_MAX_WORKERS,
+    WEATHER_TIMEOUT,
+    WEATHER_RETRIES,
+    WEATHER_RETRY_BACKOFF,
+    WEATHER_DEADLINE,
+    WEATHER_HEDGE_PERCENTILE,
+    WEATHER_HEDGE_MIN_SAMPLES,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+)
+
+
+def create_session(pool_size=WEATHER_MAX_WORKERS):
+    """
+    Create a pooled HTTP session with keep-alive connection reuse.
+
+    Args:
+        pool_size: Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session object
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Statuses worth retrying: rate limited or a transient upstream failure
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of a request while an upstream's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream after repeated failures.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests fail immediately. Once reset_timeout seconds have passed, one
+    trial request is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """'closed', 'open' or 'half-open'."""
+        if self.opened_at is None:
+            return 'closed'
+        if self._trial or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Return True if a request may be sent now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class LatencyTracker:
+    """Recent request latencies of an upstream, for hedging decisions."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p, min_samples=WEATHER_HEDGE_MIN_SAMPLES):
+        """
+        Return the p-th percentile latency, or None with too few samples.
+
+        Args:
+            p: Percentile (0-100)
+            min_samples: Samples required before a value is returned
+        """
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+Upstream = namedtuple('Upstream', 'breaker latency')
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+_hedge_pool = None
+
+
+def get_upstream(url):
+    """Return the circuit breaker and latency tracker of a URL's host."""
+    host = urlsplit(url).netloc
+    with _upstreams_lock:
+        if host not in _upstreams:
+            _upstreams[host] = Upstream(CircuitBreaker(), LatencyTracker())
+        return _upstreams[host]
+
+
+def backoff_delay(attempt, base=WEATHER_RETRY_BACKOFF[0], cap=WEATHER_RETRY_BACKOFF[1]):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _send(session, url, upstream, timeout, **kwargs):
+    start = time.perf_counter()
+    response = session.get(url, timeout=timeout, **kwargs)
+    upstream.latency.add(time.perf_counter() - start)
+    return response
+
+
+def _hedged_send(session, url, upstream, timeout, delay, **kwargs):
+    """
+    Send a request, and a second identical one if the first takes longer
+    than delay; return whichever response arrives first.
+    """
+    global _hedge_pool
+    with _upstreams_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=2 * WEATHER_MAX_WORKERS, thread_name_prefix='hedge')
+    futures = [_hedge_pool.submit(_send, session, url, upstream, timeout, **kwargs)]
+    done, _ = wait(futures, timeout=delay)
+    if not done:
+        futures.append(_hedge_pool.submit(_send, session, url, upstream, timeout, **kwargs))
+    error = None
+    while futures:
+        done, pending = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        futures = list(pending)
+    raise error
+
+
+def resilient_get(session, url, params=None, headers=None, timeout=WEATHER_TIMEOUT,
+                  retries=WEATHER_RETRIES, deadline=WEATHER_DEADLINE,
+                  hedge_percentile=WEATHER_HEDGE_PERCENTILE):
+    """
+    GET with bounded latency: timeouts, jittered retries, hedging and a
+    per-host circuit breaker.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried with
+    full-jitter exponential backoff (honouring a numeric Retry-After),
+    until retries run out or deadline seconds have passed since the call.
+    The read timeout of every attempt is capped by the remaining deadline.
+    With hedge_percentile set, an attempt slower than that percentile of
+    the host's recent latencies is raced against a second request.
+
+    Args:
+        session: requests.Session to use
+        url: Request URL
+        params: Query parameters
+        headers: Request headers
+        timeout: (connect, read) timeout in seconds
+        retries: Retries after the first attempt
+        deadline: Seconds after which no further attempt is started
+        hedge_percentile: Latency percentile (e.g. 95) after which a hedged
+            request is sent, or None to disable hedging
+
+    Returns:
+        requests.Response (the last one if retries were exhausted)
+
+    Raises:
+        CircuitOpenError: If the host's circuit is open
+        requests.RequestException: If the last attempt failed without a response
+    """
+    upstream = get_upstream(url)
+    connect_timeout, read_timeout = timeout
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        if not upstream.breaker.allow():
+            raise CircuitOpenError(f'Circuit open for {urlsplit(url).netloc}, not sending request')
+        remaining = deadline - (time.monotonic() - started)
+        attempt_timeout = (connect_timeout, max(0.1, min(read_timeout, remaining)))
+        delay = upstream.latency.percentile(hedge_percentile) if hedge_percentile else None
+        try:
+            if delay is None:
+                response = _send(session, url, upstream, attempt_timeout, params=params, headers=headers)
+            else:
+                response = _hedged_send(session, url, upstream, attempt_timeout, delay,
+                                        params=params, headers=headers)
+        except requests.RequestException as e:
+            upstream.breaker.record_failure()
+            response, error = None, e
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                upstream.breaker.record_success()
+                return response
+            upstream.breaker.record_failure()
+            error = None
+
+        wait_seconds = backoff_delay(attempt)
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        if retry_after.isdigit():
+            wait_seconds = max(wait_seconds, int(retry_after))
+        remaining = deadline - (time.monotonic() - started)
+        if attempt >= retries or wait_seconds >= remaining:
+            if response is not None:
+                return response
+            raise error
+        time.sleep(wait_seconds)
+        attempt += 1
@@ -0,0 +1,389 @@
+"""
+Chinese lunar calendar and 24 solar terms.
+
+Dates are computed astronomically (truncated VSOP87 solar longitude and
+Meeus new moons) following the GB/T 33661-2017 rules, and the results for
+1900-2100 are shipped as compact precomputed tables in config.lunar_data
+so lookups never touch the astronomy code. Years outside the table are
+computed on demand and memoized.
+"""
+
+import math
+from datetime import date
+from functools import lru_cache
+
+# Solar longitude (degrees) of each term, in calendar order from 小寒
+SOLAR_TERM_LONGITUDES = [(285 + 15 * i) % 360 for i in range(24)]
+
+_J2000 = 2451545.0
+_ORDINAL_EPOCH_JD = 1721424.5  # JD of date ordinal 0 at 00:00 UT
+
+
+def _deg(x):
+    return math.radians(x % 360)
+
+
+# Truncated VSOP87 heliocentric longitude of the Earth (Meeus, Appendix III)
+_VSOP_L = [
+    [
+        (175347046, 0, 0), (3341656, 4.6692568, 6283.07585), (34894, 4.6261, 12566.1517),
+        (3497, 2.7441, 5753.3849), (3418, 2.8289, 3.5231), (3136, 3.6277, 77713.7715),
+        (2676, 4.4181, 7860.4194), (2343, 6.1352, 3930.2097), (1324, 0.7425, 11506.7698),
+        (1273, 2.0371, 529.691), (1199, 1.1096, 1577.3435), (990, 5.233, 5884.927),
+        (902, 2.045, 26.298), (857, 3.508, 398.149), (780, 1.179, 5223.694),
+        (753, 2.533, 5507.553), (505, 4.583, 18849.228), (492, 4.205, 775.523),
+        (357, 2.92, 0.067), (317, 5.849, 11790.629), (284, 1.899, 796.298),
+        (271, 0.315, 10977.079), (243, 0.345, 5486.778), (206, 4.806, 2544.314),
+        (205, 1.869, 5573.143), (202, 2.458, 6069.777), (156, 0.833, 213.299),
+        (132, 3.411, 2942.463), (126, 1.083, 20.775), (115, 0.645, 0.98),
+        (103, 0.636, 4694.003), (102, 0.976, 15720.839), (102, 4.267, 7.114),
+        (99, 6.21, 2146.17), (98, 0.68, 155.42), (86, 5.98, 161000.69),
+        (85, 1.3, 6275.96), (85, 3.67, 71430.7), (80, 1.81, 17260.15),
+    ],
+    [
+        (628331966747, 0, 0), (206059, 2.678235, 6283.07585), (4303, 2.6351, 12566.1517),
+        (425, 1.59, 3.523), (119, 5.796, 26.298), (109, 2.966, 1577.344),
+        (93, 2.59, 18849.23), (72, 1.14, 529.69), (68, 1.87, 398.15),
+        (67, 4.41, 5507.55), (59, 2.89, 5223.69), (56, 2.17, 155.42),
+        (45, 0.4, 796.3), (36, 0.47, 775.52), (29, 2.65, 7.11),
+        (21, 5.34, 0.98), (19, 1.85, 5486.78), (19, 4.97, 213.3),
+        (17, 2.99, 6275.96), (16, 0.03, 2544.31),
+    ],
+    [
+        (52919, 0, 0), (8720, 1.0721, 6283.0758), (309, 0.867, 12566.152),
+        (27, 0.05, 3.52), (16, 5.19, 26.3), (16, 3.68, 155.42),
+        (10, 0.76, 18849.23), (9, 2.06, 77713.77), (7, 0.83, 775.52),
+        (5, 4.66, 1577.34),
+    ],
+    [(289, 5.844, 6283.076), (35, 0, 0), (17, 5.49, 12566.15), (3, 5.2, 155.42)],
+    [(114, 3.142, 0), (8, 4.13, 6283.08), (1, 3.84, 12566.15)],
+    [(1, 3.14, 0)],
+]
+
+
+def delta_t(year):
+    """Approximate TT - UT in seconds (Espenak & Meeus polynomials)."""
+    if 1900 <= year < 1920:
+        t = year - 1900
+        return -2.79 + 1.494119 * t - 0.0598939 * t ** 2 + 0.0061966 * t ** 3 - 0.000197 * t ** 4
+    if 1920 <= year < 1941:
+        t = year - 1920
+        return 21.20 + 0.84493 * t - 0.076100 * t ** 2 + 0.0020936 * t ** 3
+    if 1941 <= year < 1961:
+        t = year - 1950
+        return 29.07 + 0.407 * t - t ** 2 / 233 + t ** 3 / 2547
+    if 1961 <= year < 1986:
+        t = year - 1975
+        return 45.45 + 1.067 * t - t ** 2 / 260 - t ** 3 / 718
+    if 1986 <= year < 2005:
+        t = year - 2000
+        return (63.86 + 0.3345 * t - 0.060374 * t ** 2 + 0.0017275 * t ** 3
+                + 0.000651814 * t ** 4 + 0.00002373599 * t ** 5)
+    if 2005 <= year < 2050:
+        t = year - 2000
+        return 62.92 + 0.32217 * t + 0.005589 * t ** 2
+    if 2050 <= year < 2150:
+        return -20 + 32 * ((year - 1820) / 100) ** 2 - 0.5628 * (2150 - year)
+    return -20 + 32 * ((year - 1820) / 100) ** 2
+
+
+def sun_longitude(jde):
+    """
+    Apparent geocentric longitude of the Sun.
+
+    Args:
+        jde: Julian Ephemeris Day (TT)
+
+    Returns:
+        Longitude in degrees, [0, 360)
+    """
+    tau = (jde - _J2000) / 365250
+    L = 0.0
+    for power, series in enumerate(_VSOP_L):
+        L += sum(a * math.cos(b + c * tau) for a, b, c in series) * tau ** power
+    L = math.degrees(L / 1e8)
+
+    T = tau * 10
+    lon = L + 180 - 0.09033 / 3600
+    omega = _deg(125.04452 - 1934.136261 * T)
+    l_sun = _deg(280.4665 + 36000.7698 * T)
+    l_moon = _deg(218.3165 + 481267.8813 * T)
+    nutation = (-17.20 * math.sin(omega) - 1.32 * math.sin(2 * l_sun)
+                - 0.23 * math.sin(2 * l_moon) + 0.21 * math.sin(2 * omega))
+    aberration = -20.4898
+    return (lon + (nutation + aberration) / 3600) % 360
+
+
+def _jde_to_year(jde):
+    return 2000 + (jde - _J2000) / 365.25
+
+
+def solar_term_jde(year, longitude):
+    """
+    Find the moment the Sun reaches a longitude within a Gregorian year.
+
+    Args:
+        year: Gregorian year
+        longitude: Target apparent longitude in degrees
+
+    Returns:
+        Julian Ephemeris Day (TT)
+    """
+    # Mean motion guess: 0° (vernal equinox) is near March 20
+    jde = _J2000 + (year - 2000) * 365.2422 + 79 + longitude % 360 * 365.2422 / 360
+    if jde > _J2000 + (year - 2000) * 365.2422 + 365:
+        jde -= 365.2422
+    for _ in range(50):
+        diff = (longitude - sun_longitude(jde) + 180) % 360 - 180
+        jde += diff * 365.2422 / 360
+        if abs(diff) < 1e-7:
+            break
+    return jde
+
+
+def new_moon_jde(k):
+    """
+    Julian Ephemeris Day of the k-th new moon after 2000-01-06 (Meeus ch. 49).
+
+    Args:
+        k: Integer lunation number
+    """
+    T = k / 1236.85
+    jde = (2451550.09766 + 29.530588861 * k + 0.00015437 * T ** 2
+           - 0.000000150 * T ** 3 + 0.00000000073 * T ** 4)
+    E = 1 - 0.002516 * T - 0.0000074 * T ** 2
+    M = _deg(2.5534 + 29.10535670 * k - 0.0000014 * T ** 2 - 0.00000011 * T ** 3)
+    Mp = _deg(201.5643 + 385.81693528 * k + 0.0107582 * T ** 2
+              + 0.00001238 * T ** 3 - 0.000000058 * T ** 4)
+    F = _deg(160.7108 + 390.67050284 * k - 0.0016118 * T ** 2
+             - 0.00000227 * T ** 3 + 0.000000011 * T ** 4)
+    omega = _deg(124.7746 - 1.56375588 * k + 0.0020672 * T ** 2 + 0.00000215 * T ** 3)
+    sin = math.sin
+
+    jde += (-0.40720 * sin(Mp) + 0.17241 * E * sin(M) + 0.01608 * sin(2 * Mp)
+            + 0.01039 * sin(2 * F) + 0.00739 * E * sin(Mp - M) - 0.00514 * E * sin(Mp + M)
+            + 0.00208 * E * E * sin(2 * M) - 0.00111 * sin(Mp - 2 * F)
+            - 0.00057 * sin(Mp + 2 * F) + 0.00056 * E * sin(2 * Mp + M)
+            - 0.00042 * sin(3 * Mp) + 0.00042 * E * sin(M + 2 * F)
+            + 0.00038 * E * sin(M - 2 * F) - 0.00024 * E * sin(2 * Mp - M)
+            - 0.00017 * sin(omega) - 0.00007 * sin(Mp + 2 * M)
+            + 0.00004 * sin(2 * Mp - 2 * F) + 0.00004 * sin(3 * M)
+            + 0.00003 * sin(Mp + M - 2 * F) + 0.00003 * sin(2 * Mp + 2 * F)
+            - 0.00003 * sin(Mp + M + 2 * F) + 0.00003 * sin(Mp - M + 2 * F)
+            - 0.00002 * sin(Mp - M - 2 * F) - 0.00002 * sin(3 * Mp + M)
+            + 0.00002 * sin(4 * Mp))
+
+    planetary = [
+        (0.000325, 299.77 + 0.107408 * k - 0.009173 * T ** 2),
+        (0.000165, 251.88 + 0.016321 * k), (0.000164, 251.83 + 26.651886 * k),
+        (0.000126, 349.42 + 36.412478 * k), (0.000110, 84.66 + 18.206239 * k),
+        (0.000062, 141.74 + 53.303771 * k), (0.000060, 207.14 + 2.453732 * k),
+        (0.000056, 154.84 + 7.306860 * k), (0.000047, 34.52 + 27.261239 * k),
+        (0.000042, 207.19 + 0.121824 * k), (0.000040, 291.34 + 1.844379 * k),
+        (0.000037, 161.72 + 24.198154 * k), (0.000035, 239.56 + 25.513099 * k),
+        (0.000023, 331.55 + 3.592518 * k),
+    ]
+    return jde + sum(c * sin(_deg(a)) for c, a in planetary)
+
+
+def _china_ordinal(jde):
+    """
+    Convert a JDE to the date ordinal in China's civil time.
+
+    Before 1929 the Chinese calendar used Beijing local mean time
+    (116°25'E); from 1929 it uses UTC+8.
+    """
+    jd_ut = jde - delta_t(_jde_to_year(jde)) / 86400
+    offset = 116.4167 / 360 if jd_ut < 2425611.5 else 8 / 24  # 1929-01-01
+    return int(math.floor(jd_ut + offset - _ORDINAL_EPOCH_JD))
+
+
+@lru_cache(maxsize=None)
+def compute_solar_terms(year):
+    """
+    Astronomically compute the 24 solar term dates of a Gregorian year.
+
+    Returns:
+        Tuple of 24 date ordinals, in order from 小寒 to 冬至
+    """
+    return tuple(_china_ordinal(solar_term_jde(year, lon)) for lon in SOLAR_TERM_LONGITUDES)
+
+
+def _new_moon_on_or_before(ordinal):
+    """Return (k, ordinal) of the last new moon starting on or before a day."""
+    k = math.floor((ordinal - date(2000, 1, 6).toordinal()) / 29.530588861) + 1
+    while _china_ordinal(new_moon_jde(k)) > ordinal:
+        k -= 1
+    return k, _china_ordinal(new_moon_jde(k))
+
+
+@lru_cache(maxsize=None)
+def _sui_months(year):
+    """
+    Months of the sui from the winter solstice of year - 1 to that of year.
+
+    Returns:
+        List of (start ordinal, month number, is_leap); the first entry is
+        month 11 and the last is the month before the next month 11
+    """
+    solstice_start = compute_solar_terms(year - 1)[23]
+    solstice_end = compute_solar_terms(year)[23]
+    k, _ = _new_moon_on_or_before(solstice_start)
+    k_end, _ = _new_moon_on_or_before(solstice_end)
+    starts = [_china_ordinal(new_moon_jde(i)) for i in range(k, k_end + 1)]
+
+    # Principal terms (中气) are the even-indexed longitudes (multiples of 30°)
+    principal = sorted(
+        ordinal
+        for y in (year - 1, year)
+        for i, ordinal in enumerate(compute_solar_terms(y))
+        if SOLAR_TERM_LONGITUDES[i] % 30 == 0
+    )
+    leap_needed = len(starts) - 1 == 13
+
+    months = []
+    number = 11
+    for i in range(len(starts) - 1):
+        has_principal = any(starts[i] <= p < starts[i + 1] for p in principal)
+        if leap_needed and not has_principal and i > 0:
+            months.append((starts[i], number, True))
+            leap_needed = False
+            continue
+        if i > 0:
+            number = number % 12 + 1
+        months.append((starts[i], number, False))
+    return months
+
+
+def compute_lunar_year(year):
+    """
+    Astronomically compute a lunar year's layout.
+
+    Returns:
+        (new year ordinal, list of month lengths, leap month or 0)
+    """
+    def index_of_first_month(months):
+        return next(i for i, (_, number, leap) in enumerate(months) if number == 1 and not leap)
+
+    current = _sui_months(year)
+    following = _sui_months(year + 1)
+    months = current[index_of_first_month(current):]
+    end_index = index_of_first_month(following)
+    months += following[:end_index]
+    boundaries = [start for start, _, _ in months] + [following[end_index][0]]
+
+    lengths = [boundaries[i + 1] - boundaries[i] for i in range(len(months))]
+    leap = next((number for _, number, is_leap in months if is_leap), 0)
+    return months[0][0], lengths, leap
+
+
+def pack_lunar_year(year, new_year, lengths, leap):
+    """
+    Pack a lunar year into one int.
+
+    Bits 0-12 flag 30-day months in order, bits 13-16 hold the leap month
+    (0 for none) and bits 17+ the day offset of the new year from Jan 1.
+    """
+    bits = sum(1 << i for i, length in enumerate(lengths) if length == 30)
+    return ((new_year - date(year, 1, 1).toordinal()) << 17) | (leap << 13) | bits
+
+
+def unpack_lunar_year(year, info):
+    """Inverse of pack_lunar_year()."""
+    leap = (info >> 13) & 0xF
+    count = 13 if leap else 12
+    lengths = [30 if info & (1 << i) else 29 for i in range(count)]
+    return date(year, 1, 1).toordinal() + (info >> 17), lengths, leap
+
+
+def _tables():
+    from config.lunar_data import FIRST_YEAR, LUNAR_YEAR_INFO, SOLAR_TERM_DAYS
+    return FIRST_YEAR, LUNAR_YEAR_INFO, SOLAR_TERM_DAYS
+
+
+@lru_cache(maxsize=None)
+def lunar_year(year):
+    """
+    Layout of a lunar year, from the precomputed table when available.
+
+    Returns:
+        (new year ordinal, list of month lengths, leap month or 0)
+    """
+    first, info, _ = _tables()
+    if first <= year < first + len(info):
+        return unpack_lunar_year(year, info[year - first])
+    return compute_lunar_year(year)
+
+
+def solar_terms(year):
+    """
+    Dates of the 24 solar terms of a Gregorian year.
+
+    Returns:
+        List of 24 datetime.date objects, in order from 小寒 to 冬至
+    """
+    first, _, days = _tables()
+    if first <= year < first + len(days) // 24:
+        row = days[(year - first) * 24:(year - first + 1) * 24]
+        return [date(year, i // 2 + 1, day) for i, day in enumerate(row)]
+    return [date.fromordinal(ordinal) for ordinal in compute_solar_terms(year)]
+
+
+def lunar_to_solar(year, month, day, leap=False):
+    """
+    Convert a lunar date to a Gregorian date.
+
+    Args:
+        year: Lunar year (the Gregorian year its new year falls in)
+        month: Lunar month, 1-12
+        day: Day of month; negative values count from the month end
+            (-1 is the last day)
+        leap: Whether the month is the leap month
+
+    Returns:
+        datetime.date
+
+    Raises:
+        ValueError: If the month or day does not exist in that year
+    """
+    new_year, lengths, leap_month = lunar_year(year)
+    if leap and leap_month != month:
+        raise ValueError(f'Lunar year {year} has no leap month {month}')
+
+    index = month - 1
+    if leap_month and (month > leap_month or (leap and month == leap_month)):
+        index += 1
+    length = lengths[index]
+    if day < 0:
+        day = length + 1 + day
+    if not 1 <= day <= length:
+        raise ValueError(f'Lunar month {month} of {year} has {length} days')
+
+    return date.fromordinal(new_year + sum(lengths[:index]) + day - 1)
+
+
+def solar_to_lunar(value):
+    """
+    Convert a Gregorian date to a lunar date.
+
+    Returns:
+        (lunar year, month, day, is_leap) tuple
+    """
+    ordinal = value.toordinal()
+    year = value.year
+    new_year, lengths, leap_month = lunar_year(year)
+    if ordinal < new_year:
+        year -= 1
+        new_year, lengths, leap_month = lunar_year(year)
+
+    offset = ordinal - new_year
+    for index, length in enumerate(lengths):
+        if offset < length:
+            month = index + 1
+            is_leap = False
+            if leap_month and index >= leap_month:
+                month = index
+                is_leap = index == leap_month
+            return year, month, offset + 1, is_leap
+        offset -= length
+    raise ValueError(f'{value} is outside lunar year {year}')
@@ -0,0 +1,106 @@
+"""Content-hash manifest for generated calendar files."""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from config import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+MANIFEST_NAME = 'manifest.json'
+
+_lock = threading.Lock()
+
+
+def manifest_path():
+    """Return the path of the manifest in the output directory."""
+    return os.path.join(settings.OUTPUT_DIR, MANIFEST_NAME)
+
+
+def load_manifest():
+    """
+    Load the manifest.
+
+    Returns:
+        Dict mapping output filename to its entry (empty if missing)
+    """
+    try:
+        with open(manifest_path(), 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _lock_path():
+    """
+    Return the path of the manifest lock file.
+
+    The lock lives in the temp directory rather than next to the manifest,
+    so it is never published with the output directory; it is keyed by the
+    output directory so runs writing to different directories don't contend.
+    """
+    key = hashlib.sha256(os.path.abspath(settings.OUTPUT_DIR).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f'ics-manifest-{key}.lock')
+
+
+@contextmanager
+def _manifest_lock():
+    """Serialize manifest updates across threads and processes."""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(_lock_path(), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def update_manifest(filename, **fields):
+    """
+    Merge fields into a file's manifest entry and save the manifest.
+
+    Args:
+        filename: Output filename (without path)
+        **fields: Entry fields to set
+    """
+    with _manifest_lock():
+        files = load_manifest()
+        files.setdefault(filename, {}).update(fields)
+        _save_manifest(files)
+
+
+def set_manifest_entries(entries):
+    """
+    Replace several files' manifest entries at once and save the manifest.
+
+    Args:
+        entries: Dict mapping output filename to its entry
+    """
+    with _manifest_lock():
+        files = load_manifest()
+        files.update(entries)
+        _save_manifest(files)
+
+
+def _save_manifest(files):
+    """Atomically write the manifest (call with the manifest lock held)."""
+    os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.OUTPUT_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'files': dict(sorted(files.items()))}, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, manifest_path())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
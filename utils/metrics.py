@@ -0,0 +1,221 @@
+"""Run metrics: per-generator phase timings, output sizes and HTTP latency."""
+
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+PROMETHEUS_PREFIX = 'cal'
+
+
+class Metrics:
+    """
+    Thread-safe collector of per-generator and per-city run metrics.
+
+    Phases are timed exclusively: when phases nest (e.g. 'serialize'
+    inside 'write'), the inner phase's time is not counted again in the
+    outer one. CPU time is per thread, so concurrent phases on other
+    threads do not inflate it.
+
+    Callables in phase_hooks are called with (name, phase) for every
+    phase and return a context manager entered around it, outside the
+    timed section (see utils/profiling.py).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = time.time()
+        self.generators = {}
+        self.http = {}
+        self.phase_hooks = []
+
+    def _generator(self, name):
+        return self.generators.setdefault(name, {'phases': {}})
+
+    @contextmanager
+    def phase(self, name, phase):
+        """
+        Time a phase of a generator's run.
+
+        Args:
+            name: Generator/feed name (e.g. 'holidays', 'weather_Beijing')
+            phase: 'fetch', 'build', 'serialize' or 'write'
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        with ExitStack() as hooks:
+            for hook in list(self.phase_hooks):
+                hooks.enter_context(hook(name, phase))
+            frame = {'wall': 0.0, 'cpu': 0.0}  # time spent in nested phases
+            stack.append(frame)
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                yield
+            finally:
+                wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+                stack.pop()
+                if stack:
+                    stack[-1]['wall'] += wall
+                    stack[-1]['cpu'] += cpu
+                self.add_phase(name, phase, wall - frame['wall'], cpu - frame['cpu'])
+
+    def add_phase(self, name, phase, wall, cpu, count=1):
+        """Add measured time to a generator phase."""
+        with self._lock:
+            entry = self._generator(name)['phases'].setdefault(
+                phase, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'count': 0}
+            )
+            entry['wall_seconds'] += wall
+            entry['cpu_seconds'] += cpu
+            entry['count'] += count
+
+    def record(self, name, **values):
+        """
+        Record values for a generator, e.g. events=7, bytes=2048, changed=True.
+        """
+        with self._lock:
+            self._generator(name).update(values)
+
+    def record_http(self, city, status, seconds):
+        """
+        Record one upstream HTTP request.
+
+        Args:
+            city: City or location name the request was made for
+            status: HTTP status code, or 'error' if no response arrived
+            seconds: Request latency
+        """
+        with self._lock:
+            entry = self.http.setdefault(city, {
+                'requests': 0, 'latency_seconds_sum': 0.0, 'latency_seconds_max': 0.0, 'status': {},
+            })
+            entry['requests'] += 1
+            entry['latency_seconds_sum'] += seconds
+            entry['latency_seconds_max'] = max(entry['latency_seconds_max'], seconds)
+            entry['status'][str(status)] = entry['status'].get(str(status), 0) + 1
+
+    def drain(self):
+        """
+        Return all collected data and reset the collector.
+
+        Used by worker processes to ship their metrics to the parent.
+        """
+        with self._lock:
+            data = {'generators': self.generators, 'http': self.http}
+            self.generators, self.http = {}, {}
+        return data
+
+    def merge(self, data):
+        """Merge data returned by drain() in another process."""
+        for name, entry in data['generators'].items():
+            for phase, timing in entry.get('phases', {}).items():
+                self.add_phase(name, phase, timing['wall_seconds'], timing['cpu_seconds'], timing['count'])
+            self.record(name, **{k: v for k, v in entry.items() if k != 'phases'})
+        for city, entry in data['http'].items():
+            with self._lock:
+                target = self.http.setdefault(city, {
+                    'requests': 0, 'latency_seconds_sum': 0.0, 'latency_seconds_max': 0.0, 'status': {},
+                })
+                target['requests'] += entry['requests']
+                target['latency_seconds_sum'] += entry['latency_seconds_sum']
+                target['latency_seconds_max'] = max(target['latency_seconds_max'], entry['latency_seconds_max'])
+                for status, count in entry['status'].items():
+                    target['status'][status] = target['status'].get(status, 0) + count
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict."""
+        with self._lock:
+            return json.loads(json.dumps({
+                'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec='seconds'),
+                'duration_seconds': round(time.time() - self.started_at, 6),
+                'generators': self.generators,
+                'http': self.http,
+            }))
+
+    def to_prometheus(self):
+        """
+        Render metrics in the Prometheus text exposition format.
+
+        Returns:
+            Text suitable for node_exporter's textfile collector
+        """
+        data = self.snapshot()
+        families = {}
+
+        def add(metric, help_text, labels, value):
+            family = families.setdefault(metric, (help_text, []))
+            label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+            family[1].append(f'{PROMETHEUS_PREFIX}_{metric}{{{label_text}}} {float(value)!r}')
+
+        for name, entry in sorted(data['generators'].items()):
+            for phase, timing in sorted(entry['phases'].items()):
+                labels = {'generator': name, 'phase': phase}
+                add('phase_wall_seconds', 'Wall-clock time per generator phase', labels, timing['wall_seconds'])
+                add('phase_cpu_seconds', 'CPU time per generator phase', labels, timing['cpu_seconds'])
+            if 'events' in entry:
+                add('events', 'Events in the generated calendar', {'generator': name}, entry['events'])
+            if 'bytes' in entry:
+                add('bytes_written', 'Size of the generated calendar in bytes', {'generator': name}, entry['bytes'])
+            if 'changed' in entry:
+                add('file_changed', '1 if the calendar file was rewritten', {'generator': name}, int(entry['changed']))
+
+        for city, entry in sorted(data['http'].items()):
+            for status, count in sorted(entry['status'].items()):
+                add('http_requests', 'Upstream HTTP requests by status', {'city': city, 'status': status}, count)
+            add('http_latency_seconds_sum', 'Total upstream HTTP latency', {'city': city}, entry['latency_seconds_sum'])
+            add('http_latency_seconds_max', 'Slowest upstream HTTP request', {'city': city}, entry['latency_seconds_max'])
+
+        lines = []
+        for metric, (help_text, samples) in families.items():
+            lines.append(f'# HELP {PROMETHEUS_PREFIX}_{metric} {help_text}')
+            lines.append(f'# TYPE {PROMETHEUS_PREFIX}_{metric} gauge')
+            lines.extend(samples)
+        lines.append(f'# HELP {PROMETHEUS_PREFIX}_run_duration_seconds Duration of the last run')
+        lines.append(f'# TYPE {PROMETHEUS_PREFIX}_run_duration_seconds gauge')
+        lines.append(f"{PROMETHEUS_PREFIX}_run_duration_seconds {float(data['duration_seconds'])!r}")
+        lines.append(f'# HELP {PROMETHEUS_PREFIX}_last_run_timestamp_seconds Unix time the last run started')
+        lines.append(f'# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge')
+        lines.append(f'{PROMETHEUS_PREFIX}_last_run_timestamp_seconds {float(self.started_at)!r}')
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        """Write snapshot() as JSON, atomically."""
+        _write_atomic(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2, sort_keys=True) + '\n')
+
+    def write_prometheus(self, path):
+        """
+        Write the Prometheus textfile, atomically.
+
+        node_exporter may read the file at any moment, so it is replaced by
+        rename rather than rewritten in place.
+        """
+        _write_atomic(path, self.to_prometheus())
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+# Process-wide collector
+metrics = Metrics()
@@ -0,0 +1,267 @@
+"""Per-generator CPU and memory profiling of run phases (build, serialize, write, fetch)."""
+
+import os
+import re
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from config.settings import PROFILE_TOP_ALLOCATIONS, PROFILE_MIN_STACK_SHARE
+from .metrics import metrics
+
+# Deepest call stack written to collapsed stack files
+MAX_STACK_DEPTH = 128
+
+# Allocation sites left out of reports: the profiler's own bookkeeping
+_IGNORED_FILES = {tracemalloc.__file__, __file__, '<frozen importlib._bootstrap>'}
+
+
+class Profiler:
+    """
+    Collect cProfile and tracemalloc data per generator and phase.
+
+    While started, every metrics.phase() is profiled: 'build' covers
+    add_event(), 'serialize' to_ical()/render() and 'write' the file
+    write, 'fetch' weather requests. Like phase timings, CPU profiles
+    are exclusive: an enclosing phase's profiler is paused while a nested
+    phase runs. Allocation figures are inclusive of nested phases, and
+    tracemalloc sees every thread, so run generators one at a time for
+    clean allocation reports.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.active = False
+        self.memory = False
+        self._started_tracemalloc = False
+        # (name, phase) -> list of cProfile.Profile, one per phase run
+        self.profiles = {}
+        # (name, phase) -> {'peak', 'net', 'sites': {site: [size, count]}}
+        self.allocations = {}
+
+    def start(self, memory=True):
+        """
+        Start profiling every phase.
+
+        Args:
+            memory: Also trace allocations with tracemalloc (slower)
+        """
+        with self._lock:
+            if self.active:
+                return
+            self.active = True
+            self.memory = memory
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            metrics.phase_hooks.append(self.phase)
+
+    def stop(self):
+        """Stop profiling; collected data is kept until write()."""
+        with self._lock:
+            if not self.active:
+                return
+            self.active = False
+            metrics.phase_hooks.remove(self.phase)
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    @contextmanager
+    def phase(self, name, phase):
+        """Profile one run of a phase (a metrics phase hook)."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        outer = stack[-1] if stack else None
+        if outer and outer['profile']:
+            outer['profile'].disable()
+
+        frame = {'profile': cProfile.Profile(), 'peak': 0}
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if outer:
+                outer['peak'] = max(outer['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start'] = current
+            frame['snapshot'] = tracemalloc.take_snapshot()
+        stack.append(frame)
+        try:
+            frame['profile'].enable()
+        except ValueError:
+            # Another profiler is active (e.g. on another thread, Python 3.12+)
+            frame['profile'] = None
+        try:
+            yield
+        finally:
+            if frame['profile']:
+                frame['profile'].disable()
+            stack.pop()
+            self._record(name, phase, frame, outer)
+            if outer and outer['profile']:
+                outer['profile'].enable()
+
+    def _record(self, name, phase, frame, outer):
+        """Store the results of one phase run."""
+        sites = None
+        if 'snapshot' in frame and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(frame['peak'], peak)
+            if outer:
+                outer['peak'] = max(outer['peak'], peak)
+            sites = tracemalloc.take_snapshot().compare_to(frame['snapshot'], 'lineno')
+        with self._lock:
+            if frame['profile']:
+                self.profiles.setdefault((name, phase), []).append(frame['profile'])
+            if sites is not None:
+                entry = self.allocations.setdefault((name, phase), {'peak': 0, 'net': 0, 'sites': {}})
+                entry['peak'] = max(entry['peak'], peak - frame['start'])
+                entry['net'] += current - frame['start']
+                for diff in sites:
+                    if diff.size_diff and diff.traceback[0].filename not in _IGNORED_FILES:
+                        site = entry['sites'].setdefault(str(diff.traceback), [0, 0])
+                        site[0] += diff.size_diff
+                        site[1] += diff.count_diff
+
+    def reset(self):
+        """Drop all collected data."""
+        with self._lock:
+            self.profiles, self.allocations = {}, {}
+
+    def write(self, directory, top=PROFILE_TOP_ALLOCATIONS):
+        """
+        Write reports for everything collected, then drop it.
+
+        Per generator name: '<name>.<phase>.pstats' for each phase
+        (python -m pstats, snakeviz), '<name>.collapsed' with one line per
+        call stack for flamegraph.pl or speedscope, rooted at the phase,
+        and '<name>.alloc.txt' with each phase's peak, net allocation and
+        top allocation sites when memory was traced.
+
+        Args:
+            directory: Output directory (created if missing)
+            top: Allocation sites listed per phase
+
+        Returns:
+            List of written paths
+        """
+        with self._lock:
+            profiles, allocations = self.profiles, self.allocations
+            self.profiles, self.allocations = {}, {}
+
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        names = sorted({name for name, _ in profiles} | {name for name, _ in allocations})
+        for name in names:
+            stem = os.path.join(directory, re.sub(r'[^\w.-]', '_', name))
+            stacks = {}
+            for (profile_name, phase), runs in sorted(profiles.items()):
+                if profile_name != name:
+                    continue
+                stats = pstats.Stats(runs[0])
+                for run in runs[1:]:
+                    stats.add(run)
+                path = f'{stem}.{phase}.pstats'
+                stats.dump_stats(path)
+                written.append(path)
+                stacks.update(collapsed_stacks(stats, phase))
+            if stacks:
+                path = f'{stem}.collapsed'
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.writelines(f'{stack} {value}\n' for stack, value in sorted(stacks.items()))
+                written.append(path)
+            phases = [(phase, entry) for (alloc_name, phase), entry in sorted(allocations.items())
+                      if alloc_name == name]
+            if phases:
+                path = f'{stem}.alloc.txt'
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(allocation_report(name, phases, top))
+                written.append(path)
+        return written
+
+
+def _label(func):
+    """Frame label for a pstats function key (file, line, name)."""
+    filename, line, name = func
+    if filename == '~':
+        return name.replace(';', ',')
+    return f'{name} ({os.path.basename(filename)}:{line})'.replace(';', ',')
+
+
+def collapsed_stacks(stats, root):
+    """
+    Approximate collapsed call stacks from a cProfile run.
+
+    cProfile keeps totals per function and per caller, not whole stacks,
+    so a function's time is split between the paths leading to it in
+    proportion to the time each caller spent in it. Recursion is cut at
+    the first repeated function, and paths below PROFILE_MIN_STACK_SHARE
+    of the total are dropped.
+
+    Args:
+        stats: pstats.Stats
+        root: Name of the root frame (the phase)
+
+    Returns:
+        Dict of 'root;frame;...;frame' to self time in microseconds
+    """
+    entries = stats.stats
+    children = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    total = sum(entries[func][3] for func in roots)
+    minimum = total * PROFILE_MIN_STACK_SHARE
+
+    stacks = {}
+    pending = [(func, entries[func][3], f'{root};{_label(func)}', (func,)) for func in roots]
+    while pending:
+        func, seconds, path, seen = pending.pop()
+        _, _, own, cumulative, _ = entries[func]
+        share = seconds / cumulative if cumulative else 0.0
+        micros = round(own * share * 1e6)
+        if micros:
+            stacks[path] = stacks.get(path, 0) + micros
+        if len(seen) >= MAX_STACK_DEPTH:
+            continue
+        for child, child_seconds in children.get(func, ()):
+            child_seconds *= share
+            if child not in seen and child_seconds > minimum:
+                pending.append((child, child_seconds, f'{path};{_label(child)}', seen + (child,)))
+    return stacks
+
+
+def allocation_report(name, phases, top=PROFILE_TOP_ALLOCATIONS):
+    """
+    Render the allocation report of one generator.
+
+    Args:
+        name: Generator name
+        phases: List of (phase, allocations entry) as collected by Profiler
+        top: Allocation sites listed per phase
+
+    Returns:
+        Report text
+    """
+    lines = [f'Allocations of {name} (net: still allocated when the phase ended)', '']
+    for phase, entry in phases:
+        lines.append(f"[{phase}] peak {_format_size(entry['peak'])}, net {_format_size(entry['net'])}")
+        sites = sorted(entry['sites'].items(), key=lambda item: -abs(item[1][0]))[:top]
+        for site, (size, count) in sites:
+            lines.append(f'  {_format_size(size):>12} {count:>+9} blocks  {site}')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def _format_size(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024 or unit == 'MiB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+# Process-wide profiler
+profiler = Profiler()
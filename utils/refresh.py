@@ -0,0 +1,165 @@
+"""Per-feed refresh scheduling for daemon mode."""
+
+import os
+import glob
+import random
+import threading
+import time
+from collections import namedtuple
+
+# Retry delay after a failed refresh, doubled per consecutive failure
+RETRY_BASE_SECONDS = 60
+
+FeedState = namedtuple('FeedState', 'name stage next_due failures')
+
+
+class RefreshScheduler:
+    """
+    Track when each feed is next due for a refresh.
+
+    Each stage has a (min, max) refresh interval in seconds; every refresh
+    schedules the next one a random time within it, so feeds of one stage
+    drift apart instead of refreshing in lockstep. Failed refreshes are
+    retried with exponential backoff, capped at the stage's interval.
+    """
+
+    def __init__(self, intervals, rng=None):
+        """
+        Initialize scheduler.
+
+        Args:
+            intervals: Dict of stage to (min, max) seconds between refreshes;
+                stages without an entry use the 'default' entry
+            rng: random.Random used for jitter (default: a new instance)
+        """
+        self.intervals = intervals
+        self.rng = rng or random.Random()
+        self.feeds = {}
+
+    def bounds(self, stage):
+        """Return the (min, max) refresh interval of a stage."""
+        return self.intervals.get(stage, self.intervals['default'])
+
+    def interval(self, stage):
+        """Pick a jittered refresh interval for a stage."""
+        return self.rng.uniform(*self.bounds(stage))
+
+    def add(self, name, stage, last_refresh=None, now=None):
+        """
+        Add a feed.
+
+        Args:
+            name: Feed name
+            stage: Stage of the feed (a key of intervals)
+            last_refresh: Unix time the feed was last refreshed, e.g. its
+                output file's mtime; None makes it due immediately
+            now: Current Unix time
+        """
+        now = time.time() if now is None else now
+        next_due = now if last_refresh is None else min(
+            last_refresh + self.interval(stage), now + self.bounds(stage)[1]
+        )
+        self.feeds[name] = FeedState(name, stage, next_due, 0)
+
+    def due(self, now=None):
+        """
+        List feeds due for a refresh.
+
+        Returns:
+            List of FeedState, most overdue first
+        """
+        now = time.time() if now is None else now
+        return sorted((feed for feed in self.feeds.values() if feed.next_due <= now),
+                      key=lambda feed: feed.next_due)
+
+    def done(self, name, ok, now=None):
+        """
+        Record the outcome of a refresh and schedule the next one.
+
+        Args:
+            name: Feed name
+            ok: True if the refresh succeeded
+            now: Current Unix time
+        """
+        now = time.time() if now is None else now
+        feed = self.feeds[name]
+        if ok:
+            self.feeds[name] = feed._replace(next_due=now + self.interval(feed.stage), failures=0)
+        else:
+            delay = min(RETRY_BASE_SECONDS * 2 ** feed.failures, self.bounds(feed.stage)[0])
+            self.feeds[name] = feed._replace(next_due=now + delay, failures=feed.failures + 1)
+
+    def defer(self, name, seconds, now=None):
+        """Postpone a due feed, e.g. when the upstream rate limit is exhausted."""
+        now = time.time() if now is None else now
+        self.feeds[name] = self.feeds[name]._replace(next_due=now + seconds)
+
+    def next_due(self):
+        """Unix time the earliest feed is due, or None without feeds."""
+        return min((feed.next_due for feed in self.feeds.values()), default=None)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Holds at most burst tokens and gains rate tokens per second.
+    """
+
+    def __init__(self, rate, burst):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, count, now=None):
+        """
+        Take up to count tokens without waiting.
+
+        Returns:
+            Number of tokens granted (0..count)
+        """
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            granted = min(count, int(self.tokens))
+            self.tokens -= granted
+            return granted
+
+    def wait_time(self, count=1, now=None):
+        """Seconds until count tokens are available."""
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            missing = count - self.tokens
+            return 0.0 if missing <= 0 else missing / self.rate
+
+
+def config_fingerprint(patterns):
+    """
+    Fingerprint configuration files by path and modification time.
+
+    Args:
+        patterns: Glob patterns of files to watch
+
+    Returns:
+        Tuple that changes when a matching file is added, removed or modified
+    """
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    fingerprint = []
+    for path in paths:
+        try:
+            fingerprint.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(fingerprint)
@@ -0,0 +1,109 @@
+"""Parallel task scheduler with per-task failure isolation."""
+
+import time
+import traceback
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from .metrics import metrics
+
+# kind is 'cpu' (process pool) or 'io' (thread pool)
+Task = namedtuple('Task', 'name func args kind')
+TaskResult = namedtuple('TaskResult', 'name ok seconds error')
+
+# Worker processes must not be forked: I/O tasks already run on threads when
+# the pool starts, and a forked child can inherit an import lock one of them
+# holds and hang on its first lazy import. A forkserver (spawn where that is
+# unavailable) starts workers from a clean single-threaded process.
+_MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+def _run_timed(func, args):
+    """
+    Run a task function, capturing its duration and any exception.
+
+    A task that succeeds but returns a string (e.g. a partial failure it
+    tolerated) has it reported as its TaskResult error.
+    """
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        return True, time.perf_counter() - start, result if isinstance(result, str) else None
+    except Exception as e:
+        traceback.print_exc()
+        return False, time.perf_counter() - start, f'{type(e).__name__}: {e}'
+
+
+def _run_in_process(func, args):
+    """Run a task in a worker process and ship its metrics back with the result."""
+    return _run_timed(func, args), metrics.drain()
+
+
+def run_tasks(tasks, jobs=1):
+    """
+    Run independent tasks, in parallel when jobs > 1.
+
+    CPU-bound tasks go to a process pool and I/O-bound tasks to a thread
+    pool, each limited to jobs workers. A failing task never stops the
+    others; its error is reported in its TaskResult.
+
+    Args:
+        tasks: List of Task
+        jobs: Degree of parallelism (1 runs everything in order)
+
+    Returns:
+        List of TaskResult in the same order as tasks
+    """
+    if jobs <= 1:
+        return [TaskResult(task.name, *_run_timed(task.func, task.args)) for task in tasks]
+
+    results = {}
+    cpu_tasks = [task for task in tasks if task.kind == 'cpu']
+    io_tasks = [task for task in tasks if task.kind != 'cpu']
+
+    processes = ProcessPoolExecutor(max_workers=min(jobs, len(cpu_tasks) or 1), mp_context=_MP_CONTEXT)
+    with ThreadPoolExecutor(max_workers=jobs) as threads, processes:
+        futures = {threads.submit(_run_timed, task.func, task.args): task for task in io_tasks}
+        futures.update(
+            (processes.submit(_run_in_process, task.func, task.args), task) for task in cpu_tasks
+        )
+
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                result = future.result()
+                if task.kind == 'cpu':
+                    result, worker_metrics = result
+                    metrics.merge(worker_metrics)
+                results[task.name] = TaskResult(task.name, *result)
+            except Exception as e:
+                # The worker itself died (e.g. a crashed process)
+                results[task.name] = TaskResult(task.name, False, 0.0, f'{type(e).__name__}: {e}')
+
+    return [results[task.name] for task in tasks]
+
+
+def print_summary(results):
+    """
+    Print a per-task summary.
+
+    Args:
+        results: List of TaskResult
+
+    Returns:
+        Number of failed tasks
+    """
+    failed = [result for result in results if not result.ok]
+
+    print("\n📋 Summary:")
+    for result in results:
+        status = ('⚠️' if result.error else '✅') if result.ok else '❌'
+        line = f"  {status} {result.name:<24} {result.seconds:6.2f}s"
+        if result.error:
+            line += f"  {result.error}"
+        print(line)
+    print(f"  {len(results) - len(failed)}/{len(results)} succeeded")
+
+    return len(failed)
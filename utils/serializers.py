@@ -0,0 +1,250 @@
+"""ICS serializer backends for BaseCalendarGenerator."""
+
+from datetime import date, datetime
+from collections import namedtuple
+
+# start/end are dates for all-day events and aware UTC datetimes for timed
+# events; rrule is a canonical RRULE value string (see format_rrule),
+# exdates a tuple of excluded dates
+EventRecord = namedtuple(
+    'EventRecord', 'uid summary start end description rrule exdates', defaults=(None, ())
+)
+
+# RFC 5545 section 3.3.10 order; some clients ignore RRULEs not starting with FREQ
+RRULE_PART_ORDER = (
+    'FREQ', 'UNTIL', 'COUNT', 'INTERVAL', 'BYSECOND', 'BYMINUTE', 'BYHOUR',
+    'BYDAY', 'BYMONTHDAY', 'BYYEARDAY', 'BYWEEKNO', 'BYMONTH', 'BYSETPOS', 'WKST',
+)
+
+FOLD_LIMIT = 74  # RFC 5545: 75 octets per line, including the leading fold space
+CRLF = b'\r\n'
+ALLDAY_FLAGS = b'X-FUNAMBOL-ALLDAY:1\r\nX-MICROSOFT-CDO-ALLDAYEVENT:TRUE\r\n'
+
+
+def is_timed(value):
+    """Check whether an event start or end is a timed (aware datetime) value."""
+    return isinstance(value, datetime) and value.tzinfo is not None
+
+
+def escape_text(text):
+    """Escape a TEXT value per RFC 5545 section 3.3.11 (icalendar-compatible)."""
+    return (
+        text.replace('\\N', '\n')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+
+def format_rrule(rule):
+    """
+    Format a recurrence rule as a canonical RRULE value.
+
+    Args:
+        rule: Dict of rule parts, e.g. {'freq': 'weekly', 'count': 10};
+            keys are case-insensitive, UNTIL is a date, BY* parts may be
+            lists
+
+    Returns:
+        RRULE value string, e.g. 'FREQ=WEEKLY;COUNT=10'
+
+    Raises:
+        ValueError: If FREQ is missing or a part is unknown
+    """
+    parts = {key.upper(): value for key, value in rule.items() if value is not None}
+    unknown = set(parts) - set(RRULE_PART_ORDER)
+    if unknown:
+        raise ValueError(f"Unknown RRULE parts: {', '.join(sorted(unknown))}")
+    if 'FREQ' not in parts:
+        raise ValueError('RRULE requires FREQ')
+
+    def format_value(value):
+        if isinstance(value, datetime):
+            return value.strftime('%Y%m%dT%H%M%SZ')
+        if isinstance(value, date):
+            return value.strftime('%Y%m%d')
+        return str(value).upper()
+
+    rendered = []
+    for key in RRULE_PART_ORDER:
+        if key in parts:
+            values = parts[key] if isinstance(parts[key], (list, tuple)) else [parts[key]]
+            rendered.append(f"{key}={','.join(format_value(v) for v in values)}")
+    return ';'.join(rendered)
+
+
+def fold_line(line):
+    """
+    Fold an encoded content line to at most 75 octets per physical line.
+
+    Folds never split a multi-byte UTF-8 sequence, and, like icalendar,
+    never leave a backslash escape dangling at the end of a line.
+
+    Args:
+        line: Content line as UTF-8 bytes, without line break
+
+    Returns:
+        Folded line bytes, without trailing line break
+    """
+    if len(line) <= FOLD_LIMIT:
+        return line
+
+    parts = []
+    start = 0
+    while len(line) - start > FOLD_LIMIT:
+        end = start + FOLD_LIMIT
+        # Back off to the first byte of a UTF-8 sequence
+        while line[end] & 0xC0 == 0x80:
+            end -= 1
+        if end - 1 > start and line[end - 1] in b'\\^':
+            end -= 1
+        parts.append(line[start:end])
+        start = end
+    parts.append(line[start:])
+    return b'\r\n '.join(parts)
+
+
+class IcalendarSerializer:
+    """Serialize through the icalendar object model."""
+
+    name = 'icalendar'
+
+    def write(self, out, calname, events, dtstamp):
+        """
+        Write a complete VCALENDAR.
+
+        Args:
+            out: Binary file-like object
+            calname: Calendar name
+            events: Iterable of EventRecord
+            dtstamp: Aware UTC datetime used for every DTSTAMP
+        """
+        # Imported on use: icalendar is slow to import and only this backend needs it
+        from icalendar import Calendar, Event, vRecur
+
+        calendar = Calendar()
+        calendar.add('prodid', f'-//{calname}//')
+        calendar.add('version', '2.0')
+        calendar.add('calscale', 'GREGORIAN')
+        calendar.add('x-wr-calname', calname)
+
+        for record in events:
+            event = Event()
+            event.add('summary', record.summary)
+            event.add('dtstart', record.start)
+            event.add('dtend', record.end)
+            event.add('dtstamp', dtstamp)
+            event.add('uid', record.uid)
+            if record.rrule:
+                event.add('rrule', vRecur.from_ical(record.rrule))
+            if record.exdates:
+                event.add('exdate', list(record.exdates))
+            if record.description:
+                event.add('description', record.description)
+            if not is_timed(record.start):
+                # Compatibility flags for Apple/Microsoft clients
+                event.add('x-funambol-allday', '1')
+                event.add('x-microsoft-cdo-alldayevent', 'TRUE')
+            calendar.add_component(event)
+
+        out.write(calendar.to_ical())
+
+
+class StreamSerializer:
+    """
+    Write RFC 5545 text directly, one content line at a time.
+
+    Produces the same bytes as IcalendarSerializer for the all-day and
+    UTC timed events this project emits, without building an object tree
+    or holding the whole file in memory.
+    """
+
+    name = 'stream'
+
+    def write(self, out, calname, events, dtstamp):
+        """
+        Write a complete VCALENDAR.
+
+        Args:
+            out: Binary file-like object
+            calname: Calendar name
+            events: Iterable of EventRecord
+            dtstamp: Aware UTC datetime used for every DTSTAMP
+        """
+        out.write(self.header(calname))
+        stamp = f"DTSTAMP:{dtstamp.strftime('%Y%m%dT%H%M%SZ')}\r\n".encode('ascii')
+        for record in events:
+            out.write(self.event(record, stamp))
+        out.write(b'END:VCALENDAR\r\n')
+
+    @staticmethod
+    def header(calname):
+        """Render the VCALENDAR header lines."""
+        name = escape_text(calname)
+        return b''.join(fold_line(line.encode('utf-8')) + CRLF for line in (
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            f'PRODID:-//{name}//',
+            'CALSCALE:GREGORIAN',
+            f'X-WR-CALNAME:{name}',
+        ))
+
+    @staticmethod
+    def event(record, stamp):
+        """
+        Render one VEVENT block.
+
+        Args:
+            record: EventRecord
+            stamp: Pre-rendered DTSTAMP line bytes (with line break)
+        """
+        timed = is_timed(record.start)
+        if timed:
+            dates = (f"DTSTART:{record.start.strftime('%Y%m%dT%H%M%SZ')}\r\n"
+                     f"DTEND:{record.end.strftime('%Y%m%dT%H%M%SZ')}\r\n")
+        else:
+            dates = (f"DTSTART;VALUE=DATE:{record.start.strftime('%Y%m%d')}\r\n"
+                     f"DTEND;VALUE=DATE:{record.end.strftime('%Y%m%d')}\r\n")
+        lines = [
+            b'BEGIN:VEVENT\r\n',
+            fold_line(f'SUMMARY:{escape_text(record.summary)}'.encode('utf-8')), CRLF,
+            dates.encode('ascii'),
+            stamp,
+            fold_line(f'UID:{escape_text(record.uid)}'.encode('utf-8')), CRLF,
+        ]
+        if record.rrule:
+            lines += [fold_line(f'RRULE:{record.rrule}'.encode('ascii')), CRLF]
+        if record.exdates:
+            exdates = ','.join(d.strftime('%Y%m%d') for d in record.exdates)
+            lines += [fold_line(f'EXDATE;VALUE=DATE:{exdates}'.encode('ascii')), CRLF]
+        if record.description:
+            lines += [fold_line(f'DESCRIPTION:{escape_text(record.description)}'.encode('utf-8')), CRLF]
+        if not timed:
+            lines.append(ALLDAY_FLAGS)
+        lines.append(b'END:VEVENT\r\n')
+        return b''.join(lines)
+
+
+SERIALIZERS = {
+    IcalendarSerializer.name: IcalendarSerializer,
+    StreamSerializer.name: StreamSerializer,
+}
+
+
+def get_serializer(name):
+    """
+    Look up a serializer backend by name.
+
+    Args:
+        name: 'icalendar' or 'stream'
+
+    Returns:
+        Serializer instance
+    """
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown serializer '{name}', expected one of: {', '.join(SERIALIZERS)}")
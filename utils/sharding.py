@@ -0,0 +1,330 @@
+"""Sharded generation: deterministic feed partitioning, partial manifests and the merge step."""
+
+import os
+import re
+import glob
+import gzip
+import json
+import shutil
+import hashlib
+import tempfile
+from collections import namedtuple
+from config import settings
+from .calendar_helper import file_sha256
+from .compress import brotli
+from .manifest import load_manifest, set_manifest_entries
+from .metrics import metrics
+
+PARTIAL_MANIFEST_PATTERN = 'manifest.shard-*-of-*.json'
+_PARTIAL_MANIFEST_RE = re.compile(r'manifest\.shard-(\d+)-of-(\d+)\.json$')
+
+# A partial manifest as loaded by load_partial_manifests(): directory is
+# where the shard wrote its files, data the parsed JSON
+PartialManifest = namedtuple('PartialManifest', 'path directory data')
+
+
+class Shard(namedtuple('Shard', 'index count')):
+    """Shard index (1-based) out of count shards."""
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parse an 'i/N' shard specification.
+
+        Raises:
+            ValueError: If it is malformed or i is not within 1..N
+        """
+        index, _, count = text.partition('/')
+        if not index.isdigit() or not count.isdigit() or not 1 <= int(index) <= int(count):
+            raise ValueError(f"Invalid shard '{text}', expected i/N with 1 <= i <= N")
+        return cls(int(index), int(count))
+
+    def owns(self, feed):
+        """Check whether a feed is assigned to this shard."""
+        return shard_of(feed, self.count) == self.index
+
+    @property
+    def manifest_name(self):
+        """Filename of this shard's partial manifest."""
+        return f'manifest.shard-{self.index}-of-{self.count}.json'
+
+    def __str__(self):
+        return f'{self.index}/{self.count}'
+
+
+def shard_of(feed, count):
+    """
+    Shard a feed is assigned to.
+
+    The assignment hashes the feed name with sha256 rather than hash(),
+    which is salted per process, so every node, run and Python version
+    computes the same partition.
+
+    Args:
+        feed: Feed name (output filename without .ics, e.g. 'weather_Ningbo')
+        count: Number of shards
+
+    Returns:
+        1-based shard index
+    """
+    digest = hashlib.sha256(feed.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def catalog_digest(feeds):
+    """Digest of a run's full feed list, compared across shards by the merge."""
+    return hashlib.sha256('\n'.join(sorted(set(feeds))).encode('utf-8')).hexdigest()
+
+
+def written_files():
+    """
+    Manifest entries of the files written or confirmed unchanged in this run.
+
+    write_output() records each file under its name without extension in
+    the run metrics, which worker processes ship back to the parent.
+    """
+    written = {name for name, entry in metrics.snapshot()['generators'].items() if 'bytes' in entry}
+    return {
+        filename: entry for filename, entry in load_manifest().items()
+        if os.path.splitext(filename)[0] in written
+    }
+
+
+def write_partial_manifest(shard, feeds, failed, options):
+    """
+    Write a shard's partial manifest into the output directory.
+
+    Args:
+        shard: Shard
+        feeds: Every feed of the run, before sharding
+        failed: Names of the tasks that failed in this shard
+        options: JSON-serializable run options; the merge requires every
+            shard to have run with the same options
+
+    Returns:
+        Path of the partial manifest
+    """
+    data = {
+        'shard': shard.index,
+        'count': shard.count,
+        'catalog': catalog_digest(feeds),
+        'options': options,
+        'feeds': sorted(feed for feed in set(feeds) if shard.owns(feed)),
+        'failed': sorted(failed),
+        'files': dict(sorted(written_files().items())),
+    }
+    os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(settings.OUTPUT_DIR, shard.manifest_name)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.OUTPUT_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def load_partial_manifests(directories):
+    """
+    Load the partial manifests found in shard output directories.
+
+    Args:
+        directories: Directories shards wrote to (a directory may hold
+            several shards' output)
+
+    Returns:
+        (list of PartialManifest, list of problems) tuple
+    """
+    partials, problems = [], []
+    for directory in directories:
+        paths = sorted(glob.glob(os.path.join(directory, PARTIAL_MANIFEST_PATTERN)))
+        if not paths:
+            problems.append(f'{directory}: no partial manifest ({PARTIAL_MANIFEST_PATTERN})')
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                match = _PARTIAL_MANIFEST_RE.search(path)
+                if not match or (data['shard'], data['count']) != (int(match.group(1)), int(match.group(2))):
+                    raise ValueError('shard number does not match the filename')
+                absent = [key for key in ('catalog', 'options', 'feeds', 'failed', 'files') if key not in data]
+                if absent:
+                    raise ValueError(f"missing {', '.join(absent)}")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                problems.append(f'{path}: unreadable partial manifest: {e}')
+                continue
+            partials.append(PartialManifest(path, directory, data))
+    return partials, problems
+
+
+def _decoded_sha256(path, encoding):
+    """sha256 of a compressed variant's decompressed content, or None if it cannot be checked."""
+    if encoding == 'gz':
+        with gzip.open(path, 'rb') as f:
+            sha256 = hashlib.sha256()
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                sha256.update(chunk)
+            return sha256.hexdigest()
+    if encoding == 'br' and brotli is not None:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(brotli.decompress(f.read())).hexdigest()
+    return None
+
+
+def check_file(directory, filename, entry):
+    """
+    Check an output file and its compressed variants against a manifest entry.
+
+    Returns:
+        List of problems (empty if the file is intact)
+    """
+    path = os.path.join(directory, filename)
+    if file_sha256(path) != entry.get('sha256'):
+        return [f'{path}: missing or does not match its manifest sha256']
+    problems = []
+    if os.path.getsize(path) != entry.get('size'):
+        problems.append(f'{path}: size does not match the manifest')
+    if filename.endswith('.ics'):
+        with open(path, 'rb') as f:
+            head = f.read(15)
+            f.seek(max(0, entry['size'] - 15))
+            tail = f.read()
+        if head != b'BEGIN:VCALENDAR' or not tail.endswith(b'END:VCALENDAR\r\n'):
+            problems.append(f'{path}: not a complete VCALENDAR')
+    for encoding, size in entry.get('compressed', {}).items():
+        variant = f'{path}.{encoding}'
+        try:
+            if os.path.getsize(variant) != size:
+                problems.append(f'{variant}: size does not match the manifest')
+            elif _decoded_sha256(variant, encoding) not in (None, entry['sha256']):
+                problems.append(f'{variant}: does not decompress to {filename}')
+        except Exception as e:  # OSError, or a gzip/brotli decoding error
+            problems.append(f'{variant}: {e}')
+    return problems
+
+
+def validate_shards(partials):
+    """
+    Check that a set of partial manifests forms one complete, consistent run.
+
+    Every shard 1..N must be present exactly once, all with the same N,
+    feed catalog and options; each shard's feeds must be the ones the
+    partition assigns it, and together cover the catalog; no file may come
+    from two shards; and every listed file must match its manifest entry.
+
+    Returns:
+        List of problems (empty if the shards can be merged)
+    """
+    if not partials:
+        return ['no partial manifests']
+    problems = []
+    first = partials[0].data
+    count = first['count']
+    seen = {}
+    for partial in partials:
+        data = partial.data
+        for key in ('count', 'catalog', 'options'):
+            if data[key] != first[key]:
+                problems.append(f'{partial.path}: {key} differs from {partials[0].path}')
+        if data['shard'] in seen:
+            problems.append(f"{partial.path}: shard {data['shard']} also in {seen[data['shard']]}")
+        seen[data['shard']] = partial.path
+    missing = sorted(set(range(1, count + 1)) - set(seen))
+    if missing:
+        problems.append(f"missing shards: {', '.join(map(str, missing))} of {count}")
+    if problems:
+        return problems
+
+    feeds = []
+    for partial in partials:
+        shard = Shard(partial.data['shard'], count)
+        wrong = [feed for feed in partial.data['feeds'] if not shard.owns(feed)]
+        if wrong:
+            problems.append(f"{partial.path}: feeds not assigned to shard {shard}: {', '.join(wrong)}")
+        feeds += partial.data['feeds']
+    if len(feeds) != len(set(feeds)) or catalog_digest(feeds) != first['catalog']:
+        problems.append('the shards\' feeds do not add up to the run\'s feed catalog')
+
+    sources = {}
+    for partial in partials:
+        for filename, entry in partial.data['files'].items():
+            if filename in sources:
+                problems.append(f'{filename}: written by both {sources[filename]} and {partial.path}')
+                continue
+            sources[filename] = partial.path
+            problems += check_file(partial.directory, filename, entry)
+    return problems
+
+
+def _copy(source, target):
+    """Copy a file over target atomically."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=f'.{os.path.basename(target)}.',
+                                    suffix='.tmp')
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def merge_shards(directories):
+    """
+    Merge shard outputs into the output directory.
+
+    The shards are validated first and nothing is copied unless they form
+    one complete run. Files whose content is already in place are left
+    untouched (keeping their modification time); the others are copied
+    with all their compressed variants, each atomically, as is any variant
+    that differs from the shard's even though its file is in place. Manifest
+    entries are updated in one write. The merged files are then checked
+    again in place.
+
+    Args:
+        directories: Directories holding the shards' outputs and partial manifests
+
+    Returns:
+        (number of files copied, list of problems) tuple; shards that
+        reported failed tasks are listed as problems, but their other
+        files are merged
+    """
+    partials, problems = load_partial_manifests(directories)
+    problems += validate_shards(partials)
+    if problems:
+        return 0, problems
+
+    target_dir = settings.OUTPUT_DIR
+    os.makedirs(target_dir, exist_ok=True)
+    entries = {}
+    copied = 0
+    for partial in partials:
+        for filename, entry in partial.data['files'].items():
+            entries[filename] = entry
+            source = os.path.join(partial.directory, filename)
+            target = os.path.join(target_dir, filename)
+            if os.path.abspath(source) == os.path.abspath(target):
+                continue
+            changed = file_sha256(target) != entry['sha256']
+            if changed:
+                _copy(source, target)
+                copied += 1
+            # Compared byte for byte rather than by size: a refresh that only
+            # moves DTSTAMP keeps the compressed size, and .br cannot be
+            # decoded to check it without brotli
+            for encoding in entry.get('compressed', {}):
+                variant = f'{source}.{encoding}'
+                if changed or file_sha256(f'{target}.{encoding}') != file_sha256(variant):
+                    _copy(variant, f'{target}.{encoding}')
+        for name in partial.data['failed']:
+            problems.append(f"shard {partial.data['shard']}: {name} failed")
+    set_manifest_entries(entries)
+
+    for filename, entry in entries.items():
+        problems += check_file(target_dir, filename, entry)
+    return copied, problems
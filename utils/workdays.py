@@ -0,0 +1,183 @@
+"""Workday and holiday lookups compiled into per-day arrays."""
+
+from array import array
+from datetime import date
+from bisect import bisect_left
+
+# Kinds of day, one byte per day in WorkdayCalendar.kinds
+REST = 0               # weekend
+WORKDAY = 1            # regular Monday-Friday workday
+HOLIDAY = 2            # statutory day off, weekends within the holiday included
+ADJUSTED_WORKDAY = 3   # weekend worked to make up for a holiday (调休上班)
+
+_default = None
+
+
+def _ordinal(day):
+    """Ordinal of a datetime.date or 'YYYY-MM-DD' string."""
+    return (date.fromisoformat(day) if isinstance(day, str) else day).toordinal()
+
+
+class WorkdayCalendar:
+    """
+    Workday calendar for a range of years.
+
+    Holiday and adjusted-workday data is compiled once into a byte per
+    day and a running count of workdays, so is_workday(), is_holiday(),
+    workdays_between() and add_workdays() take constant time, and
+    next_workdays() and workday_mask() are single slices.
+    """
+
+    def __init__(self, holidays, first_year, last_year):
+        """
+        Compile a calendar.
+
+        Args:
+            holidays: Dict of year to [(name, first day off, last day off,
+                adjusted workdays)], dates as 'YYYY-MM-DD' (see
+                PUBLIC_HOLIDAYS in config/holidays.py)
+            first_year: First year covered
+            last_year: Last year covered, inclusive
+
+        Raises:
+            ValueError: If the data contradicts itself or lies outside the years
+        """
+        self.first_year = first_year
+        self.last_year = last_year
+        self.base = date(first_year, 1, 1).toordinal()
+        self.end = date(last_year + 1, 1, 1).toordinal()
+        self.scheduled_years = frozenset(holidays)
+
+        # Ordinal 1 (0001-01-01) is a Monday
+        week = bytes([WORKDAY] * 5 + [REST] * 2)
+        offset = (self.base - 1) % 7
+        days = self.end - self.base
+        self.kinds = bytearray((week[offset:] + week * (days // 7 + 2))[:days])
+        # Index into self.names of the holiday a day belongs to, 0 for none
+        self.name_index = array('H', bytes(2 * days))
+        self.names = ['']
+
+        for year, entries in sorted(holidays.items()):
+            for name, start, end, workdays in entries:
+                self.names.append(name)
+                index = len(self.names) - 1
+                for ordinal in range(self._position(start), self._position(end) + 1):
+                    if self.kinds[ordinal] == ADJUSTED_WORKDAY:
+                        raise ValueError(f'{name}: {date.fromordinal(self.base + ordinal)} is also a workday')
+                    self.kinds[ordinal] = HOLIDAY
+                    self.name_index[ordinal] = index
+                for workday in workdays:
+                    ordinal = self._position(workday)
+                    if self.kinds[ordinal] == HOLIDAY:
+                        raise ValueError(f'{name}: adjusted workday {workday} is a holiday')
+                    self.kinds[ordinal] = ADJUSTED_WORKDAY
+                    self.name_index[ordinal] = index
+
+        # workdays_before[i]: workdays among the first i days;
+        # workday_ordinals: every workday in order
+        self.workdays_before = array('i', [0])
+        self.workday_ordinals = array('i')
+        count = 0
+        for ordinal, kind in enumerate(self.kinds, self.base):
+            if kind == WORKDAY or kind == ADJUSTED_WORKDAY:
+                count += 1
+                self.workday_ordinals.append(ordinal)
+            self.workdays_before.append(count)
+
+    def _position(self, day):
+        """Index of a day in the compiled arrays."""
+        position = _ordinal(day) - self.base
+        if not 0 <= position < len(self.kinds):
+            raise ValueError(f'{day} is outside {self.first_year}-{self.last_year}')
+        return position
+
+    def kind(self, day):
+        """Return the kind of a day: REST, WORKDAY, HOLIDAY or ADJUSTED_WORKDAY."""
+        return self.kinds[self._position(day)]
+
+    def is_workday(self, day):
+        """Check whether a day is worked, adjusted workdays included."""
+        kind = self.kinds[self._position(day)]
+        return kind == WORKDAY or kind == ADJUSTED_WORKDAY
+
+    def is_holiday(self, day):
+        """Check whether a day is a statutory day off."""
+        return self.kinds[self._position(day)] == HOLIDAY
+
+    def holiday_name(self, day):
+        """Name of the holiday a day off or adjusted workday belongs to, or None."""
+        return self.names[self.name_index[self._position(day)]] or None
+
+    def workdays_between(self, first, last):
+        """
+        Count workdays in a date range.
+
+        Args:
+            first: First day
+            last: Last day, inclusive
+
+        Returns:
+            Number of workdays (0 if last is before first)
+        """
+        start, stop = self._position(first), self._position(last) + 1
+        return max(0, self.workdays_before[stop] - self.workdays_before[start])
+
+    def add_workdays(self, day, count):
+        """
+        Move a number of workdays from a day, e.g. for SLA deadlines.
+
+        add_workdays(day, 1) is the next workday after day, add_workdays(day, -1)
+        the last workday before it, and add_workdays(day, 0) the day itself if
+        it is a workday, otherwise the next workday.
+
+        Returns:
+            datetime.date
+
+        Raises:
+            ValueError: If the result lies outside the covered years
+        """
+        position = self._position(day)
+        if count > 0 or (count == 0 and not self.is_workday(day)):
+            # Workdays up to and including day, then count more
+            index = self.workdays_before[position + 1] + count - (count > 0)
+        else:
+            index = self.workdays_before[position] + count
+        if not 0 <= index < len(self.workday_ordinals):
+            raise ValueError(f'{count} workdays from {day} is outside {self.first_year}-{self.last_year}')
+        return date.fromordinal(self.workday_ordinals[index])
+
+    def next_workdays(self, day, count):
+        """
+        List workdays from a day on.
+
+        Args:
+            day: First day considered (included if it is a workday)
+            count: Number of workdays
+
+        Returns:
+            List of up to count datetime.date, fewer at the end of the covered years
+        """
+        index = bisect_left(self.workday_ordinals, _ordinal(day))
+        return [date.fromordinal(ordinal) for ordinal in self.workday_ordinals[index:index + count]]
+
+    def workday_mask(self, first, last):
+        """
+        Workday flags for a date range, for bulk processing.
+
+        Returns:
+            bytes with one byte per day, 1 for workdays and 0 otherwise
+            (e.g. numpy.frombuffer(mask, dtype=bool))
+        """
+        kinds = self.kinds[self._position(first):self._position(last) + 1]
+        return bytes(kinds.translate(bytes([0, 1, 0, 1]) + bytes(252)))
+
+
+def get_workday_calendar():
+    """Return the shared calendar compiled from PUBLIC_HOLIDAYS over WORKDAY_YEARS."""
+    global _default
+    if _default is None:
+        from config.holidays import PUBLIC_HOLIDAYS
+        from config.settings import WORKDAY_YEARS
+
+        _default = WorkdayCalendar(PUBLIC_HOLIDAYS, *WORKDAY_YEARS)
+    return _default